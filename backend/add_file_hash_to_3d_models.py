@@ -0,0 +1,35 @@
+"""
+Script to add file_hash column to 3D model tables if it doesn't exist (database-agnostic)
+"""
+
+from sqlalchemy import text, inspect
+from app.db.session import engine
+
+TABLES = ['three_d_models', 'biometry_models']
+
+def add_file_hash_column():
+    """Add file_hash column (SHA-256) to 3D model tables if it doesn't exist"""
+    
+    inspector = inspect(engine)
+    
+    for table_name in TABLES:
+        if table_name not in inspector.get_table_names():
+            print(f"Table '{table_name}' does not exist, skipping")
+            continue
+        
+        column_names = [col['name'] for col in inspector.get_columns(table_name)]
+        
+        if 'file_hash' not in column_names:
+            print(f"Adding 'file_hash' column to {table_name} table...")
+            with engine.connect() as conn:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN file_hash VARCHAR(64)'))
+                conn.commit()
+            print(f"'file_hash' column added to {table_name}")
+        else:
+            print(f"'file_hash' column already exists in {table_name} table")
+    
+    # Existing rows are filled lazily on first analysis/export (hashing_service.get_stored_hash)
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    add_file_hash_column()
@@ -0,0 +1,25 @@
+"""
+Script to create indexes declared on models (foreign keys, list pagination) for existing tables
+"""
+
+from app.db.indexes import create_missing_indexes, find_unindexed_foreign_keys
+from app.db.session import engine
+
+def add_foreign_key_indexes():
+    """Create missing model indexes; safe to run repeatedly"""
+
+    created = create_missing_indexes(engine)
+    if created:
+        for name in created:
+            print(f"Index '{name}' created")
+    else:
+        print("All model indexes already exist")
+
+    unindexed = find_unindexed_foreign_keys(engine)
+    if unindexed:
+        print(f"Foreign keys without indexes (not used for lookups): {', '.join(unindexed)}")
+
+    print("Migration completed successfully!")
+
+if __name__ == "__main__":
+    add_foreign_key_indexes()
@@ -1,14 +1,15 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.core.config import settings
 from app.core.security import ALGORITHM
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal, get_async_engine
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -22,27 +23,46 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _token_user_id(token: str) -> int:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         user_id_raw = payload.get("sub")
         if user_id_raw is None:
-            raise credentials_exception
-        user_id = int(user_id_raw)
+            raise _credentials_exception()
+        return int(user_id_raw)
     except (JWTError, ValueError, TypeError):
-        raise credentials_exception
+        raise _credentials_exception()
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    user = crud.user.get_cached(db, id=_token_user_id(token))
+    if user is None:
+        raise _credentials_exception()
+    return user
 
-    user = crud.user.get(db, id=user_id)
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    # Same session as the endpoint's get_async_db, so a request holds one pool connection
+    user = await crud.user_async.get_cached(db, id=_token_user_id(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
@@ -54,6 +74,14 @@ def get_current_active_user(
     return current_user
 
 
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    if not crud.user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
 def get_current_active_admin(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
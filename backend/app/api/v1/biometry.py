@@ -1,29 +1,51 @@
 """FastAPI API endpoints for biometry operations."""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+import numpy as np
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.orm import Session
 
+from app import crud
+from app.api import deps
+from app.core.config import settings
+from app.models.user import User
 from app.schemas.biometry import (
+    BatchIngestRequest,
+    BatchIngestResponse,
     CalibrationExport,
     CalibrationPoint,
+    ChangeFeedResponse,
     CreateMapPoint,
     CreateModelPoint,
     CreatePair,
+    LiveCalibration,
     MapPoint,
     ModelPoint,
     ObjUploadResponse,
     Pair,
+    PairResidual,
+    PairWithCalibration,
+    PointDeleteResponse,
+    RobustCalibrationRequest,
+    RobustCalibrationResponse,
     StatusResponse,
 )
+from app.services.biometry_journal import JournaledBiometryState, biometry_sessions
 from app.services.biometry_storage import BiometryState
+from app.services.calibration import MIN_CALIBRATION_POINTS, ransac_similarity
+from app.services.mesh_snapping import SNAP_MODES, mesh_snap_service
+from app.utils.cache import LRUCache
 
 # Настройка логирования для модуля биометрии
 logger = logging.getLogger(__name__)
@@ -35,19 +57,49 @@ EXPORTS_DIR = BASE_DIR / "exports"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
-state = BiometryState()
+# Все маршруты модуля доступны только авторизованным пользователям
+router = APIRouter(dependencies=[Depends(deps.get_current_active_user)])
 
-router = APIRouter()
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Готовые экспорты калибровки по (сессия, версия состояния)
+_export_cache = LRUCache(max_entries=64)
+
+
+def get_session_state(
+    x_biometry_session: int = Header(..., description="ID сессии биометрии (BiometrySession)"),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> JournaledBiometryState:
+    """
+    Состояние точек и пар сессии биометрии из заголовка X-Biometry-Session
+
+    Сессия должна существовать в базе; закрытые (неактивные) сессии доступны
+    только администраторам.
+
+    Raises:
+        HTTPException: Если сессия не найдена или недоступна пользователю
+    """
+    db_session = crud.biometry_session.get(db, id=x_biometry_session)
+    if db_session is None or (not db_session.is_active and not crud.user.is_admin(current_user)):
+        logger.warning(f"Сессия биометрии {x_biometry_session} не найдена или недоступна пользователю {current_user.id}")
+        raise HTTPException(status_code=404, detail="Biometry session not found")
+    return biometry_sessions.get(str(db_session.id))
+
+
+async def _refresh(session: JournaledBiometryState) -> BiometryState:
+    """Актуальное состояние сессии; журнал дочитывается под файловой блокировкой в потоке"""
+    return await asyncio.to_thread(session.refresh)
 
 
 def _safe_filename(filename: str) -> str:
     return filename.replace("..", "_").replace("/", "_").replace("\\", "_")
 
 
-def _http_model_path() -> str | None:
-    if not state.last_uploaded_path:
+def _http_model_path(uploaded_path: str | None) -> str | None:
+    if not uploaded_path:
         return None
-    last_path = Path(state.last_uploaded_path)
+    last_path = Path(uploaded_path)
     try:
         relative = last_path.relative_to(BASE_DIR)
     except ValueError:
@@ -55,9 +107,31 @@ def _http_model_path() -> str | None:
     return "/" + relative.as_posix()
 
 
+def _snap_model_points(state: BiometryState, points: list[dict], mode: str | None) -> list[dict]:
+    """Привязывает точки к загруженной модели; без режима возвращает их без изменений"""
+    if mode is None or not points:
+        return points
+    if mode not in SNAP_MODES:
+        raise HTTPException(status_code=400, detail=f"snap must be one of: {', '.join(SNAP_MODES)}")
+    if not state.last_uploaded_path:
+        raise HTTPException(status_code=400, detail="Model not uploaded")
+    coordinates = np.array([[point["x"], point["y"], point["z"]] for point in points], dtype=np.float64)
+    try:
+        snapped, distances = mesh_snap_service.snap(state.last_uploaded_path, coordinates, mode)
+    except (OSError, ValueError) as exc:
+        logger.error(f"Не удалось привязать точки к модели {state.last_uploaded_path}: {str(exc)}")
+        raise HTTPException(status_code=400, detail="Failed to snap points to the uploaded model") from exc
+    logger.info(f"Точки модели привязаны ({mode}): {len(points)}, максимальное смещение={float(distances.max()):.4f}")
+    return [
+        {**point, "x": float(x), "y": float(y), "z": float(z)}
+        for point, (x, y, z) in zip(points, snapped)
+    ]
+
+
 @router.get("/status", response_model=StatusResponse)
-async def status() -> StatusResponse:
-    logger.info("Проверка статуса модуля биометрии")
+async def status(session: JournaledBiometryState = Depends(get_session_state)) -> StatusResponse:
+    logger.info(f"Проверка статуса модуля биометрии, сессия '{session.session_id}'")
+    state = await _refresh(session)
     if not state.last_uploaded_path:
         logger.warning("Модель еще не загружена")
         return StatusResponse(status="no-model", details="Модель не загружена")
@@ -66,14 +140,88 @@ async def status() -> StatusResponse:
         return StatusResponse(
             status="no-pairs",
             details="Нет связанных точек",
-            model_path=_http_model_path(),
+            model_path=_http_model_path(state.last_uploaded_path),
         )
     logger.info("Модуль биометрии готов к работе")
-    return StatusResponse(status="ready", model_path=_http_model_path())
+    return StatusResponse(status="ready", model_path=_http_model_path(state.last_uploaded_path))
+
+
+def _change_feed(session: JournaledBiometryState, since: int) -> ChangeFeedResponse:
+    """Изменения после версии since или полное состояние, если дельта недоступна"""
+    state = session.refresh()
+    version, changes = state.get_changes(since)
+    if changes is not None:
+        return ChangeFeedResponse(version=version, changes=changes)
+    snapshot = state.to_snapshot()
+    logger.info(f"Дельта с версии {since} недоступна, отправка полного состояния версии {snapshot['version']}")
+    return ChangeFeedResponse(
+        version=snapshot["version"],
+        reset=True,
+        model_path=_http_model_path(snapshot["last_uploaded_path"]),
+        model_points=snapshot["model_points"],
+        map_points=snapshot["map_points"],
+        pairs=snapshot["pairs"],
+    )
+
+
+@router.get("/changes", response_model=ChangeFeedResponse)
+async def get_changes(
+    since: int = 0,
+    wait: float = 0.0,
+    session: JournaledBiometryState = Depends(get_session_state),
+):
+    """Изменения точек и пар после версии since; при wait > 0 - ожидание изменений (long-poll)"""
+    deadline = time.monotonic() + min(max(wait, 0.0), settings.BIOMETRY_CHANGES_MAX_WAIT)
+    feed = await asyncio.to_thread(_change_feed, session, since)
+    while not feed.reset and not feed.changes and time.monotonic() < deadline:
+        await asyncio.sleep(settings.BIOMETRY_EVENTS_POLL_INTERVAL)
+        feed = await asyncio.to_thread(_change_feed, session, since)
+    logger.debug(f"Лента изменений сессии '{session.session_id}': с версии {since} до {feed.version}, изменений={len(feed.changes)}")
+    return feed
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    since: int | None = None,
+    last_event_id: str | None = Header(None),
+    session: JournaledBiometryState = Depends(get_session_state),
+):
+    """Поток изменений Server-Sent Events; id события - версия состояния"""
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else (await _refresh(session)).version
+    logger.info(f"Подписка на события сессии '{session.session_id}' с версии {since}")
+
+    async def events():
+        version = since
+        idle = 0.0
+        while not await request.is_disconnected():
+            feed = await asyncio.to_thread(_change_feed, session, version)
+            if feed.reset or feed.changes:
+                event = "reset" if feed.reset else "changes"
+                yield f"id: {feed.version}\nevent: {event}\ndata: {feed.model_dump_json(exclude_none=True)}\n\n"
+                version = feed.version
+                idle = 0.0
+            elif idle >= SSE_KEEPALIVE_SECONDS:
+                # Комментарий не дает прокси закрыть простаивающее соединение
+                yield ": keepalive\n\n"
+                idle = 0.0
+            await asyncio.sleep(settings.BIOMETRY_EVENTS_POLL_INTERVAL)
+            idle += settings.BIOMETRY_EVENTS_POLL_INTERVAL
+        logger.info(f"Подписчик событий сессии '{session.session_id}' отключился")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/upload-obj", response_model=ObjUploadResponse)
-async def upload_obj(file: Annotated[UploadFile, File(..., description="OBJ file")]):
+async def upload_obj(
+    file: Annotated[UploadFile, File(..., description="OBJ file")],
+    session: JournaledBiometryState = Depends(get_session_state),
+):
     logger.info(f"Начало загрузки OBJ файла: {file.filename}")
     
     if not file.filename or not file.filename.lower().endswith(".obj"):
@@ -86,8 +234,8 @@ async def upload_obj(file: Annotated[UploadFile, File(..., description="OBJ file
         logger.debug(f"Сохранение файла в: {target_path}")
         
         content = await file.read()
-        target_path.write_bytes(content)
-        state.set_uploaded_path(str(target_path))
+        await asyncio.to_thread(target_path.write_bytes, content)
+        await asyncio.to_thread(session.set_uploaded_path, str(target_path))
         
         logger.info(f"Успешно загружен OBJ файл: {file.filename}, размер: {len(content)} байт")
         
@@ -104,16 +252,24 @@ async def upload_obj(file: Annotated[UploadFile, File(..., description="OBJ file
 
 
 @router.get("/model-points", response_model=list[ModelPoint])
-async def list_model_points():
-    logger.debug(f"Получение {len(state.model_points)} точек модели")
-    return list(state.model_points.values())
+async def list_model_points(session: JournaledBiometryState = Depends(get_session_state)):
+    points = (await _refresh(session)).get_model_points()
+    logger.debug(f"Получение {len(points)} точек модели")
+    return points
 
 
 @router.post("/add-model-point", response_model=ModelPoint)
-async def add_model_point(payload: CreateModelPoint):
+async def add_model_point(
+    payload: CreateModelPoint,
+    snap: str | None = None,
+    session: JournaledBiometryState = Depends(get_session_state),
+):
     logger.info(f"Добавление точки модели с координатами: x={payload.x}, y={payload.y}, z={payload.z}")
+    # Привязка к сетке (загрузка модели, KD-деревья) выполняется в потоке
+    state = await _refresh(session)
+    data = (await asyncio.to_thread(_snap_model_points, state, [payload.model_dump()], snap))[0]
     try:
-        point = state.add_model_point(payload.model_dump())
+        point = await asyncio.to_thread(session.add_model_point, data)
         logger.info(f"Успешно добавлена точка модели с ID: {point['id']}")
         return point
     except Exception as e:
@@ -121,17 +277,31 @@ async def add_model_point(payload: CreateModelPoint):
         raise HTTPException(status_code=500, detail="Не удалось добавить точку модели")
 
 
+@router.delete("/model-points/{point_id}", response_model=PointDeleteResponse)
+async def delete_model_point(point_id: int, session: JournaledBiometryState = Depends(get_session_state)):
+    logger.info(f"Удаление точки модели с ID: {point_id}")
+    removed_pairs = await asyncio.to_thread(session.remove_model_point, point_id)
+    if removed_pairs is None:
+        logger.warning(f"Точка модели с ID {point_id} не найдена")
+        raise HTTPException(status_code=404, detail="Точка модели не найдена")
+    logger.info(f"Успешно удалена точка модели {point_id} и пары: {removed_pairs}")
+    return PointDeleteResponse(
+        status="deleted", removed_pairs=removed_pairs, calibration=(await _refresh(session)).get_calibration()
+    )
+
+
 @router.get("/map-points", response_model=list[MapPoint])
-async def list_map_points():
-    logger.debug(f"Получение {len(state.map_points)} точек карты")
-    return list(state.map_points.values())
+async def list_map_points(session: JournaledBiometryState = Depends(get_session_state)):
+    points = (await _refresh(session)).get_map_points()
+    logger.debug(f"Получение {len(points)} точек карты")
+    return points
 
 
 @router.post("/add-map-point", response_model=MapPoint)
-async def add_map_point(payload: CreateMapPoint):
+async def add_map_point(payload: CreateMapPoint, session: JournaledBiometryState = Depends(get_session_state)):
     logger.info(f"Добавление точки карты с координатами: lat={payload.lat}, lng={payload.lng}")
     try:
-        point = state.add_map_point(payload.model_dump())
+        point = await asyncio.to_thread(session.add_map_point, payload.model_dump())
         logger.info(f"Успешно добавлена точка карты с ID: {point['id']}")
         return point
     except Exception as e:
@@ -139,19 +309,34 @@ async def add_map_point(payload: CreateMapPoint):
         raise HTTPException(status_code=500, detail="Не удалось добавить точку карты")
 
 
+@router.delete("/map-points/{point_id}", response_model=PointDeleteResponse)
+async def delete_map_point(point_id: int, session: JournaledBiometryState = Depends(get_session_state)):
+    logger.info(f"Удаление точки карты с ID: {point_id}")
+    removed_pairs = await asyncio.to_thread(session.remove_map_point, point_id)
+    if removed_pairs is None:
+        logger.warning(f"Точка карты с ID {point_id} не найдена")
+        raise HTTPException(status_code=404, detail="Точка карты не найдена")
+    logger.info(f"Успешно удалена точка карты {point_id} и пары: {removed_pairs}")
+    return PointDeleteResponse(
+        status="deleted", removed_pairs=removed_pairs, calibration=(await _refresh(session)).get_calibration()
+    )
+
+
 @router.get("/pairs", response_model=list[Pair])
-async def list_pairs():
-    logger.debug(f"Получение {len(state.pairs)} пар точек")
-    return list(state.pairs.values())
+async def list_pairs(session: JournaledBiometryState = Depends(get_session_state)):
+    pairs = (await _refresh(session)).get_pairs()
+    logger.debug(f"Получение {len(pairs)} пар точек")
+    return pairs
 
 
-@router.post("/pairs", response_model=Pair)
-async def create_pair(payload: CreatePair):
+@router.post("/pairs", response_model=PairWithCalibration)
+async def create_pair(payload: CreatePair, session: JournaledBiometryState = Depends(get_session_state)):
     logger.info(f"Создание пары между точкой модели {payload.model_id} и точкой карты {payload.map_id}")
     try:
-        pair = state.add_pair(payload.model_id, payload.map_id)
+        pair = await asyncio.to_thread(session.add_pair, payload.model_id, payload.map_id)
+        calibration = (await _refresh(session)).get_calibration()
         logger.info(f"Успешно создана пара с ID: {pair['id']}")
-        return pair
+        return PairWithCalibration(**pair, calibration=calibration)
     except KeyError as exc:
         logger.warning(f"Не удалось создать пару: {str(exc)}")
         raise HTTPException(status_code=404, detail=str(exc)) from exc
@@ -160,69 +345,211 @@ async def create_pair(payload: CreatePair):
         raise HTTPException(status_code=500, detail="Не удалось создать пару")
 
 
-@router.delete("/pairs/{pair_id}", response_model=StatusResponse)
-async def delete_pair(pair_id: int):
+@router.post("/batch", response_model=BatchIngestResponse)
+async def ingest_batch(payload: BatchIngestRequest, session: JournaledBiometryState = Depends(get_session_state)):
+    items = len(payload.model_points) + len(payload.map_points) + len(payload.pairs)
+    logger.info(
+        f"Пакетное добавление: точек модели={len(payload.model_points)}, "
+        f"точек карты={len(payload.map_points)}, пар={len(payload.pairs)}"
+    )
+    if items > settings.BIOMETRY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {settings.BIOMETRY_BATCH_MAX_ITEMS} items")
+    state = await _refresh(session)
+    model_points = await asyncio.to_thread(
+        _snap_model_points, state, [point.model_dump() for point in payload.model_points], payload.snap
+    )
+    try:
+        result = await asyncio.to_thread(
+            session.add_batch,
+            model_points,
+            [point.model_dump() for point in payload.map_points],
+            [pair.model_dump(exclude_none=True) for pair in payload.pairs],
+        )
+        return BatchIngestResponse(
+            model_points=result["model_points"],
+            map_points=result["map_points"],
+            pairs=result["pairs"],
+            created_pairs=len(result["created_pairs"]),
+            calibration=(await _refresh(session)).get_calibration(),
+        )
+    except ValueError as exc:
+        logger.warning(f"Пакет отклонен: {str(exc)}")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as e:
+        logger.error(f"Ошибка пакетного добавления: {str(e)}")
+        raise HTTPException(status_code=500, detail="Не удалось добавить пакет точек")
+
+
+@router.delete("/pairs/{pair_id}", response_model=PointDeleteResponse)
+async def delete_pair(pair_id: int, session: JournaledBiometryState = Depends(get_session_state)):
     logger.info(f"Удаление пары с ID: {pair_id}")
     try:
-        removed = state.clear_pair(pair_id)
+        removed = await asyncio.to_thread(session.clear_pair, pair_id)
         if not removed:
             logger.warning(f"Пара с ID {pair_id} не найдена")
             raise HTTPException(status_code=404, detail="Пара не найдена")
         logger.info(f"Успешно удалена пара с ID: {pair_id}")
-        return StatusResponse(status="deleted")
+        return PointDeleteResponse(
+            status="deleted", removed_pairs=[pair_id], calibration=(await _refresh(session)).get_calibration()
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка удаления пары {pair_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Не удалось удалить пару")
 
 
+@router.get("/calibration", response_model=LiveCalibration)
+async def live_calibration(allow_scale: bool = True, session: JournaledBiometryState = Depends(get_session_state)):
+    calibration = (await _refresh(session)).get_calibration(with_scale=allow_scale)
+    if calibration is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At least {MIN_CALIBRATION_POINTS} non-collinear pairs are required",
+        )
+    logger.debug(f"Текущая калибровка: пар={calibration['points_count']}, RMS={calibration['rms_error']:.6f}")
+    return calibration
+
+
+@router.post("/calibrate-robust", response_model=RobustCalibrationResponse)
+async def calibrate_robust(
+    payload: RobustCalibrationRequest,
+    session: JournaledBiometryState = Depends(get_session_state),
+) -> RobustCalibrationResponse:
+    logger.info(f"Начало устойчивой калибровки по парам: порог={payload.inlier_threshold}, итераций={payload.max_iterations}")
+    pair_ids, model_coords, map_coords = (await _refresh(session)).get_calibration_pairs()
+    if len(pair_ids) < MIN_CALIBRATION_POINTS:
+        logger.warning(f"Недостаточно пар для калибровки: {len(pair_ids)}")
+        raise HTTPException(status_code=400, detail=f"At least {MIN_CALIBRATION_POINTS} pairs are required")
+
+    try:
+        # Перебор гипотез RANSAC - вычисления на CPU, выполняются вне цикла событий
+        result = await asyncio.to_thread(
+            ransac_similarity,
+            np.asarray(model_coords, dtype=np.float64),
+            np.asarray(map_coords, dtype=np.float64),
+            inlier_threshold=payload.inlier_threshold,
+            max_iterations=payload.max_iterations,
+            confidence=payload.confidence,
+            with_scale=payload.allow_scale,
+            seed=payload.seed,
+        )
+    except ValueError as exc:
+        logger.warning(f"Не удалось рассчитать калибровку: {str(exc)}")
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    residuals = [
+        PairResidual(pair_id=pair_id, residual=residual, inlier=inlier)
+        for pair_id, residual, inlier in zip(pair_ids, result["residuals"], result["inlier_mask"])
+    ]
+    logger.info(f"Устойчивая калибровка завершена: инлаеров={sum(r.inlier for r in residuals)}/{len(residuals)}")
+    return RobustCalibrationResponse(
+        matrix=result["matrix"],
+        scale=result["scale"],
+        rotation=result["rotation"],
+        translation=result["translation"],
+        rms_error=result["rms_error"],
+        inlier_threshold=result["inlier_threshold"],
+        iterations=result["iterations"],
+        inliers=[r.pair_id for r in residuals if r.inlier],
+        outliers=[r.pair_id for r in residuals if not r.inlier],
+        residuals=residuals,
+    )
+
+
+def _build_export(session_id: str, snapshot: dict) -> bytes:
+    """Сериализует экспорт калибровки из согласованного снимка состояния"""
+    model_points = {point["id"]: point for point in snapshot["model_points"]}
+    map_points = {point["id"]: point for point in snapshot["map_points"]}
+    calibration_pairs = [
+        CalibrationPoint(
+            model_point=ModelPoint(**model_points[pair["model_id"]]),
+            geo_point=MapPoint(**map_points[pair["map_id"]]),
+        )
+        for pair in snapshot["pairs"]
+    ]
+    export = CalibrationExport(model_path=_http_model_path(snapshot["last_uploaded_path"]) or "", pairs=calibration_pairs)
+    logger.debug(f"Экспорт сессии '{session_id}' версии {snapshot['version']} сериализован: {len(calibration_pairs)} пар")
+    return export.model_dump_json(indent=2).encode("utf-8")
+
+
+def _persist_export(session_id: str, version: int, content: bytes) -> Path:
+    """Сохраняет экспорт на диск (одно имя на версию) и удаляет устаревшие файлы"""
+    export_path = EXPORTS_DIR / f"calibration-{session_id}-v{version}.json"
+    if not export_path.exists():
+        # Уникальное временное имя: ту же версию могут сохранять несколько воркеров
+        temp_path = EXPORTS_DIR / f"{export_path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            temp_path.write_bytes(content)
+            temp_path.replace(export_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            raise
+        logger.info(f"Экспорт калибровки сохранен: {export_path.name}")
+    _prune_exports()
+    return export_path
+
+
+def _prune_exports() -> None:
+    """Удаляет сохраненные экспорты старше срока хранения и сверх лимита количества"""
+    cutoff = time.time() - settings.BIOMETRY_EXPORTS_RETENTION_DAYS * 86400
+    exports = sorted(
+        ((path.stat().st_mtime, path) for path in EXPORTS_DIR.glob("calibration-*.json")),
+        reverse=True,
+    )
+    for position, (mtime, path) in enumerate(exports):
+        if position >= settings.BIOMETRY_EXPORTS_MAX_FILES or mtime < cutoff:
+            try:
+                path.unlink()
+                logger.info(f"Устаревший экспорт калибровки удален: {path.name}")
+            except OSError as e:
+                logger.warning(f"Не удалось удалить экспорт {path.name}: {str(e)}")
+
+
 @router.post("/export-config")
-async def export_config():
-    logger.info("Начало экспорта конфигурации")
+async def export_config(
+    request: Request,
+    persist: bool = False,
+    session: JournaledBiometryState = Depends(get_session_state),
+):
+    logger.info(f"Начало экспорта конфигурации, сессия '{session.session_id}'")
+    snapshot = (await _refresh(session)).to_snapshot()
     
-    if not state.last_uploaded_path:
+    if not snapshot["last_uploaded_path"]:
         logger.warning("Экспорт не удался: модель не загружена")
         raise HTTPException(status_code=400, detail="Model not uploaded")
-    if not state.pairs:
+    if not snapshot["pairs"]:
         logger.warning("Экспорт не удался: нет пар для экспорта")
         raise HTTPException(status_code=400, detail="No pairs to export")
 
+    version = snapshot["version"]
+    etag = f'"{session.session_id}-{version}"'
+    export_name = f"calibration-{session.session_id}-v{version}.json"
+    headers = {"ETag": etag, "Content-Disposition": f'attachment; filename="{export_name}"'}
+
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        logger.info(f"Экспорт не изменился (версия {version}), ответ 304")
+        return Response(status_code=304, headers={"ETag": etag})
+
     try:
-        calibration_pairs: list[CalibrationPoint] = []
-        logger.info(f"Экспорт {len(state.pairs)} калибровочных пар")
-        
-        for pair in state.pairs.values():
-            model_point = state.model_points[pair["model_id"]]
-            map_point = state.map_points[pair["map_id"]]
-            calibration_pairs.append(
-                CalibrationPoint(
-                    model_point=ModelPoint(**model_point),
-                    geo_point=MapPoint(**map_point),
-                )
-            )
-        
-        export = CalibrationExport(model_path=_http_model_path() or "", pairs=calibration_pairs)
-        export_name = f"calibration-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
-        export_path = EXPORTS_DIR / export_name
-        
-        logger.debug(f"Запись файла экспорта в: {export_path}")
-        export_path.write_text(export.model_dump_json(indent=2))
-        
-        logger.info(f"Успешно экспортирована конфигурация в: {export_name}")
-        return FileResponse(
-            path=export_path,
-            filename=export_name,
-            media_type="application/json",
+        content = _export_cache.get_or_set(
+            (session.session_id, version), lambda: _build_export(session.session_id, snapshot)
         )
+        if persist:
+            await asyncio.to_thread(_persist_export, session.session_id, version, content)
+        
+        logger.info(f"Успешно экспортирована конфигурация: {export_name}, {len(snapshot['pairs'])} пар")
+        return Response(content=content, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Ошибка во время экспорта конфигурации: {str(e)}")
         raise HTTPException(status_code=500, detail="Не удалось экспортировать конфигурацию")
 
 
 @router.delete("/clear-points", response_model=StatusResponse)
-async def clear_points():
+async def clear_points(session: JournaledBiometryState = Depends(get_session_state)):
     logger.info("Очистка всех точек и пар биометрии")
     try:
-        state.reset_points()
+        await asyncio.to_thread(session.reset_points)
         logger.info("Успешно очищены все точки и пары")
         return StatusResponse(status="cleared")
     except Exception as e:
@@ -1,38 +1,71 @@
+import math
 from datetime import datetime, timedelta
 from typing import Any, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
+from app.core.security import PasswordHashBusy, create_access_token, verify_and_update_password
 from app.models.user import User, UserRole, UserAccountStatus
+from app.utils.rate_limit import SlidingWindowRateLimiter
 
 router = APIRouter()
 
+login_rate_limiter = SlidingWindowRateLimiter(
+    max_attempts=settings.LOGIN_RATE_LIMIT_ATTEMPTS, window=settings.LOGIN_RATE_LIMIT_WINDOW
+)
+
 @router.post("/login", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db),
+async def login_access_token(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.user.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
-    if not user:
+    client_host = request.client.host if request.client else "unknown"
+    rate_limit_key = (client_host, form_data.username)
+    retry_after = login_rate_limiter.hit(rate_limit_key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    # Password verification runs on the hashing pool, not on the event loop
+    user = await crud.user_async.get_by_username(db, username=form_data.username)
+    valid, new_hash = (False, None)
+    if user:
+        try:
+            valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+        except PasswordHashBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts in progress, try again later",
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+            )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect username or password"
         )
+    login_rate_limiter.reset(rate_limit_key)
+    
+    # Stored hash uses outdated cost parameters - replace it with the current ones
+    if new_hash:
+        user.hashed_password = new_hash
     
     # Update last login time
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    crud.user.invalidate_cached(user.id)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
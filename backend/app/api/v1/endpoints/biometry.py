@@ -3,6 +3,7 @@
 """
 from fastapi import APIRouter
 
+from app.api.v1 import biometry as biometry_points
 from app.api.v1.endpoints import biometry_models, biometry_sessions, biometry_export
 
 router = APIRouter()
@@ -10,3 +11,4 @@ router = APIRouter()
 router.include_router(biometry_models.router, tags=["biometry-models"])
 router.include_router(biometry_sessions.router, tags=["biometry-sessions"])
 router.include_router(biometry_export.router, tags=["biometry-export"])
+router.include_router(biometry_points.router, tags=["biometry-points"])
@@ -5,7 +5,6 @@ from typing import Any
 import os
 import logging
 import time
-import hashlib
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -16,7 +15,10 @@ from app.api import deps
 from app.models.user import User
 from app.models.biometry import BiometryStatus
 from app.services.assimp_service import assimp_service
-from app.crud.crud_biometry import generate_biometry_file_path
+from app.services.calibration import transformation_to_matrix
+from app.services.export_cache import biometry_export_cache
+from app.services.hashing_service import hashing_service
+from app.utils.mesh_helpers import matrix_digest, pose_matrix
 
 logger = logging.getLogger(__name__)
 
@@ -48,34 +50,46 @@ async def export_biometry_model(
             logger.error(f"Файл модели не найден на диске: {session.model.file_path}")
             raise HTTPException(status_code=404, detail="Model file not found on disk")
         
-        timestamp = int(time.time())
-        export_filename = f"biometry_model_export_{timestamp}.{export_request.export_format.value}"
-        export_path = generate_biometry_file_path(export_filename, "export")
-        
-        logger.info(f"Конвертация модели в формат {export_request.export_format.value}: {export_path}")
-        
-        original_file_hash = hashlib.md5(open(str(session.model.file_path), 'rb').read()).hexdigest()
-        logger.debug(f"Хэш исходного файла: {original_file_hash}")
-        
-        success = assimp_service.convert_format(
-            str(session.model.file_path),
-            export_path,
-            export_request.export_format.value
+        target_format = export_request.export_format.value
+        model_file_path = str(session.model.file_path)
+        
+        original_file_hash = hashing_service.get_stored_hash(db, session.model)
+        logger.debug(f"Хэш исходного файла (из БД): {original_file_hash}")
+        
+        matrix = None
+        options = None
+        if export_request.apply_transform:
+            if not session.transformation_matrix:
+                logger.warning(f"Сессия не откалибрована: {export_request.session_id}")
+                raise HTTPException(status_code=400, detail="Session is not calibrated")
+            try:
+                # Сначала положение модели, затем калибровка сессии
+                matrix = transformation_to_matrix(session.transformation_matrix) @ pose_matrix(session.model)
+            except ValueError as e:
+                logger.error(f"Некорректная матрица калибровки сессии {export_request.session_id}: {str(e)}")
+                raise HTTPException(status_code=400, detail=f"Invalid session transformation: {str(e)}")
+            options = {'transform': matrix_digest(matrix)}
+            logger.debug(f"Экспорт с преобразованием: {options['transform']}")
+        
+        logger.info(f"Конвертация модели в формат {target_format}")
+        export_path, cache_hit = biometry_export_cache.get_or_create(
+            original_file_hash,
+            target_format,
+            options,
+            lambda output_path: assimp_service.convert_format(model_file_path, output_path, target_format, matrix)
         )
         
-        if not success:
+        if export_path is None:
             logger.error(f"Не удалось экспортировать модель: {export_request.session_id}")
             raise HTTPException(status_code=400, detail="Failed to export model")
         
-        if os.path.exists(export_path):
-            exported_file_hash = hashlib.md5(open(export_path, 'rb').read()).hexdigest()
-            logger.debug(f"Хэш экспортированного файла: {exported_file_hash}")
+        logger.debug(f"Файл экспорта: {export_path}, из кэша: {cache_hit}")
         
         crud.biometry_session.update_session_parameters(
             db, db_obj=session, parameters={'status': BiometryStatus.EXPORTED}
         )
         
-        file_size = os.path.getsize(export_path)
+        file_size = export_path.stat().st_size
         execution_time = time.time() - start_time
         
         logger.info(f"Модель успешно экспортирована: {export_path}, размер: {file_size} байт за {execution_time:.3f} секунд")
@@ -83,8 +97,9 @@ async def export_biometry_model(
         return schemas.BiometryExportResponse(
             success=True,
             message="Biometry model exported successfully",
-            download_url=f"/api/v1/biometry/download-export/{export_path.split('/')[-1]}",
-            file_size=file_size
+            download_url=f"/api/v1/biometry/download-export/{export_path.name}",
+            file_size=file_size,
+            applied_transform=matrix.tolist() if matrix is not None else None
         )
         
     except HTTPException:
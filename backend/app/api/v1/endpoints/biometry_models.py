@@ -15,13 +15,15 @@ from app.api import deps
 from app.models.user import User
 from app.models.biometry import ModelType, ModelFormat, BiometryStatus
 from app.services.assimp_service import assimp_service
+from app.services.hashing_service import hashing_service
 from app.crud.crud_biometry import generate_biometry_file_path, validate_biometry_file
 from app.api.v1.endpoints.model_helpers import (
     process_uploaded_model_file,
+    remove_stored_model_file,
+    stream_batch_analysis,
     validate_model_exists,
     validate_file_on_disk
 )
-from app.utils.file_helpers import get_file_size
 
 logger = logging.getLogger(__name__)
 
@@ -46,11 +48,11 @@ async def upload_biometry_3d_model(
         raise HTTPException(status_code=400, detail="Unsupported file format. Only STL and OBJ files are supported.")
     
     try:
-        file_content, model_metadata = await process_uploaded_model_file(file)
-        
         file_path = generate_biometry_file_path(file.filename, model_type.value)
         logger.debug(f"Сгенерированный путь к файлу: {file_path}")
         
+        model_metadata = await process_uploaded_model_file(file, file_path)
+        
         logger.debug("Создание записи в базе данных для 3D модели биометрии")
         model_in = schemas.BiometryModelCreate(
             patient_id=patient_id,
@@ -58,14 +60,19 @@ async def upload_biometry_3d_model(
             model_format=model_format,
             file_path=file_path,
             original_filename=file.filename or '',
-            file_size=get_file_size(file_content),
+            file_size=model_metadata['file_info']['size'],
+            file_hash=model_metadata['file_info']['hash'],
             vertices_count=model_metadata.get('vertices_count'),
             faces_count=model_metadata.get('faces_count'),
             bounding_box=model_metadata.get('bounding_box'),
             status=BiometryStatus.UPLOADED
         )
         
-        model = crud.biometry_model.create_with_file(db=db, obj_in=model_in, file_content=file_content)
+        try:
+            model = crud.biometry_model.create(db=db, obj_in=model_in)
+        except Exception:
+            remove_stored_model_file(file_path)
+            raise
         
         logger.info(f"3D модель биометрии успешно загружена с ID: {model.id}")
         return schemas.BiometryModelUploadResponse(
@@ -160,7 +167,9 @@ async def analyze_biometry_3d_model(
         validate_file_on_disk(str(model.file_path))
         
         logger.info(f"Анализ файла модели: {model.file_path}")
-        metadata = assimp_service.load_model(str(model.file_path))
+        metadata = assimp_service.load_model(
+            str(model.file_path), file_hash=hashing_service.get_stored_hash(db, model)
+        )
         
         logger.debug("Обновление метаданных модели в базе данных")
         crud.biometry_model.update_model_parameters(db, db_obj=model, parameters={
@@ -189,6 +198,21 @@ async def analyze_biometry_3d_model(
         raise HTTPException(status_code=400, detail=f"Error analyzing biometry model: {str(e)}")
 
 
+@router.post("/analyze-biometry-models")
+def analyze_biometry_3d_models(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: schemas.ModelBatchAnalysisRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Пакетный анализ 3D моделей для биометрии (результаты передаются потоком NDJSON)"""
+    logger.info(f"Начало пакетного анализа 3D моделей биометрии: model_ids={request.model_ids}, patient_id={request.patient_id}")
+    return stream_batch_analysis(
+        db, crud.biometry_model, request, "Biometry 3D model",
+        extra_parameters={'status': BiometryStatus.ANALYZED}
+    )
+
+
 @router.get("/biometry-models/{model_id}/download")
 async def download_biometry_3d_model(
     *,
@@ -13,6 +13,7 @@ from app.api import deps
 from app.models.user import User
 from app.models.biometry import BiometryStatus
 from app.api.v1.endpoints.model_helpers import validate_model_exists, check_models_same_patient
+from app.services.calibration import parse_calibration_points, solve_similarity
 
 logger = logging.getLogger(__name__)
 
@@ -166,34 +167,40 @@ async def calibrate_biometry(
             logger.warning(f"Модель не найдена в сессии: {calibration_request.session_id}")
             raise HTTPException(status_code=400, detail="No model found in session")
         
-        points_count = len(calibration_request.calibration_points) if calibration_request.calibration_points else 0
-        logger.info(f"Количество точек калибровки: {points_count}")
-        
-        calibration_parameters = {
-            'calibration_points': calibration_request.calibration_points,
-            'transformation_matrix': {
-                'scale': 1.0,
-                'rotation': [0, 0, 0],
-                'translation': [0, 0, 0]
-            }
-        }
+        try:
+            source_points, target_points = parse_calibration_points(calibration_request.calibration_points)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Некорректные точки калибровки: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Invalid calibration points: {str(e)}")
+        logger.info(f"Количество пар точек калибровки: {len(source_points)}")
+        
+        try:
+            transformation_matrix = solve_similarity(
+                source_points, target_points,
+                with_scale=calibration_request.calibration_points.get('allow_scale', True)
+            )
+        except ValueError as e:
+            logger.warning(f"Не удалось рассчитать калибровку: {str(e)}")
+            raise HTTPException(status_code=400, detail=str(e))
         
         logger.debug("Обновление статуса сессии и параметров калибровки")
         crud.biometry_session.update_session_parameters(
             db, db_obj=session, parameters={
                 'status': BiometryStatus.CALIBRATED,
                 'calibration_points': calibration_request.calibration_points,
-                'transformation_matrix': calibration_parameters['transformation_matrix']
+                'transformation_matrix': transformation_matrix
             }
         )
         
         execution_time = time.time() - start_time
-        logger.info(f"Калибровка биометрии завершена успешно за {execution_time:.3f} секунд")
+        logger.info(f"Калибровка биометрии завершена успешно за {execution_time:.3f} секунд, RMS={transformation_matrix['rms_error']:.6f}")
         
         return schemas.BiometryCalibrationResponse(
             success=True,
             message="Biometry calibration completed successfully",
-            transformation_matrix=calibration_parameters['transformation_matrix']
+            transformation_matrix=transformation_matrix,
+            rms_error=transformation_matrix['rms_error'],
+            residuals=transformation_matrix['residuals']
         )
         
     except HTTPException:
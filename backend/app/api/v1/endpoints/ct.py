@@ -5,6 +5,7 @@ from pathlib import Path
 from datetime import date, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
@@ -22,12 +23,12 @@ file_storage = FileStorageService()
 @router.post("/upload-archive", response_model=dict)
 async def upload_ct_archive(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     archive: UploadFile = File(...),
     patient_id: int = Form(...),
     scan_date: str = Form(...),
     description: str = Form(None),
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Upload a ZIP archive containing DICOM files and extract them to a date-specific folder.
@@ -98,11 +99,7 @@ async def upload_ct_archive(
                         study_date=scan_date_obj
                     )
                     
-                    # Write file to disk
-                    with open(file_path_result, 'wb') as f:
-                        f.write(file_content)
-                    
-                    # Create file record in database
+                    # Create file record in database (the CRUD writes the file to disk)
                     file_in = schemas.FileCreate(
                         patient_id=patient_id,
                         file_path=str(file_path_result),
@@ -115,7 +112,7 @@ async def upload_ct_archive(
                         file_size=len(file_content)
                     )
                     
-                    file_record = crud.file.create_with_version(
+                    file_record = await crud.file_async.create_with_version(
                         db=db,
                         obj_in=file_in,
                         file_content=file_content,
@@ -1,25 +1,28 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
+from app.api.v1.endpoints.pagination_helpers import paginate
 from app.models.user import User
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Document])
 def read_documents(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve documents.
     """
-    documents = crud.document.get_multi(db, skip=skip, limit=limit)
+    documents = paginate(db, crud.document, response, skip=skip, limit=limit, cursor=cursor)
     return documents
 
 @router.post("/", response_model=schemas.Document)
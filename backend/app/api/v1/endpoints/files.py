@@ -1,36 +1,44 @@
-from typing import Any, List
+from typing import Any, List, Optional
 import os
 import uuid
 from pathlib import Path
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.responses import FileResponse
 
 from app import crud, schemas
 from app.api import deps
+from app.api.v1.endpoints.pagination_helpers import paginate
 from app.models.user import User
 from app.core.config import settings
 from app.services.file_storage_service import FileStorageService
+from app.services.mesh_diff import mesh_diff_service
 from app.models.file import MedicalFileType, FileVersionType
 
 router = APIRouter()
 
+# File types that can be compared as meshes
+MESH_FILE_TYPES = (MedicalFileType.STL_MODEL, MedicalFileType.OBJ_MODEL, MedicalFileType.PLY_MODEL)
+
 # Initialize file storage service
 file_storage = FileStorageService()
 
 @router.get("/", response_model=List[schemas.File])
 def read_files(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve files.
     """
-    files = crud.file.get_multi(db, skip=skip, limit=limit)
+    files = paginate(db, crud.file, response, skip=skip, limit=limit, cursor=cursor)
     return files
 
 @router.post("/", response_model=schemas.File)
@@ -107,12 +115,12 @@ def delete_file(
 @router.post("/upload-version/{file_id}", response_model=schemas.FileVersion)
 async def upload_file_version(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     file_id: int,
     file: UploadFile = File(...),
     version_type: str = Form("followup"),
     version_description: str = Form(None),
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Upload a new version of an existing file with context.
@@ -128,7 +136,7 @@ async def upload_file_version(
             )
         
         # Check if file exists
-        existing_file = crud.file.get(db=db, id=file_id)
+        existing_file = await crud.file_async.get(db=db, id=file_id)
         if not existing_file:
             raise HTTPException(status_code=404, detail="File not found")
         
@@ -144,7 +152,7 @@ async def upload_file_version(
             )
         
         # Create new version
-        new_version = crud.file.create_new_version(
+        new_version = await crud.file_async.create_new_version(
             db=db, 
             file_id=file_id, 
             file_content=content,
@@ -204,18 +212,23 @@ def get_patient_files_categorized(
     *,
     db: Session = Depends(deps.get_db),
     patient_id: int,
+    limit: int = Query(20, ge=1, le=500),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get all files for a patient, grouped by file type.
+    Get files for a patient grouped by file type: the number of files of
+    each type and the latest `limit` files of each type.
     """
     try:
-        files_grouped = crud.file.get_files_by_category(db=db, patient_id=patient_id)
+        files_grouped = crud.file.get_files_by_category(db=db, patient_id=patient_id, limit_per_type=limit)
         
         # Convert to response format
         result = {}
-        for file_type, files in files_grouped.items():
-            result[file_type] = [schemas.File.model_validate(file) for file in files]
+        for file_type, group in files_grouped.items():
+            result[file_type] = {
+                'count': group['count'],
+                'files': [schemas.File.model_validate(file) for file in group['files']],
+            }
         
         return result
         
@@ -302,6 +315,56 @@ def get_file_versions(
     versions = crud.file.get_versions(db=db, file_id=id)
     return versions
 
+@router.get("/{id}/versions/compare", response_model=schemas.MeshComparisonResponse)
+def compare_file_versions(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    from_version: int,
+    to_version: int,
+    tolerance: float = 0.1,
+    color_range: Optional[float] = None,
+    align: bool = True,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Compare two versions of a 3D model file (e.g. before and after a treatment stage).
+    The source version is aligned onto the target with ICP; per-vertex signed deviations
+    are summarized and returned as a heatmap color array.
+    """
+    file = crud.file.get(db=db, id=id)
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    if file.file_type not in MESH_FILE_TYPES:
+        raise HTTPException(status_code=400, detail="Version comparison is only supported for 3D model files")
+    
+    versions = []
+    for version_number in (from_version, to_version):
+        version = crud.file.get_version(db=db, file_id=id, version_number=version_number)
+        if not version:
+            raise HTTPException(status_code=404, detail=f"Version {version_number} not found")
+        if crud.file.is_version_overwritten(db=db, file=file, version=version):
+            raise HTTPException(status_code=404, detail=f"Version {version_number} content was overwritten by a later version")
+        if not os.path.exists(version.file_path):
+            raise HTTPException(status_code=404, detail=f"Version {version_number} file not found on disk")
+        versions.append(version)
+    source, target = versions
+    
+    try:
+        result = mesh_diff_service.compare(
+            source.file_path,
+            target.file_path,
+            source_hash=source.file_hash,
+            target_hash=target.file_hash,
+            tolerance=tolerance,
+            color_range=color_range,
+            align=align,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to compare versions: {str(e)}")
+    
+    return schemas.MeshComparisonResponse(file_id=id, from_version=from_version, to_version=to_version, **result)
+
 @router.get("/{id}/with-versions", response_model=schemas.FileWithVersions)
 def get_file_with_versions(
     *,
@@ -321,7 +384,7 @@ def get_file_with_versions(
 @router.post("/upload", response_model=schemas.File)
 async def upload_file(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     file: UploadFile = File(...),
     patient_id: int = Form(...),
     file_type: str = Form(...),
@@ -329,7 +392,7 @@ async def upload_file(
     study_date: str = Form(None),
     body_part: str = Form(None),
     description: str = Form(None),
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Upload a file with organized storage by patient and type.
@@ -395,7 +458,7 @@ async def upload_file(
         )
         
         # Use CRUD to create with versioning
-        file_record = crud.file.create_with_version(
+        file_record = await crud.file_async.create_with_version(
             db=db, 
             obj_in=file_in, 
             file_content=content,
@@ -412,14 +475,14 @@ async def upload_file(
 @router.get("/download/{id}")
 async def download_file(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Download a file.
     """
-    file = crud.file.get(db=db, id=id)
+    file = await crud.file_async.get(db=db, id=id)
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -2,40 +2,86 @@
 Общие функции для работы с 3D моделями в API endpoints
 """
 import os
+import json
 import logging
-from typing import Any, Dict
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.modeling import ModelBatchAnalysisRequest, ModelBatchAnalysisResult
 from app.services.assimp_service import assimp_service
-from app.utils.file_helpers import create_temp_file, remove_temp_file, get_file_size
+from app.services.batch_analysis import AnalysisJob, batch_analysis_service
+from app.services.hashing_service import hashing_service
 
 logger = logging.getLogger(__name__)
 
+# Размер блока при чтении загружаемого файла
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-async def process_uploaded_model_file(file: UploadFile) -> tuple[bytes, Dict[str, Any]]:
+
+async def process_uploaded_model_file(file: UploadFile, file_path: str) -> Dict[str, Any]:
     """
-    Обрабатывает загруженный файл 3D модели
+    Сохраняет загруженный файл 3D модели в хранилище и анализирует его
+    
+    Содержимое читается блоками и за один проход записывается по итоговому
+    пути и хэшируется; меш разбирается из буфера в памяти, без временных файлов.
     
     Args:
         file: Загруженный файл
+        file_path: Итоговый путь файла в хранилище
         
     Returns:
-        Кортеж (содержимое файла, метаданные модели)
+        Метаданные модели; размер и SHA-256 содержимого находятся в metadata['file_info']
     """
-    logger.debug(f"Чтение содержимого файла: {file.filename}")
-    file_content = await file.read()
-    logger.info(f"Файл успешно прочитан, размер: {len(file_content)} байт")
+    target_path = Path(file_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = target_path.with_name(target_path.name + ".part")
     
-    logger.info(f"Анализ 3D модели: {file.filename}")
-    temp_path = create_temp_file(file_content, file.filename or "model")
+    buffer = bytearray()
+    hasher = hashing_service.new_hasher()
     
     try:
-        model_metadata = assimp_service.load_model(temp_path)
+        logger.debug(f"Потоковая запись файла {file.filename} в {file_path}")
+        with open(part_path, "wb") as output:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                output.write(chunk)
+                hasher.update(chunk)
+                buffer += chunk
+        logger.info(f"Файл успешно сохранен, размер: {len(buffer)} байт")
+        
+        logger.info(f"Анализ 3D модели: {file.filename}")
+        model_metadata = assimp_service.load_model_from_buffer(
+            buffer, file.filename or target_path.name, file_path, hasher.hexdigest()
+        )
         logger.info(f"Анализ модели завершен: вершины={model_metadata.get('vertices_count')}, грани={model_metadata.get('faces_count')}")
-        return file_content, model_metadata
+        
+        os.replace(part_path, target_path)
+        return model_metadata
     finally:
-        remove_temp_file(temp_path)
+        if part_path.exists():
+            part_path.unlink()
+
+
+def remove_stored_model_file(file_path: str) -> None:
+    """
+    Удаляет сохраненный файл модели, если запись в базе данных не была создана
+    
+    Args:
+        file_path: Путь к файлу
+    """
+    try:
+        Path(file_path).unlink()
+        logger.debug(f"Удален файл модели без записи в базе данных: {file_path}")
+    except FileNotFoundError:
+        pass
 
 
 def validate_model_exists(db: Session, crud_repo, model_id: int, model_type: str = "Model") -> Any:
@@ -95,3 +141,134 @@ def check_models_same_patient(model1, model2, session_patient_id: int) -> None:
     if str(model1.patient_id) != str(session_patient_id):
         logger.warning(f"Модель {model1.id} не принадлежит пациенту сессии {session_patient_id}")
         raise HTTPException(status_code=400, detail="Model does not belong to the same patient as the session")
+
+
+def _failed_analysis_line(model_id: int, error: str) -> str:
+    result = ModelBatchAnalysisResult(
+        model_id=model_id, success=False, vertices_count=0, faces_count=0, bounding_box={}, error=error
+    )
+    return result.model_dump_json() + "\n"
+
+
+def stream_batch_analysis(
+    db: Session,
+    crud_repo,
+    request: ModelBatchAnalysisRequest,
+    model_type: str = "Model",
+    extra_parameters: Optional[Dict[str, Any]] = None,
+) -> StreamingResponse:
+    """
+    Запускает пакетный анализ моделей и возвращает результаты потоком NDJSON
+    
+    Каждая строка ответа - результат одной модели в порядке завершения анализа,
+    последняя строка - {"summary": {...}}. Метаданные всех успешно
+    проанализированных моделей сохраняются одной транзакцией после завершения
+    анализа; признак committed в итоговой строке сообщает об успехе записи.
+    
+    Args:
+        db: Сессия базы данных
+        crud_repo: CRUD репозиторий моделей
+        request: Список ID моделей или ID пациента
+        model_type: Тип модели для сообщений
+        extra_parameters: Дополнительные поля, обновляемые у успешно проанализированных моделей
+        
+    Returns:
+        Потоковый ответ application/x-ndjson
+        
+    Raises:
+        HTTPException: Если моделей в запросе или у пациента больше допустимого
+    """
+    max_models = settings.BATCH_ANALYSIS_MAX_MODELS
+    if request.model_ids:
+        model_ids = list(dict.fromkeys(request.model_ids))
+        if len(model_ids) > max_models:
+            raise HTTPException(status_code=400, detail=f"Too many models in batch, maximum is {max_models}")
+        models = crud_repo.get_multi_by_ids(db, ids=model_ids)
+    else:
+        # Запрашивается на одну модель больше лимита, чтобы не обрезать пакет молча
+        models = crud_repo.get_by_patient(db, patient_id=request.patient_id, limit=max_models + 1)
+        if len(models) > max_models:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Patient has more than {max_models} models, pass model_ids in batches of at most {max_models}",
+            )
+        model_ids = [model.id for model in models]
+    
+    found = {model.id: model for model in models}
+    jobs: List[AnalysisJob] = []
+    early_lines: List[str] = []
+    for model_id in model_ids:
+        model = found.get(model_id)
+        if model is None:
+            logger.warning(f"{model_type} не найдена при пакетном анализе: {model_id}")
+            early_lines.append(_failed_analysis_line(model_id, f"{model_type} not found"))
+        elif not os.path.exists(str(model.file_path)):
+            logger.error(f"Файл модели {model_id} не найден на диске: {model.file_path}")
+            early_lines.append(_failed_analysis_line(model_id, "Model file not found on disk"))
+        else:
+            jobs.append((model.id, str(model.file_path), model.file_hash))
+    
+    logger.info(f"Пакетный анализ: {len(jobs)} моделей к анализу, {len(early_lines)} пропущено")
+    
+    async def generate() -> AsyncIterator[str]:
+        start_time = time.time()
+        parameters_by_id: Dict[int, Dict[str, Any]] = {}
+        
+        for line in early_lines:
+            yield line
+        
+        async for model_id, metadata, error in batch_analysis_service.analyze(jobs):
+            if metadata is None:
+                yield _failed_analysis_line(model_id, error or "Analysis failed")
+                continue
+            
+            parameters = {
+                'vertices_count': metadata.get('vertices_count'),
+                'faces_count': metadata.get('faces_count'),
+                'bounding_box': metadata.get('bounding_box'),
+                'file_hash': metadata.get('file_info', {}).get('hash'),
+            }
+            parameters.update(extra_parameters or {})
+            parameters_by_id[model_id] = parameters
+            
+            result = ModelBatchAnalysisResult(
+                model_id=model_id,
+                success=True,
+                vertices_count=metadata.get('vertices_count', 0),
+                faces_count=metadata.get('faces_count', 0),
+                bounding_box=metadata.get('bounding_box', {}),
+                volume=metadata.get('volume'),
+                surface_area=metadata.get('surface_area'),
+                is_watertight=metadata.get('is_watertight'),
+                defects=metadata.get('defects', [])
+            )
+            yield result.model_dump_json() + "\n"
+        
+        # Ответ передается потоком после выхода из эндпоинта, поэтому запись
+        # выполняется в собственной сессии, а не в сессии запроса
+        committed = not parameters_by_id
+        if parameters_by_id:
+            write_db = SessionLocal()
+            try:
+                models_to_update = crud_repo.get_multi_by_ids(write_db, ids=list(parameters_by_id))
+                crud_repo.update_models_parameters(
+                    write_db, updates=[(model, parameters_by_id[model.id]) for model in models_to_update]
+                )
+                committed = True
+            except Exception as e:
+                logger.error(f"Ошибка сохранения результатов пакетного анализа: {str(e)}")
+            finally:
+                write_db.close()
+        
+        execution_time = time.time() - start_time
+        summary = {
+            'total': len(model_ids),
+            'succeeded': len(parameters_by_id),
+            'failed': len(model_ids) - len(parameters_by_id),
+            'committed': committed,
+            'execution_time': round(execution_time, 3),
+        }
+        logger.info(f"Пакетный анализ завершен за {execution_time:.3f} секунд: {summary}")
+        yield json.dumps({'summary': summary}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
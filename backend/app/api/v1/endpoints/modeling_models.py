@@ -5,22 +5,25 @@ from typing import Any, List, Optional
 import os
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
 from sqlalchemy.orm import Session
 from starlette.responses import FileResponse
 
 from app import crud, schemas
 from app.api import deps
+from app.api.v1.endpoints.pagination_helpers import paginate
 from app.models.user import User
 from app.models.modeling import ModelType, ModelFormat
 from app.services.assimp_service import assimp_service
+from app.services.hashing_service import hashing_service
 from app.crud.crud_modeling import generate_model_file_path, validate_model_file
 from app.api.v1.endpoints.model_helpers import (
     process_uploaded_model_file,
+    remove_stored_model_file,
+    stream_batch_analysis,
     validate_model_exists,
     validate_file_on_disk
 )
-from app.utils.file_helpers import get_file_size
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +48,11 @@ async def upload_3d_model(
         raise HTTPException(status_code=400, detail="Unsupported file format. Only STL and OBJ files are supported.")
     
     try:
-        file_content, model_metadata = await process_uploaded_model_file(file)
-        
         file_path = generate_model_file_path(file.filename, model_type.value)
         logger.debug(f"Сгенерированный путь к файлу: {file_path}")
         
+        model_metadata = await process_uploaded_model_file(file, file_path)
+        
         logger.debug("Создание записи в базе данных для 3D модели")
         model_in = schemas.ThreeDModelCreate(
             patient_id=patient_id,
@@ -57,13 +60,18 @@ async def upload_3d_model(
             model_format=model_format,
             file_path=file_path,
             original_filename=file.filename or '',
-            file_size=get_file_size(file_content),
+            file_size=model_metadata['file_info']['size'],
+            file_hash=model_metadata['file_info']['hash'],
             vertices_count=model_metadata.get('vertices_count'),
             faces_count=model_metadata.get('faces_count'),
             bounding_box=model_metadata.get('bounding_box')
         )
         
-        model = crud.three_d_model.create_with_file(db=db, obj_in=model_in, file_content=file_content)
+        try:
+            model = crud.three_d_model.create(db=db, obj_in=model_in)
+        except Exception:
+            remove_stored_model_file(file_path)
+            raise
         
         logger.info(f"3D модель успешно загружена с ID: {model.id}")
         return schemas.ModelUploadResponse(
@@ -83,11 +91,13 @@ async def upload_3d_model(
 
 @router.get("/models", response_model=List[schemas.ThreeDModel])
 def read_3d_models(
+    response: Response,
     db: Session = Depends(deps.get_db),
     patient_id: Optional[int] = None,
     model_type: Optional[ModelType] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """Получение списка 3D моделей"""
@@ -100,13 +110,18 @@ def read_3d_models(
             models = [m for m in models if m is not None]
         elif patient_id:
             logger.debug(f"Получение моделей по пациенту {patient_id}")
-            models = crud.three_d_model.get_by_patient(db, patient_id=patient_id, skip=skip, limit=limit)
+            models = paginate(
+                db, crud.three_d_model, response, skip=skip, limit=limit, cursor=cursor,
+                filters=crud.three_d_model.patient_filters(patient_id),
+            )
         else:
             logger.debug("Получение всех моделей")
-            models = crud.three_d_model.get_multi(db, skip=skip, limit=limit)
+            models = paginate(db, crud.three_d_model, response, skip=skip, limit=limit, cursor=cursor)
         
         logger.info(f"Получено {len(models)} моделей")
         return models
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка получения 3D моделей: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve models")
@@ -148,7 +163,9 @@ async def analyze_3d_model(
         validate_file_on_disk(model.file_path)
         
         logger.info(f"Анализ файла модели: {model.file_path}")
-        metadata = assimp_service.load_model(model.file_path)
+        metadata = assimp_service.load_model(
+            model.file_path, file_hash=hashing_service.get_stored_hash(db, model)
+        )
         
         logger.debug("Обновление метаданных модели в базе данных")
         crud.three_d_model.update_model_parameters(db, db_obj=model, parameters={
@@ -176,6 +193,18 @@ async def analyze_3d_model(
         raise HTTPException(status_code=400, detail=f"Error analyzing model: {str(e)}")
 
 
+@router.post("/analyze-models")
+def analyze_3d_models(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: schemas.ModelBatchAnalysisRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Пакетный анализ 3D моделей (результаты передаются потоком NDJSON)"""
+    logger.info(f"Начало пакетного анализа 3D моделей: model_ids={request.model_ids}, patient_id={request.patient_id}")
+    return stream_batch_analysis(db, crud.three_d_model, request, "3D model")
+
+
 @router.get("/models/{model_id}/download")
 async def download_3d_model(
     *,
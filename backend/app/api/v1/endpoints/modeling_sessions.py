@@ -5,15 +5,18 @@ from typing import Any, List, Optional
 import os
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from starlette.responses import FileResponse
 
 from app import crud, schemas
 from app.api import deps
+from app.api.v1.endpoints.pagination_helpers import paginate
 from app.models.user import User
 from app.models.modeling import ModelType, ModelFormat, ModelingStatus
 from app.services.assimp_service import assimp_service
+from app.services.export_cache import modeling_export_cache
+from app.services.hashing_service import hashing_service
 from app.crud.crud_modeling import generate_model_file_path
 from app.api.v1.endpoints.model_helpers import validate_model_exists
 
@@ -36,17 +39,22 @@ def create_modeling_session(
 
 @router.get("/sessions", response_model=List[schemas.ModelingSession])
 def read_modeling_sessions(
+    response: Response,
     db: Session = Depends(deps.get_db),
     patient_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """Получение списка сессий моделирования"""
     if patient_id:
-        sessions = crud.modeling_session.get_by_patient(db, patient_id=patient_id, skip=skip, limit=limit)
+        sessions = paginate(
+            db, crud.modeling_session, response, skip=skip, limit=limit, cursor=cursor,
+            filters=crud.modeling_session.patient_filters(patient_id),
+        )
     else:
-        sessions = crud.modeling_session.get_multi(db, skip=skip, limit=limit)
+        sessions = paginate(db, crud.modeling_session, response, skip=skip, limit=limit, cursor=cursor)
     
     return sessions
 
@@ -179,15 +187,14 @@ async def create_occlusion_pad(
             file_path=output_path,
             original_filename=f"occlusion_pad_session_{session.id}.stl",
             file_size=os.path.getsize(output_path),
+            file_hash=pad_metadata['file_info']['hash'],
             vertices_count=pad_metadata.get('vertices_count'),
             faces_count=pad_metadata.get('faces_count'),
             bounding_box=pad_metadata.get('bounding_box')
         )
         
-        with open(output_path, "rb") as f:
-            pad_file_content = f.read()
-        
-        pad_model = crud.three_d_model.create_with_file(db=db, obj_in=pad_model_in, file_content=pad_file_content)
+        # Файл накладки уже записан по output_path - создается только запись в БД
+        pad_model = crud.three_d_model.create(db=db, obj_in=pad_model_in)
         
         crud.modeling_session.update_session_parameters(
             db, db_obj=session, parameters={
@@ -238,32 +245,35 @@ async def export_model(
         raise HTTPException(status_code=404, detail="Model file not found on disk")
     
     try:
-        export_filename = f"{export_request.model_type.value}_export.{export_request.export_format.value}"
-        export_path = generate_model_file_path(export_filename, "export")
-        
-        success = assimp_service.convert_format(
-            model.file_path,
-            export_path,
-            export_request.export_format.value
+        target_format = export_request.export_format.value
+        export_path, cache_hit = modeling_export_cache.get_or_create(
+            hashing_service.get_stored_hash(db, model),
+            target_format,
+            {'include_textures': export_request.include_textures},
+            lambda output_path: assimp_service.convert_format(model.file_path, output_path, target_format)
         )
         
-        if not success:
+        if export_path is None:
             raise HTTPException(status_code=400, detail="Failed to export model")
         
+        logger.info(f"Экспорт модели {model.id} в {target_format}: {export_path} (из кэша: {cache_hit})")
+        
         if export_request.model_type == ModelType.OCCLUSION_PAD:
             crud.modeling_session.update_session_parameters(
                 db, db_obj=session, parameters={'status': ModelingStatus.EXPORTED}
             )
         
-        file_size = os.path.getsize(export_path)
+        file_size = export_path.stat().st_size
         
         return schemas.ModelExportResponse(
             success=True,
             message="Model exported successfully",
-            download_url=f"/api/v1/modeling/download-export/{export_path.split('/')[-1]}",
+            download_url=f"/api/v1/modeling/download-export/{export_path.name}",
             file_size=file_size
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error exporting model: {str(e)}")
 
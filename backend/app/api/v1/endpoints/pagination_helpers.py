@@ -0,0 +1,63 @@
+"""
+Постраничная выдача списков в API endpoints
+"""
+import logging
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+
+logger = logging.getLogger(__name__)
+
+# Заголовок с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def paginate(
+    db: Session,
+    crud_repo: CRUDBase,
+    response: Response,
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Sequence[Any] = (),
+) -> List[Any]:
+    """
+    Возвращает страницу записей по курсору (keyset) или по смещению
+
+    Без смещения используется курсорная пагинация по (created_at, id), а курсор
+    следующей страницы передается в заголовке X-Next-Cursor. Параметр skip
+    сохранен для совместимости и выполняет прежний запрос со смещением.
+
+    Args:
+        db: Сессия базы данных
+        crud_repo: CRUD репозиторий записей
+        response: Ответ, в который добавляется заголовок курсора
+        skip: Смещение (устаревший способ)
+        limit: Размер страницы
+        cursor: Непрозрачный курсор из предыдущего ответа
+        filters: Дополнительные условия выборки (например, записи одного пациента)
+
+    Returns:
+        Записи страницы
+
+    Raises:
+        HTTPException: Если курсор некорректен или передан вместе со skip
+    """
+    if skip:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor and skip cannot be combined")
+        return crud_repo.get_multi(db, skip=skip, limit=limit, filters=filters)
+
+    try:
+        items, next_cursor = crud_repo.get_page(db, cursor=cursor, limit=limit, filters=filters)
+    except ValueError as e:
+        logger.warning(f"Некорректный курсор пагинации: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    logger.debug(f"Страница {crud_repo.model.__tablename__}: {len(items)} записей, следующая: {bool(next_cursor)}")
+    return items
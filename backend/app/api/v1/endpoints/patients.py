@@ -1,29 +1,32 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
+from app.api.v1.endpoints.pagination_helpers import paginate
 from app.models.user import User
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Patient])
 def read_patients(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve patients.
     """
     if crud.user.is_admin(current_user):
-        patients = crud.patient.get_multi(db, skip=skip, limit=limit)
+        patients = paginate(db, crud.patient, response, skip=skip, limit=limit, cursor=cursor)
     else:
         # Workers can only see their own patients
-        patients = crud.patient.get_multi(db, skip=skip, limit=limit)
+        patients = paginate(db, crud.patient, response, skip=skip, limit=limit, cursor=cursor)
     return patients
 
 @router.post("/", response_model=schemas.Patient)
@@ -71,6 +74,31 @@ def read_patient(
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
+@router.get("/{id}/summary", response_model=schemas.PatientSummary)
+def read_patient_summary(
+    *,
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get everything the patient card shows in one request: the patient, file
+    counts per type, analysis/record counts and active sessions.
+
+    The ETag changes whenever a row behind the summary is added, updated or
+    removed; a matching If-None-Match returns 304.
+    """
+    summary = crud.patient.get_summary(db=db, patient_id=id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    etag = f'"{id}-{int(summary["updated_at"].timestamp() * 1000)}-{summary.pop("row_count")}"'
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return summary
+
 @router.delete("/{id}", response_model=schemas.Patient)
 def delete_patient(
     *,
@@ -1,12 +1,30 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, Tuple
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost than BCRYPT_ROUNDS are reported by
+# verify_and_update and rehashed on the next successful login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt is CPU-bound by design: login verification runs on a small dedicated
+# pool, so a burst of logins cannot occupy every core. At most
+# PASSWORD_HASH_MAX_WORKERS + PASSWORD_HASH_MAX_QUEUE verifications are
+# admitted at once; beyond that PasswordHashBusy is raised instead of queueing
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS, thread_name_prefix="password-hash"
+)
+_password_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+class PasswordHashBusy(Exception):
+    """The password hashing pool and its queue are full"""
 
 ALGORITHM = "HS256"
 
@@ -23,8 +41,32 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# The sync helpers are called from sync endpoints, which already run in the
+# request threadpool, so they hash in the calling thread
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password without blocking the event loop.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses
+    outdated cost parameters and should be replaced.
+
+    Raises:
+        PasswordHashBusy: If the hashing pool and its queue are full
+    """
+    if not _password_slots.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        future = _password_executor.submit(pwd_context.verify_and_update, plain_password, hashed_password)
+    except BaseException:
+        _password_slots.release()
+        raise
+    # The slot is held until the hash is computed, even if the request is cancelled
+    future.add_done_callback(lambda _: _password_slots.release())
+    return await asyncio.wrap_future(future)
@@ -1,9 +1,9 @@
-from .crud_user import user
+from .crud_user import user, user_async
 from .crud_patient import patient
 from .crud_medical_record import medical_record
-from .crud_file import file
+from .crud_file import file, file_async
 from .crud_document import document
 from .crud_modeling import three_d_model, modeling_session
 from .crud_biometry import biometry_model, biometry_session
 
-__all__ = ["user", "patient", "medical_record", "file", "document", "three_d_model", "modeling_session", "biometry_model", "biometry_session"]
\ No newline at end of file
+__all__ = ["user", "user_async", "patient", "medical_record", "file", "file_async", "document", "three_d_model", "modeling_session", "biometry_model", "biometry_session"]
\ No newline at end of file
@@ -1,8 +1,13 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
 
 from app.db.base import Base
 
@@ -24,17 +29,65 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, filters: Sequence[Any] = ()
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return db.query(self.model).filter(*filters).order_by(*self._page_order()).offset(skip).limit(limit).all()
+
+    def get_page(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100, filters: Sequence[Any] = ()
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination ordered by (created_at, id).
+
+        Each page is a single index range scan regardless of its depth, and
+        rows inserted while paging do not shift later pages. `filters` are
+        extra WHERE criteria (e.g. one patient's rows); the cursor stays valid
+        only with the same filters.
+
+        Returns the page and an opaque cursor for the next page (None on the
+        last page). Raises ValueError for a malformed cursor.
+        """
+        query = self._page_query(db, cursor).filter(*filters)
+        items = query.limit(limit + 1).all()
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, self._encode_cursor(items[-1])
+
+    def _page_query(self, db: Session, cursor: Optional[str]) -> Query:
+        query = db.query(self.model).order_by(*self._page_order())
+        if cursor:
+            key = self._decode_cursor(cursor)
+            columns = self._page_order()
+            query = query.filter(tuple_(*columns) > tuple_(*key) if len(columns) > 1 else columns[0] > key[0])
+        return query
+
+    def _page_order(self) -> list:
+        created_at = getattr(self.model, "created_at", None)
+        return [self.model.id] if created_at is None else [created_at, self.model.id]
+
+    def _encode_cursor(self, obj: ModelType) -> str:
+        key = [getattr(obj, column.key) for column in self._page_order()]
+        payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in key])
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> list:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            columns = self._page_order()
+            if not isinstance(key, list) or len(key) != len(columns):
+                raise ValueError("cursor length mismatch")
+            if len(columns) > 1:
+                key[0] = datetime.fromisoformat(key[0])
+            if not isinstance(key[-1], int):
+                raise ValueError("cursor id must be an integer")
+            return key
+        except (ValueError, TypeError, UnicodeError) as exc:
+            raise ValueError(f"Invalid cursor: {cursor}") from exc
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        # Use model_dump() instead of jsonable_encoder to preserve Python types (like date objects)
-        if hasattr(obj_in, 'model_dump'):
-            obj_in_data = obj_in.model_dump()
-        else:
-            obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
+        db_obj = self.model(**_create_data(obj_in))  # type: ignore
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -47,18 +100,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            # Use model_dump() if available (Pydantic v2), otherwise dict()
-            if hasattr(obj_in, 'model_dump'):
-                update_data = obj_in.model_dump(exclude_unset=True)
-            else:
-                update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        _apply_update(db_obj, obj_in)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -68,4 +110,77 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj
\ No newline at end of file
+        return obj
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async counterpart of CRUDBase for endpoints running on the event loop.
+        **Parameters**
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    _page_order = CRUDBase._page_order
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        result = await db.execute(
+            select(self.model).order_by(*self._page_order()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = self.model(**_create_data(obj_in))  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        _apply_update(db_obj, obj_in)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        obj = await db.get(self.model, id)
+        if obj is not None:
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+
+def _create_data(obj_in: CreateSchemaType) -> Dict[str, Any]:
+    # Use model_dump() instead of jsonable_encoder to preserve Python types (like date objects)
+    if hasattr(obj_in, 'model_dump'):
+        return obj_in.model_dump()
+    return jsonable_encoder(obj_in)
+
+
+def _apply_update(db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> None:
+    obj_data = jsonable_encoder(db_obj)
+    if isinstance(obj_in, dict):
+        update_data = obj_in
+    else:
+        # Use model_dump() if available (Pydantic v2), otherwise dict()
+        if hasattr(obj_in, 'model_dump'):
+            update_data = obj_in.model_dump(exclude_unset=True)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+    for field in obj_data:
+        if field in update_data:
+            setattr(db_obj, field, update_data[field])
\ No newline at end of file
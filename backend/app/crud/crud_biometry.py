@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import logging
 import time
 from app.crud.base import CRUDBase
+from app.models.base_3d_model import ModelType
 from app.models.biometry import BiometryModel, BiometrySession
 from app.schemas.biometry import BiometryModelCreate, BiometryModelUpdate, BiometrySessionCreate, BiometrySessionUpdate
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import os
 import uuid
 from pathlib import Path
@@ -13,50 +14,72 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 class CRUDBiometryModel(CRUDBase[BiometryModel, BiometryModelCreate, BiometryModelUpdate]):
-    def create_with_file(self, db: Session, *, obj_in: BiometryModelCreate, file_content: bytes) -> BiometryModel:
-        logger.info(f"Создание записи модели биометрии: patient_id={obj_in.patient_id}, type={obj_in.model_type}, format={obj_in.model_format}")
-        
-        # Create the model record
-        db_obj = BiometryModel(
-            patient_id=obj_in.patient_id,
-            model_type=obj_in.model_type,
-            model_format=obj_in.model_format,
-            file_path=obj_in.file_path,
-            original_filename=obj_in.original_filename,
-            file_size=obj_in.file_size,
-            scale=obj_in.scale,
-            position_x=obj_in.position_x,
-            position_y=obj_in.position_y,
-            position_z=obj_in.position_z,
-            rotation_x=obj_in.rotation_x,
-            rotation_y=obj_in.rotation_y,
-            rotation_z=obj_in.rotation_z,
-            vertices_count=obj_in.vertices_count,
-            faces_count=obj_in.faces_count,
-            bounding_box=obj_in.bounding_box,
-            status=obj_in.status,
-            is_active=True
-        )
+    def get_by_patient(self, db: Session, *, patient_id: int, skip: int = 0, limit: int = 100) -> List[BiometryModel]:
+        logger.debug(f"Получение моделей биометрии по пациенту {patient_id}, skip={skip}, limit={limit}")
+        return db.query(BiometryModel).filter(
+            BiometryModel.patient_id == patient_id,
+            BiometryModel.is_active == True
+        ).offset(skip).limit(limit).all()
+    
+    def get_by_patient_and_type(self, db: Session, *, patient_id: int, model_type: str) -> Optional[BiometryModel]:
+        logger.debug(f"Получение последней модели биометрии пациента {patient_id} типа '{model_type}'")
+        return db.query(BiometryModel).filter(
+            BiometryModel.patient_id == patient_id,
+            BiometryModel.model_type == ModelType(model_type),
+            BiometryModel.is_active == True
+        ).order_by(BiometryModel.created_at.desc()).first()
+    
+    def get_multi_by_ids(self, db: Session, *, ids: List[int]) -> List[BiometryModel]:
+        logger.debug(f"Получение моделей биометрии по списку ID: {len(ids)} шт.")
+        if not ids:
+            return []
+        return db.query(BiometryModel).filter(BiometryModel.id.in_(ids)).all()
+    
+    def update_model_parameters(self, db: Session, *, db_obj: BiometryModel, parameters: Dict[str, Any]) -> BiometryModel:
+        logger.info(f"Обновление параметров моделей биометрии для ID: {db_obj.id}")
+        self._apply_parameters(db_obj, parameters)
         
         try:
             db.add(db_obj)
             db.commit()
             db.refresh(db_obj)
-            logger.debug(f"Запись в базе данных создана с ID: {db_obj.id}")
-            
-            # Save file content to disk
-            file_path = Path(obj_in.file_path)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            logger.debug(f"Сохранение файла на диск: {file_path}")
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            
-            logger.info(f"Модель биометрии успешно создана: ID={db_obj.id}, файл={obj_in.original_filename}")
             return db_obj
         except Exception as e:
-            logger.error(f"Ошибка создания модели биометрии: {str(e)}")
+            logger.error(f"Ошибка обновления параметров моделей биометрии: {str(e)}")
+            db.rollback()
+            raise
+    
+    def update_models_parameters(self, db: Session, *, updates: List[Tuple[BiometryModel, Dict[str, Any]]]) -> List[BiometryModel]:
+        """
+        Обновление параметров нескольких моделей в одной транзакции
+        
+        Args:
+            db: Сессия базы данных
+            updates: Список пар (модель, параметры для обновления)
+            
+        Returns:
+            Список обновленных моделей
+        """
+        logger.info(f"Пакетное обновление параметров моделей биометрии: {len(updates)} шт.")
+        for db_obj, parameters in updates:
+            self._apply_parameters(db_obj, parameters)
+            db.add(db_obj)
+        
+        try:
+            db.commit()
+            logger.info(f"Параметры {len(updates)} моделей сохранены одной транзакцией")
+            return [db_obj for db_obj, _ in updates]
+        except Exception as e:
+            logger.error(f"Ошибка пакетного обновления параметров моделей биометрии: {str(e)}")
             db.rollback()
             raise
+    
+    def _apply_parameters(self, db_obj: BiometryModel, parameters: Dict[str, Any]) -> None:
+        for field, value in parameters.items():
+            if hasattr(db_obj, field):
+                old_value = getattr(db_obj, field)
+                setattr(db_obj, field, value)
+                logger.debug(f"Обновлено {field} модели {db_obj.id}: {old_value} -> {value}")
 
 class CRUDBiometrySession(CRUDBase[BiometrySession, BiometrySessionCreate, BiometrySessionUpdate]):
     def create_with_model(self, db: Session, *, obj_in: BiometrySessionCreate) -> BiometrySession:
@@ -150,10 +173,13 @@ class CRUDBiometrySession(CRUDBase[BiometrySession, BiometrySessionCreate, Biome
         logger.debug(f"Получение сессии биометрии с моделью: {session_id}")
         
         try:
-            session = db.query(BiometrySession).filter(BiometrySession.id == session_id).first()
-            if session and session.model_id:
-                logger.debug(f"Загрузка модели для сессии: {session.model_id}")
-                session.model = db.query(BiometryModel).filter(BiometryModel.id == session.model_id).first()
+            # Сессия и модель загружаются одним запросом (LEFT OUTER JOIN)
+            session = (
+                db.query(BiometrySession)
+                .options(joinedload(BiometrySession.model))
+                .filter(BiometrySession.id == session_id)
+                .first()
+            )
             
             execution_time = time.time() - start_time
             if session:
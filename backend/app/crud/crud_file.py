@@ -1,103 +1,64 @@
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+import asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.file import File, FileVersion, MedicalFileType, FileVersionType
 from app.schemas.file import FileCreate, FileUpdate
-import shutil
 import os
-import hashlib
+import uuid
+from app.services.hashing_service import hashing_service
 from pathlib import Path
 from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
 
 class CRUDFile(CRUDBase[File, FileCreate, FileUpdate]):
     def create_with_version(self, db: Session, *, obj_in: FileCreate, file_content: bytes, user_id: int = None) -> File:
-        # Calculate file hash and size
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file_size = len(file_content)
-        
-        # Create the file record
-        db_obj = File(
-            patient_id=obj_in.patient_id,
-            name=obj_in.name,
-            file_path=obj_in.file_path,
-            file_type=MedicalFileType(obj_in.file_type),
-            description=obj_in.description,
-            metadata_json=obj_in.metadata_json,
-            medical_category=obj_in.medical_category,
-            study_date=obj_in.study_date,
-            body_part=obj_in.body_part,
-            image_orientation=obj_in.image_orientation,
-            file_size=file_size,
-            mime_type=obj_in.mime_type,
-            file_hash=file_hash,
-            is_active=True
-        )
-        db.add(db_obj)
-        db.commit()
+        # Content is written to its final (new) path before the commit and removed if the commit fails
+        file_hash, writes = prepare_new_file(obj_in, file_content)
+        try:
+            db_obj = write_new_file(db, obj_in, file_hash, len(file_content), user_id)
+        except Exception:
+            discard_writes(writes)
+            raise
+        publish_writes(writes)
         db.refresh(db_obj)
-        
-        # Create the first version
-        version_obj = FileVersion(
-            file_id=db_obj.id,
-            version_number=1,
-            file_path=obj_in.file_path,
-            file_hash=file_hash,
-            file_size=file_size,
-            version_type=FileVersionType.BASELINE,
-            created_by=user_id
-        )
-        db.add(version_obj)
-        db.commit()
-        
-        # Save file content to disk
-        file_path = Path(obj_in.file_path)
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-        
         return db_obj
     
     def create_new_version(self, db: Session, *, file_id: int, file_content: bytes, version_type: FileVersionType = FileVersionType.FOLLOWUP, version_description: str = None, user_id: int = None) -> FileVersion:
-        # Get the file
-        file = db.query(File).filter(File.id == file_id).first()
+        file, latest_version = load_for_new_version(db, file_id)
         if not file:
             return None
-            
-        # Get the latest version number
-        latest_version = db.query(FileVersion).filter(FileVersion.file_id == file_id).order_by(FileVersion.version_number.desc()).first()
-        new_version_number = (latest_version.version_number if latest_version else 0) + 1
-        
-        # Calculate hash and size
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file_size = len(file_content)
         
-        # Create new version record
-        version_obj = FileVersion(
-            file_id=file_id,
-            version_number=new_version_number,
-            file_path=file.file_path,  # Main file path
-            file_hash=file_hash,
-            file_size=file_size,
-            version_type=version_type,
-            version_description=version_description,
-            created_by=user_id
-        )
-        db.add(version_obj)
-        db.commit()
-        
-        # Update main file info
-        file.file_hash = file_hash
-        file.file_size = file_size
-        file.updated_at = version_obj.created_at
-        db.commit()
-        
-        # Overwrite main file with new content
-        with open(file.file_path, "wb") as f:
-            f.write(file_content)
-            
+        file_hash, writes, version_path = prepare_new_version(file, latest_version, file_content)
+        try:
+            version_obj = write_new_version(db, file, latest_version, version_path, file_hash, len(file_content), version_type, version_description, user_id)
+        except Exception:
+            discard_writes(writes)
+            raise
+        publish_writes(writes)
         return version_obj
     
     def get_versions(self, db: Session, *, file_id: int) -> list:
         return db.query(FileVersion).filter(FileVersion.file_id == file_id).order_by(FileVersion.version_number).all()
     
+    def get_version(self, db: Session, *, file_id: int, version_number: int) -> FileVersion:
+        return db.query(FileVersion).filter(
+            FileVersion.file_id == file_id,
+            FileVersion.version_number == version_number
+        ).first()
+    
+    def is_version_overwritten(self, db: Session, *, file: File, version: FileVersion) -> bool:
+        """
+        True for an older version stored only at the main file path: versions
+        uploaded before per-version copies shared that path, so later uploads
+        replaced their content and the file there is no longer this version.
+        """
+        if version.file_path != file.file_path:
+            return False
+        latest_number = db.query(func.max(FileVersion.version_number)).filter(FileVersion.file_id == file.id).scalar()
+        return version.version_number != latest_number
+    
     def get_file_with_versions(self, db: Session, *, file_id: int) -> File:
         file = db.query(File).filter(File.id == file_id).first()
         if file:
@@ -115,16 +76,35 @@ class CRUDFile(CRUDBase[File, FileCreate, FileUpdate]):
             
         return query.order_by(File.created_at.desc()).all()
     
-    def get_files_by_category(self, db: Session, *, patient_id: int, category: str) -> dict:
-        """Возвращает файлы пациента, сгруппированные по типам"""
-        files = self.get_patient_files(db, patient_id=patient_id)
-        grouped = {}
+    def get_files_by_category(self, db: Session, *, patient_id: int, limit_per_type: int = 20) -> dict:
+        """
+        Возвращает файлы пациента, сгруппированные по типам: число активных
+        файлов каждого типа и последние limit_per_type из них.
+
+        Один запрос: ROW_NUMBER() и COUNT() по окну PARTITION BY file_type,
+        поэтому объем выборки не зависит от общего числа файлов пациента.
+        """
+        partition = {"partition_by": File.file_type}
+        ranked = (
+            select(
+                File,
+                func.row_number().over(order_by=(File.created_at.desc(), File.id.desc()), **partition).label("type_rank"),
+                func.count().over(**partition).label("type_count"),
+            )
+            .where(File.patient_id == patient_id, File.is_active == True)
+            .subquery()
+        )
+        ranked_file = aliased(File, ranked)
+        rows = db.execute(
+            select(ranked_file, ranked.c.type_count)
+            .where(ranked.c.type_rank <= limit_per_type)
+            .order_by(ranked.c.file_type, ranked.c.type_rank)
+        ).all()
         
-        for file in files:
-            file_type = file.file_type.value
-            if file_type not in grouped:
-                grouped[file_type] = []
-            grouped[file_type].append(file)
+        grouped = {}
+        for file, type_count in rows:
+            group = grouped.setdefault(file.file_type.value, {"count": type_count, "files": []})
+            group["files"].append(file)
             
         return grouped
     
@@ -134,11 +114,12 @@ class CRUDFile(CRUDBase[File, FileCreate, FileUpdate]):
         if not file:
             return False
             
-        # Delete all versions from disk
-        for version in file.versions:
-            if os.path.exists(version.file_path):
+        # Delete the main file and all versions from disk
+        paths = {file.file_path} | {version.file_path for version in file.versions}
+        for path in paths:
+            if os.path.exists(path):
                 try:
-                    os.remove(version.file_path)
+                    os.remove(path)
                 except OSError:
                     pass  # Continue even if file deletion fails
         
@@ -146,4 +127,227 @@ class CRUDFile(CRUDBase[File, FileCreate, FileUpdate]):
         self.remove(db=db, id=file_id)
         return True
 
-file = CRUDFile(File)
\ No newline at end of file
+class AsyncCRUDFile(AsyncCRUDBase[File, FileCreate, FileUpdate]):
+    """
+    Async variant of CRUDFile for upload/download endpoints. Staging and
+    row building are shared with CRUDFile: disk work runs in a worker thread,
+    the transaction through AsyncSession.run_sync.
+    """
+
+    async def create_with_version(self, db: AsyncSession, *, obj_in: FileCreate, file_content: bytes, user_id: int = None) -> File:
+        file_hash, writes = await asyncio.to_thread(prepare_new_file, obj_in, file_content)
+        try:
+            db_obj = await db.run_sync(write_new_file, obj_in, file_hash, len(file_content), user_id)
+        except Exception:
+            await asyncio.to_thread(discard_writes, writes)
+            raise
+        await asyncio.to_thread(publish_writes, writes)
+        # created_at/updated_at are set by the server
+        await db.refresh(db_obj)
+        return db_obj
+    
+    async def create_new_version(self, db: AsyncSession, *, file_id: int, file_content: bytes, version_type: FileVersionType = FileVersionType.FOLLOWUP, version_description: str = None, user_id: int = None) -> FileVersion:
+        file, latest_version = await db.run_sync(load_for_new_version, file_id)
+        if not file:
+            return None
+        
+        file_hash, writes, version_path = await asyncio.to_thread(prepare_new_version, file, latest_version, file_content)
+        try:
+            version_obj = await db.run_sync(
+                write_new_version, file, latest_version, version_path, file_hash, len(file_content), version_type, version_description, user_id
+            )
+        except Exception:
+            await asyncio.to_thread(discard_writes, writes)
+            raise
+        await asyncio.to_thread(publish_writes, writes)
+        # created_at is set by the server
+        await db.refresh(version_obj)
+        return version_obj
+
+# Shared by CRUDFile and AsyncCRUDFile. The write_* functions take a sync
+# Session (AsyncCRUDFile passes them to AsyncSession.run_sync) and commit once;
+# prepare_* do the disk work and are safe to run in a worker thread.
+#
+# Every path a committed row refers to is written before the commit, so a
+# crash never leaves rows pointing at missing files; at worst it leaves
+# unreferenced files. Only replacing the main file of an existing record
+# waits for the commit.
+
+class PendingWrites(NamedTuple):
+    """Files of one transaction: new paths written before commit, (temp, path) replacements applied after it"""
+    written: List[str]
+    staged: List[Tuple[str, str]]
+
+def prepare_new_file(obj_in: FileCreate, file_content: bytes) -> Tuple[str, PendingWrites]:
+    """Hashes the content of a new file and writes it to its path; returns the hash and the writes"""
+    file_hash = hashing_service.hash_bytes(file_content)
+    write_file(obj_in.file_path, file_content)
+    return file_hash, PendingWrites(written=[obj_in.file_path], staged=[])
+
+def write_new_file(db: Session, obj_in: FileCreate, file_hash: str, file_size: int, user_id: int = None) -> File:
+    """Adds the file and its first version in one transaction; rolls back on failure"""
+    try:
+        # flush assigns the file id for the version row
+        db_obj = new_file_record(obj_in, file_hash, file_size)
+        db.add(db_obj)
+        db.flush()
+        db.add(baseline_version(db_obj, user_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db_obj
+
+def load_for_new_version(db: Session, file_id: int) -> Tuple[Optional[File], Optional[FileVersion]]:
+    """The file and its latest version (None, None if the file does not exist)"""
+    file = db.query(File).filter(File.id == file_id).first()
+    if not file:
+        return None, None
+    latest_version = db.query(FileVersion).filter(FileVersion.file_id == file_id).order_by(FileVersion.version_number.desc()).first()
+    return file, latest_version
+
+def prepare_new_version(file: File, latest_version: Optional[FileVersion], file_content: bytes) -> Tuple[str, PendingWrites, str]:
+    """Hashes and writes new version content; returns the hash, the writes and the version path"""
+    file_hash = hashing_service.hash_bytes(file_content)
+    writes, version_path = stage_new_version(file, latest_version, file_content)
+    return file_hash, writes, version_path
+
+def write_new_version(db: Session, file: File, latest_version: Optional[FileVersion], version_path: str, file_hash: str, file_size: int, version_type: FileVersionType, version_description: str = None, user_id: int = None) -> FileVersion:
+    """Adds the version row and updates the file in one transaction; rolls back on failure"""
+    try:
+        version_obj = new_version_record(file, latest_version, version_path, file_hash, file_size, version_type, version_description, user_id)
+        db.add(version_obj)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return version_obj
+
+def new_file_record(obj_in: FileCreate, file_hash: str, file_size: int) -> File:
+    """File row for an uploaded file (not yet added to a session)"""
+    return File(
+        patient_id=obj_in.patient_id,
+        name=obj_in.name,
+        file_path=obj_in.file_path,
+        file_type=MedicalFileType(obj_in.file_type),
+        description=obj_in.description,
+        metadata_json=obj_in.metadata_json,
+        medical_category=obj_in.medical_category,
+        study_date=obj_in.study_date,
+        body_part=obj_in.body_part,
+        image_orientation=obj_in.image_orientation,
+        file_size=file_size,
+        mime_type=obj_in.mime_type,
+        file_hash=file_hash,
+        is_active=True
+    )
+
+def baseline_version(db_obj: File, user_id: int = None) -> FileVersion:
+    """First version of a newly created file"""
+    return FileVersion(
+        file_id=db_obj.id,
+        version_number=1,
+        file_path=db_obj.file_path,
+        file_hash=db_obj.file_hash,
+        file_size=db_obj.file_size,
+        version_type=FileVersionType.BASELINE,
+        created_by=user_id
+    )
+
+def new_version_record(file: File, latest_version: FileVersion, version_path: str, file_hash: str, file_size: int, version_type: FileVersionType, version_description: str = None, user_id: int = None) -> FileVersion:
+    """
+    Version row for new content; also points the file at the new content.
+    updated_at of the file is refreshed by its onupdate in the same transaction.
+    """
+    version_obj = FileVersion(
+        file_id=file.id,
+        version_number=(latest_version.version_number if latest_version else 0) + 1,
+        file_path=version_path,
+        file_hash=file_hash,
+        file_size=file_size,
+        version_type=version_type,
+        version_description=version_description,
+        created_by=user_id
+    )
+    file.file_hash = file_hash
+    file.file_size = file_size
+    return version_obj
+
+def stage_new_version(file: File, latest_version: FileVersion, file_content: bytes) -> Tuple[PendingWrites, str]:
+    """
+    Writes the files of a new version: its own copy at a new unique path,
+    for versions stored only at the main file path a copy of the previous
+    content (the previous version row is repointed to it), and the new main
+    file content, staged to replace the main file after commit.
+
+    Returns the writes and the version path.
+    """
+    writes = PendingWrites(written=[], staged=[])
+    try:
+        # Preserve the previous version's content before the main file is replaced
+        # (older versions were stored only at the main file path)
+        if latest_version and latest_version.file_path == file.file_path and os.path.exists(file.file_path):
+            preserved_path = version_file_path(file.file_path, latest_version.version_number)
+            with open(file.file_path, "rb") as f:
+                write_file(preserved_path, f.read())
+            writes.written.append(preserved_path)
+            latest_version.file_path = preserved_path
+        
+        # Each version keeps its own copy; the main file always holds the latest content
+        new_version_number = (latest_version.version_number if latest_version else 0) + 1
+        version_path = version_file_path(file.file_path, new_version_number)
+        write_file(version_path, file_content)
+        writes.written.append(version_path)
+        writes.staged.append((stage_file(file.file_path, file_content), file.file_path))
+    except Exception:
+        discard_writes(writes)
+        raise
+    return writes, version_path
+
+def staging_path(file_path: str) -> str:
+    return f"{file_path}.{uuid.uuid4().hex}.tmp"
+
+def write_file(file_path: str, content: bytes) -> None:
+    """Writes content durably (fsync); a partial write never appears at file_path"""
+    os.replace(stage_file(file_path, content), file_path)
+
+def stage_file(file_path: str, content: bytes) -> str:
+    """Writes content to a temp file next to file_path (same filesystem, so the final rename is atomic)"""
+    temp_path = staging_path(file_path)
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        _remove_quietly(temp_path)
+        raise
+    return temp_path
+
+def publish_writes(writes: PendingWrites) -> None:
+    """Replaces main files with their staged content after the transaction has committed"""
+    for temp_path, file_path in writes.staged:
+        os.replace(temp_path, file_path)
+
+def discard_writes(writes: PendingWrites) -> None:
+    """Removes files written for a transaction that did not commit"""
+    for path in writes.written + [temp_path for temp_path, _ in writes.staged]:
+        _remove_quietly(path)
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def version_file_path(file_path: str, version_number: int) -> str:
+    """
+    New path for the stored copy of a file version: <name>.v<N>.<random><ext>
+    next to the main file. The random part keeps it unique, so writing it before
+    the commit never overwrites a file that a committed row refers to.
+    """
+    path = Path(file_path)
+    return str(path.with_name(f"{path.stem}.v{version_number}.{uuid.uuid4().hex[:12]}{path.suffix}"))
+
+file = CRUDFile(File)
+file_async = AsyncCRUDFile(File)
\ No newline at end of file
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import logging
 from app.crud.base import CRUDBase
+from app.models.base_3d_model import ModelType
 from app.models.modeling import ThreeDModel, ModelingSession
 from app.schemas.modeling import ThreeDModelCreate, ThreeDModelUpdate, ModelingSessionCreate, ModelingSessionUpdate
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import os
 import uuid
 from pathlib import Path
@@ -12,7 +13,73 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 class CRUDThreeDModel(CRUDBase[ThreeDModel, ThreeDModelCreate, ThreeDModelUpdate]):
-    pass
+    def get_by_patient(self, db: Session, *, patient_id: int, skip: int = 0, limit: int = 100) -> List[ThreeDModel]:
+        logger.debug(f"Получение 3D моделей по пациенту {patient_id}, skip={skip}, limit={limit}")
+        return db.query(ThreeDModel).filter(*self.patient_filters(patient_id)).offset(skip).limit(limit).all()
+    
+    def patient_filters(self, patient_id: int) -> list:
+        """Условия выборки активных моделей пациента (для постраничной выдачи)"""
+        return [ThreeDModel.patient_id == patient_id, ThreeDModel.is_active == True]
+    
+    def get_by_patient_and_type(self, db: Session, *, patient_id: int, model_type: str) -> Optional[ThreeDModel]:
+        logger.debug(f"Получение последней 3D модели пациента {patient_id} типа '{model_type}'")
+        return db.query(ThreeDModel).filter(
+            ThreeDModel.patient_id == patient_id,
+            ThreeDModel.model_type == ModelType(model_type),
+            ThreeDModel.is_active == True
+        ).order_by(ThreeDModel.created_at.desc()).first()
+    
+    def get_multi_by_ids(self, db: Session, *, ids: List[int]) -> List[ThreeDModel]:
+        logger.debug(f"Получение 3D моделей по списку ID: {len(ids)} шт.")
+        if not ids:
+            return []
+        return db.query(ThreeDModel).filter(ThreeDModel.id.in_(ids)).all()
+    
+    def update_model_parameters(self, db: Session, *, db_obj: ThreeDModel, parameters: Dict[str, Any]) -> ThreeDModel:
+        logger.info(f"Обновление параметров 3D моделей для ID: {db_obj.id}")
+        self._apply_parameters(db_obj, parameters)
+        
+        try:
+            db.add(db_obj)
+            db.commit()
+            db.refresh(db_obj)
+            return db_obj
+        except Exception as e:
+            logger.error(f"Ошибка обновления параметров 3D моделей: {str(e)}")
+            db.rollback()
+            raise
+    
+    def update_models_parameters(self, db: Session, *, updates: List[Tuple[ThreeDModel, Dict[str, Any]]]) -> List[ThreeDModel]:
+        """
+        Обновление параметров нескольких моделей в одной транзакции
+        
+        Args:
+            db: Сессия базы данных
+            updates: Список пар (модель, параметры для обновления)
+            
+        Returns:
+            Список обновленных моделей
+        """
+        logger.info(f"Пакетное обновление параметров 3D моделей: {len(updates)} шт.")
+        for db_obj, parameters in updates:
+            self._apply_parameters(db_obj, parameters)
+            db.add(db_obj)
+        
+        try:
+            db.commit()
+            logger.info(f"Параметры {len(updates)} моделей сохранены одной транзакцией")
+            return [db_obj for db_obj, _ in updates]
+        except Exception as e:
+            logger.error(f"Ошибка пакетного обновления параметров 3D моделей: {str(e)}")
+            db.rollback()
+            raise
+    
+    def _apply_parameters(self, db_obj: ThreeDModel, parameters: Dict[str, Any]) -> None:
+        for field, value in parameters.items():
+            if hasattr(db_obj, field):
+                old_value = getattr(db_obj, field)
+                setattr(db_obj, field, value)
+                logger.debug(f"Обновлено {field} модели {db_obj.id}: {old_value} -> {value}")
 
 class CRUDModelingSession(CRUDBase[ModelingSession, ModelingSessionCreate, ModelingSessionUpdate]):
     def create_with_models(self, db: Session, *, obj_in: ModelingSessionCreate) -> ModelingSession:
@@ -50,31 +117,33 @@ class CRUDModelingSession(CRUDBase[ModelingSession, ModelingSessionCreate, Model
     
     def get_by_patient(self, db: Session, *, patient_id: int, skip: int = 0, limit: int = 100) -> List[ModelingSession]:
         logger.debug(f"Получение сессий моделирования по пациенту {patient_id}, skip={skip}, limit={limit}")
-        return db.query(ModelingSession).filter(
-            ModelingSession.patient_id == patient_id,
-            ModelingSession.is_active == True
-        ).offset(skip).limit(limit).all()
+        return db.query(ModelingSession).filter(*self.patient_filters(patient_id)).offset(skip).limit(limit).all()
+    
+    def patient_filters(self, patient_id: int) -> list:
+        """Условия выборки активных сессий пациента (для постраничной выдачи)"""
+        return [ModelingSession.patient_id == patient_id, ModelingSession.is_active == True]
     
     def get_with_models(self, db: Session, *, session_id: int) -> Optional[ModelingSession]:
         logger.debug(f"Получение сессии моделирования с моделями: {session_id}")
-        session = db.query(ModelingSession).filter(ModelingSession.id == session_id).first()
+        # Сессия и все пять моделей загружаются одним запросом (LEFT OUTER JOIN)
+        session = (
+            db.query(ModelingSession)
+            .options(
+                joinedload(ModelingSession.upper_jaw),
+                joinedload(ModelingSession.lower_jaw),
+                joinedload(ModelingSession.bite1),
+                joinedload(ModelingSession.bite2),
+                joinedload(ModelingSession.occlusion_pad),
+            )
+            .filter(ModelingSession.id == session_id)
+            .first()
+        )
         if session:
-            # Load related models
-            if session.upper_jaw_id:
-                logger.debug(f"Загрузка модели верхней челюсти: {session.upper_jaw_id}")
-                session.upper_jaw = db.query(ThreeDModel).filter(ThreeDModel.id == session.upper_jaw_id).first()
-            if session.lower_jaw_id:
-                logger.debug(f"Загрузка модели нижней челюсти: {session.lower_jaw_id}")
-                session.lower_jaw = db.query(ThreeDModel).filter(ThreeDModel.id == session.lower_jaw_id).first()
-            if session.bite1_id:
-                logger.debug(f"Загрузка модели bite1: {session.bite1_id}")
-                session.bite1 = db.query(ThreeDModel).filter(ThreeDModel.id == session.bite1_id).first()
-            if session.bite2_id:
-                logger.debug(f"Загрузка модели bite2: {session.bite2_id}")
-                session.bite2 = db.query(ThreeDModel).filter(ThreeDModel.id == session.bite2_id).first()
-            if session.occlusion_pad_id:
-                logger.debug(f"Загрузка модели окклюзионной накладки: {session.occlusion_pad_id}")
-                session.occlusion_pad = db.query(ThreeDModel).filter(ThreeDModel.id == session.occlusion_pad_id).first()
+            logger.debug(
+                f"Сессия моделирования {session_id} загружена с моделями: upper_jaw={session.upper_jaw_id}, "
+                f"lower_jaw={session.lower_jaw_id}, bite1={session.bite1_id}, bite2={session.bite2_id}, "
+                f"occlusion_pad={session.occlusion_pad_id}"
+            )
         return session
     
     def update_session_parameters(self, db: Session, *, db_obj: ModelingSession, parameters: Dict[str, Any]) -> ModelingSession:
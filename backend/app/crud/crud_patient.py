@@ -1,8 +1,93 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
+from app.models.anamnesis import Anamnesis
+from app.models.biometry import BiometrySession
+from app.models.cephalometry import CephalometryAnalysis
+from app.models.ct_analysis import CTAnalysis
+from app.models.diagnosis import Diagnosis
+from app.models.document import Document
+from app.models.file import File
+from app.models.medical_record import MedicalRecord
+from app.models.modeling import ModelingSession
 from app.models.patient import Patient
+from app.models.photometry import PhotometryAnalysis
+from app.models.treatment_plan import TreatmentPlan
 from app.schemas.patient import PatientCreate, PatientUpdate
 
+# Patient-scoped records counted in the summary (key -> model)
+SUMMARY_RECORDS = {
+    "medical_records": MedicalRecord,
+    "documents": Document,
+    "anamnesis": Anamnesis,
+    "diagnoses": Diagnosis,
+    "treatment_plans": TreatmentPlan,
+    "cephalometry_analyses": CephalometryAnalysis,
+    "photometry_analyses": PhotometryAnalysis,
+    "ct_analyses": CTAnalysis,
+}
+
 class CRUDPatient(CRUDBase[Patient, PatientCreate, PatientUpdate]):
-    pass
+    def get_summary(self, db: Session, *, patient_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Everything the patient card needs, in a fixed number of queries
+        (five, regardless of how many files, sessions or analyses exist):
+        the patient, file counts per type, record counts in one UNION ALL,
+        and compact rows of active modeling and biometry sessions.
+
+        Returns None if the patient does not exist.
+        """
+        patient = self.get(db, id=patient_id)
+        if patient is None:
+            return None
+
+        file_rows = db.execute(
+            select(File.file_type, func.count(File.id), func.max(File.updated_at))
+            .where(File.patient_id == patient_id, File.is_active == True)
+            .group_by(File.file_type)
+        ).all()
+
+        record_queries = [
+            select(
+                literal(key).label("key"),
+                func.count(model.id).label("count"),
+                (func.max(model.updated_at) if hasattr(model, "updated_at") else null()).label("updated_at"),
+            ).where(model.patient_id == patient_id)
+            for key, model in SUMMARY_RECORDS.items()
+        ]
+        record_rows = db.execute(union_all(*record_queries)).all()
+
+        modeling_sessions = db.execute(
+            select(ModelingSession.id, ModelingSession.status, ModelingSession.created_at, ModelingSession.updated_at)
+            .where(ModelingSession.patient_id == patient_id, ModelingSession.is_active == True)
+            .order_by(ModelingSession.created_at.desc())
+        ).all()
+        biometry_sessions = db.execute(
+            select(BiometrySession.id, BiometrySession.status, BiometrySession.created_at, BiometrySession.updated_at, BiometrySession.model_id)
+            .where(BiometrySession.patient_id == patient_id, BiometrySession.is_active == True)
+            .order_by(BiometrySession.created_at.desc())
+        ).all()
+
+        records = {key: {"count": count, "updated_at": updated_at} for key, count, updated_at in record_rows}
+        sessions = [*modeling_sessions, *biometry_sessions]
+        timestamps = [patient.updated_at] + [row[2] for row in file_rows] \
+            + [record["updated_at"] for record in records.values()] + [row.updated_at for row in sessions]
+        return {
+            "patient": patient,
+            "files": {
+                "total": sum(row[1] for row in file_rows),
+                "by_type": {row[0].value: row[1] for row in file_rows},
+            },
+            "records": records,
+            "modeling_sessions": [dict(row._mapping) for row in modeling_sessions],
+            "biometry_sessions": [dict(row._mapping) for row in biometry_sessions],
+            "updated_at": max(timestamp for timestamp in timestamps if timestamp is not None),
+            # Rows behind the summary; changes on deletion, which max(updated_at) does not see
+            "row_count": 1 + sum(row[1] for row in file_rows)
+                + sum(record["count"] for record in records.values()) + len(sessions),
+        }
 
-patient = CRUDPatient(Patient)
\ No newline at end of file
+patient = CRUDPatient(Patient)
@@ -1,13 +1,45 @@
 from typing import Any, Dict, Optional, Union
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.core.config import settings
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User, UserRole, UserAccountStatus
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
+from app.utils.cache import LRUCache
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def __init__(self, model):
+        super().__init__(model)
+        self._cache = LRUCache(
+            max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES, ttl=settings.AUTH_USER_CACHE_TTL
+        )
+
+    def get_cached(self, db: Session, *, id: int) -> Optional[User]:
+        """
+        User by ID for authentication, served from a short-lived in-process cache.
+
+        Cached users are detached from the session, so only their column
+        attributes are available.
+        """
+        if not settings.AUTH_USER_CACHE_TTL:
+            return self.get(db, id=id)
+        cached = self._cache.get(id)
+        if cached is not None:
+            return cached
+        db_obj = self.get(db, id=id)
+        if db_obj is not None:
+            # Detach so that a commit in this request does not expire the shared instance
+            db.expunge(db_obj)
+            self._cache.set(id, db_obj)
+        return db_obj
+
+    def invalidate_cached(self, id: int) -> None:
+        self._cache.pop(id)
+
     def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
         return db.query(User).filter(User.username == username).first()
 
@@ -39,7 +71,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        self.invalidate_cached(db_obj.id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> User:
+        obj = super().remove(db, id=id)
+        self.invalidate_cached(id)
+        return obj
 
     def authenticate(self, db: Session, *, username: str, password: str) -> Optional[User]:
         user = self.get_by_username(db, username=username)
@@ -55,4 +94,28 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def is_admin(self, user: User) -> bool:
         return user.role == UserRole.ADMINISTRATOR
 
-user = CRUDUser(User)
\ No newline at end of file
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    def __init__(self, model, *, cache: LRUCache):
+        super().__init__(model)
+        # Shared with CRUDUser, whose update/remove invalidate the entries
+        self._cache = cache
+
+    async def get_cached(self, db: AsyncSession, *, id: int) -> Optional[User]:
+        """Async counterpart of CRUDUser.get_cached for endpoints on get_async_db"""
+        if not settings.AUTH_USER_CACHE_TTL:
+            return await self.get(db, id=id)
+        cached = self._cache.get(id)
+        if cached is not None:
+            return cached
+        db_obj = await self.get(db, id=id)
+        if db_obj is not None:
+            db.expunge(db_obj)
+            self._cache.set(id, db_obj)
+        return db_obj
+
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
+
+user = CRUDUser(User)
+user_async = AsyncCRUDUser(User, cache=user._cache)
\ No newline at end of file
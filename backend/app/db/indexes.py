@@ -0,0 +1,130 @@
+"""
+Проверка и создание индексов, объявленных в моделях, для существующих таблиц
+"""
+import logging
+import time
+from typing import List, Set, Tuple
+
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.base import Base
+import app.models  # noqa: F401 - регистрация всех таблиц в метаданных
+
+logger = logging.getLogger(__name__)
+
+
+def _existing_index_columns(inspector, table_name: str) -> Set[Tuple[str, ...]]:
+    """Наборы колонок индексов таблицы в базе (включая первичный ключ и уникальные ограничения)"""
+    columns = {tuple(index["column_names"]) for index in inspector.get_indexes(table_name)}
+    columns |= {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table_name)}
+    primary_key = inspector.get_pk_constraint(table_name).get("constrained_columns")
+    if primary_key:
+        columns.add(tuple(primary_key))
+    return columns
+
+
+def _is_covered(columns: Tuple[str, ...], existing: Set[Tuple[str, ...]]) -> bool:
+    """Индекс покрывает колонки, если они являются его ведущими колонками"""
+    return any(index[:len(columns)] == columns for index in existing)
+
+
+def find_missing_indexes(bind: Engine) -> List[Index]:
+    """
+    Индексы моделей, которых нет в базе
+
+    create_all не добавляет индексы в уже существующие таблицы, поэтому
+    индексы, объявленные позже создания таблицы, нужно создать отдельно.
+
+    Args:
+        bind: Движок базы данных
+
+    Returns:
+        Список отсутствующих индексов
+    """
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = _existing_index_columns(inspector, table.name)
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if not _is_covered(tuple(column.name for column in index.columns), existing):
+                missing.append(index)
+    return missing
+
+
+def find_unindexed_foreign_keys(bind: Engine) -> List[str]:
+    """
+    Внешние ключи существующих таблиц, не покрытые индексом
+
+    Args:
+        bind: Движок базы данных
+
+    Returns:
+        Список колонок в виде 'таблица.колонка'
+    """
+    inspector = inspect(bind)
+    unindexed = []
+    for table_name in inspector.get_table_names():
+        existing = _existing_index_columns(inspector, table_name)
+        for foreign_key in inspector.get_foreign_keys(table_name):
+            columns = tuple(foreign_key["constrained_columns"])
+            if not _is_covered(columns, existing):
+                unindexed.append(f"{table_name}.{','.join(columns)}")
+    return unindexed
+
+
+def create_missing_indexes(bind: Engine) -> List[str]:
+    """
+    Создает отсутствующие индексы моделей
+
+    В PostgreSQL индексы строятся с CONCURRENTLY, чтобы не блокировать запись
+    в таблицы на время построения.
+
+    Args:
+        bind: Движок базы данных
+
+    Returns:
+        Имена созданных индексов
+    """
+    created = []
+    concurrently = "CONCURRENTLY " if bind.dialect.name == "postgresql" else ""
+    preparer = bind.dialect.identifier_preparer
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in find_missing_indexes(bind):
+            columns = ", ".join(preparer.quote(column.name) for column in index.columns)
+            start_time = time.time()
+            conn.execute(text(
+                f"CREATE {'UNIQUE ' if index.unique else ''}INDEX {concurrently}IF NOT EXISTS "
+                f"{preparer.quote(index.name)} ON {preparer.format_table(index.table)} ({columns})"
+            ))
+            logger.info(f"Индекс {index.name} создан за {time.time() - start_time:.3f} секунд")
+            created.append(index.name)
+    return created
+
+
+def check_indexes(bind: Engine) -> List[Index]:
+    """
+    Проверка при запуске: сообщает об отсутствующих индексах моделей и
+    о внешних ключах без индексов
+
+    Args:
+        bind: Движок базы данных
+
+    Returns:
+        Список отсутствующих индексов моделей
+    """
+    missing = find_missing_indexes(bind)
+    if missing:
+        logger.warning(
+            f"В базе отсутствуют индексы ({len(missing)}): {', '.join(index.name for index in missing)}. "
+            f"Запросы по этим колонкам выполняются полным сканированием; "
+            f"создайте индексы скриптом add_foreign_key_indexes.py"
+        )
+    unindexed = find_unindexed_foreign_keys(bind)
+    if unindexed:
+        logger.info(f"Внешние ключи без индексов: {', '.join(unindexed)}")
+    return missing
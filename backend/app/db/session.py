@@ -1,12 +1,140 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+# Асинхронные драйверы для синхронных URL из настроек
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _engine_options(database_url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Параметры пула и соединений из настроек (для PostgreSQL)"""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if make_url(database_url).get_backend_name() != "postgresql":
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if is_async:
+        # asyncpg передает параметры сервера через server_settings
+        server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = {"server_settings": server_settings}
+        return options
+    connect_args: Dict[str, Any] = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    options["connect_args"] = connect_args
+    return options
+
+
+def async_database_url(database_url: str) -> str:
+    """
+    URL для асинхронного движка: тот же сервер через асинхронный драйвер
+
+    Args:
+        database_url: Синхронный URL базы данных
+
+    Returns:
+        URL с драйвером asyncpg (PostgreSQL) или aiosqlite (SQLite)
+    """
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
 # PostgreSQL engine configuration
-engine = create_engine(
-    settings.DATABASE_URL,
-    # pool_pre_ping is useful for PostgreSQL to handle disconnected connections
-    pool_pre_ping=True
-)
+# pool_pre_ping is on by default: pool_recycle only retires idle connections on
+# schedule, while failovers, restarts and proxies can drop them at any time
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Асинхронные сессии для async-эндпоинтов: объекты остаются доступны после
+# commit, так как ленивая загрузка атрибутов в асинхронном коде невозможна
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Асинхронный движок с собственным пулом, создается при первом обращении,
+    поэтому импорт приложения не требует асинхронного драйвера
+
+    Returns:
+        Асинхронный движок SQLAlchemy
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                url = async_database_url(settings.DATABASE_URL)
+                _async_engine = create_async_engine(url, **_engine_options(url, is_async=True))
+                AsyncSessionLocal.configure(bind=_async_engine)
+                logger.info(f"Создан асинхронный движок базы данных: {make_url(url).drivername}")
+    return _async_engine
+
+
+# Счетчики событий пула соединений
+_pool_counters = {"connects": 0, "checkouts": 0, "invalidations": 0}
+_pool_counters_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _pool_counters_lock:
+        _pool_counters[name] += 1
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    _count("connects")
+    logger.debug("Открыто новое соединение с базой данных")
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _count("checkouts")
+
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    _count("invalidations")
+    logger.warning(f"Соединение с базой данных инвалидировано: {exception}")
+
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """
+    Состояние пула соединений и накопленные счетчики
+
+    Returns:
+        Словарь с размером пула, числом выданных/свободных соединений и счетчиками
+    """
+    metrics = _pool_status(engine.pool)
+    with _pool_counters_lock:
+        metrics.update(_pool_counters)
+    if _async_engine is not None:
+        metrics["async"] = _pool_status(_async_engine.pool)
+    return metrics
+
+
+def _pool_status(pool) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    return status
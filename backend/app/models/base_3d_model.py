@@ -28,12 +28,13 @@ class BaseModel3D(Base):
     __abstract__ = True
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     model_type = Column(Enum(ModelType, name="model_type"), nullable=False)
     model_format = Column(Enum(ModelFormat, name="model_format"), nullable=False)
     file_path = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
+    file_hash = Column(String(64), nullable=True)  # SHA-256, вычисляется при записи файла
     
     # Параметры моделирования
     scale = Column(Float, default=1.0)
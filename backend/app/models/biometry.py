@@ -43,10 +43,10 @@ class BiometrySession(Base):
         return self.__repr__()
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     
     # Ссылки на модели
-    model_id = Column(Integer, ForeignKey("biometry_models.id"), nullable=True)
+    model_id = Column(Integer, ForeignKey("biometry_models.id"), nullable=True, index=True)
     
     # Параметры биометрии
     calibration_points = Column(JSON, nullable=True)  # Точки калибровки
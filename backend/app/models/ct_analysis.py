@@ -8,7 +8,7 @@ class CTAnalysis(Base):
     __tablename__ = "ct_analyses"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     scan_date = Column(Date, nullable=False)  # Дата проведения КТ
     
     # Ссылка на архив DICOM
@@ -8,7 +8,7 @@ class Diagnosis(Base):
     __tablename__ = "diagnoses"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     
     # Код диагноза (МКБ-10 или другая классификация)
     diagnosis_code = Column(String(20), nullable=True)
@@ -17,7 +17,7 @@ class Document(Base):
     __tablename__ = "documents"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     document_type: DocumentType = Column(Enum(DocumentType, name="document_type"), nullable=False)
     file_path: str = Column(String, nullable=False)
     format: DocumentFormat = Column(Enum(DocumentFormat, name="document_format"), nullable=False)
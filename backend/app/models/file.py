@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Enum, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Enum, Boolean, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -39,7 +39,7 @@ class FileVersion(Base):
     __tablename__ = "file_versions"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    file_id: int = Column(Integer, ForeignKey("files.id"), nullable=False)
+    file_id: int = Column(Integer, ForeignKey("files.id"), nullable=False, index=True)
     version_number: int = Column(Integer, nullable=False)
     file_path: str = Column(String, nullable=False)
     file_hash: str = Column(String(64), nullable=True)  # SHA256 для контроля целостности
@@ -57,7 +57,7 @@ class File(Base):
     __tablename__ = "files"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)  # индекс ix_files_patient_type_created
     name: str = Column(String(255), nullable=False)  # Original filename
     file_path: str = Column(String, nullable=False)
     file_type: MedicalFileType = Column(Enum(MedicalFileType, name="medical_file_type"), nullable=False)
@@ -66,7 +66,7 @@ class File(Base):
     
     # Медицинские специфичные поля
     medical_category: str = Column(String(50), nullable=True)  # clinical, diagnostic, treatment, surgical
-    study_date: Date = Column(Date, nullable=True)  # Дата исследования/съемки
+    study_date: Date = Column(Date, nullable=True, index=True)  # Дата исследования/съемки
     body_part: str = Column(String(100), nullable=True)  # Область тела (зубы, челюсть, и т.д.)
     image_orientation: str = Column(String(50), nullable=True)  # orientation для медицинских изображений
     
@@ -83,6 +83,14 @@ class File(Base):
     # Relationships
     patient = relationship("Patient", back_populates="files")
     versions = relationship("FileVersion", back_populates="file", cascade="all, delete-orphan")
+    
+    # Файлы пациента: ведущая колонка patient_id обслуживает и выборки по пациенту,
+    # а (file_type, created_at) - последние файлы по типам (get_files_by_category)
+    __table_args__ = (
+        Index("ix_files_patient_type_created", "patient_id", "file_type", "created_at"),
+        # Курсорная пагинация списка: ORDER BY (created_at, id) - см. CRUDBase.get_page
+        Index("ix_files_created_at_id", "created_at", "id"),
+    )
 
 # Add relationship to Patient model
 from app.models.patient import Patient
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -17,7 +17,7 @@ class MedicalRecordHistory(Base):
     __tablename__ = "medical_record_history"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    medical_record_id: int = Column(Integer, ForeignKey("medical_records.id"), nullable=False)
+    medical_record_id: int = Column(Integer, ForeignKey("medical_records.id"), nullable=False, index=True)
     data: str = Column(Text, nullable=True)  # JSON data for the record
     notes: str = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -30,7 +30,7 @@ class MedicalRecord(Base):
     __tablename__ = "medical_records"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     record_type: MedicalRecordType = Column(Enum(MedicalRecordType, name="medical_record_type"), nullable=False)
     data: str = Column(Text, nullable=True)  # JSON data for the record
     notes: str = Column(Text, nullable=True)
@@ -40,6 +40,11 @@ class MedicalRecord(Base):
     # Relationships
     patient = relationship("Patient", back_populates="medical_records")
     history = relationship("MedicalRecordHistory", back_populates="medical_record", cascade="all, delete-orphan")
+    
+    # Порядок курсорной пагинации (CRUDBase.get_page)
+    __table_args__ = (
+        Index("ix_medical_records_created_at_id", "created_at", "id"),
+    )
 
 # Add relationship to Patient model
 Patient.medical_records = relationship("MedicalRecord", back_populates="patient")
\ No newline at end of file
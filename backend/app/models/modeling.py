@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Enum, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Enum, Boolean, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -16,6 +16,11 @@ class ModelingStatus(PyEnum):
 class ThreeDModel(BaseModel3D):
     __tablename__ = "three_d_models"
     
+    # Порядок курсорной пагинации (CRUDBase.get_page)
+    __table_args__ = (
+        Index("ix_three_d_models_created_at_id", "created_at", "id"),
+    )
+    
     # Remove the ambiguous relationship definition to prevent SQLAlchemy error
     # The relationship with ModelingSession is handled through foreign keys in ModelingSession
 
@@ -23,7 +28,7 @@ class ModelingSession(Base):
     __tablename__ = "modeling_sessions"
     
     id: int = Column(Integer, primary_key=True, index=True)
-    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     
     # Ссылки на модели
     upper_jaw_id: int = Column(Integer, ForeignKey("three_d_models.id"), nullable=True)
@@ -57,6 +62,11 @@ class ModelingSession(Base):
     bite2 = relationship("ThreeDModel", foreign_keys=[bite2_id])
     occlusion_pad = relationship("ThreeDModel", foreign_keys=[occlusion_pad_id])
     
+    # Порядок курсорной пагинации (CRUDBase.get_page)
+    __table_args__ = (
+        Index("ix_modeling_sessions_created_at_id", "created_at", "id"),
+    )
+    
     # Remove the ambiguous relationship definition
     # Each 3D model is linked via specific foreign key columns (upper_jaw_id, lower_jaw_id, etc.)
     # Rather than having a generic model relationship which causes ambiguity
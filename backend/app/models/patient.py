@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -30,6 +30,11 @@ class Patient(Base):
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Курсорная пагинация списка: ORDER BY (created_at, id) - см. CRUDBase.get_page
+    __table_args__ = (
+        Index("ix_patients_created_at_id", "created_at", "id"),
+    )
+    
     def __init__(self, full_name: str, birth_date: Date, gender: Gender, contact_info: str = ""):
         self.full_name = full_name
         self.birth_date = birth_date
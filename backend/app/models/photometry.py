@@ -8,7 +8,7 @@ class PhotometryAnalysis(Base):
     __tablename__ = "photometry_analyses"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     analysis_date = Column(DateTime, nullable=False, server_default=func.now())
     
     # Ссылки на фотографии
@@ -8,7 +8,7 @@ class TreatmentPlan(Base):
     __tablename__ = "treatment_plans"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     diagnosis_id = Column(Integer, ForeignKey("diagnoses.id"), nullable=True)
     
     # Название плана
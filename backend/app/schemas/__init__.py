@@ -1,9 +1,9 @@
 from .custom_config import CustomConfig
 from .user import User, UserCreate, UserUpdate
-from .patient import Patient, PatientCreate, PatientUpdate
+from .patient import Patient, PatientCreate, PatientUpdate, PatientSummary
 from .medical_record import MedicalRecord, MedicalRecordCreate, MedicalRecordUpdate, MedicalRecordWithHistory
-from .file import File, FileCreate, FileUpdate, FileWithVersions, FileVersion
+from .file import File, FileCreate, FileUpdate, FileWithVersions, FileVersion, MeshComparisonResponse
 from .document import Document, DocumentCreate, DocumentUpdate
 from .token import Token
-from .modeling import ModelUploadResponse, ThreeDModel, ThreeDModelCreate, ThreeDModelUpdate, ModelingSession, ModelingSessionCreate, ModelingSessionUpdate, ModelingSessionWithModels, ModelAssemblyRequest, ModelAssemblyResponse, OcclusionPadRequest, OcclusionPadResponse, ModelExportRequest, ModelExportResponse, ModelAnalysisRequest, ModelAnalysisResponse
+from .modeling import ModelUploadResponse, ThreeDModel, ThreeDModelCreate, ThreeDModelUpdate, ModelingSession, ModelingSessionCreate, ModelingSessionUpdate, ModelingSessionWithModels, ModelAssemblyRequest, ModelAssemblyResponse, OcclusionPadRequest, OcclusionPadResponse, ModelExportRequest, ModelExportResponse, ModelAnalysisRequest, ModelAnalysisResponse, ModelBatchAnalysisRequest, ModelBatchAnalysisResult
 from .biometry import BiometryModel, BiometryModelCreate, BiometryModelUpdate, BiometrySession, BiometrySessionCreate, BiometrySessionUpdate, BiometrySessionWithModel, BiometryModelUploadResponse, BiometryModelAnalysisResponse, BiometryCalibrationRequest, BiometryCalibrationResponse, BiometryExportRequest, BiometryExportResponse
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 import logging
 
 from app.models.biometry import ModelType, ModelFormat, BiometryStatus
@@ -16,6 +16,7 @@ class BiometryModelBase(BaseModel):
     file_path: str
     original_filename: str
     file_size: int
+    file_hash: Optional[str] = None
     scale: float = 1.0
     position_x: float = 0.0
     position_y: float = 0.0
@@ -201,6 +202,8 @@ class BiometryCalibrationResponse(BaseModel):
     success: bool
     message: str
     transformation_matrix: Optional[Dict[str, Any]] = None
+    rms_error: Optional[float] = None
+    residuals: Optional[List[float]] = None
     
     def __init__(self, **data):
         logger.debug(f"Создание BiometryCalibrationResponse: {data}")
@@ -214,6 +217,7 @@ class BiometryCalibrationResponse(BaseModel):
 class BiometryExportRequest(BaseModel):
     session_id: int
     export_format: ModelFormat
+    apply_transform: bool = False  # Применить калибровку сессии и положение модели к вершинам
     
     def __init__(self, **data):
         logger.debug(f"Создание BiometryExportRequest: {data}")
@@ -229,6 +233,7 @@ class BiometryExportResponse(BaseModel):
     message: str
     download_url: Optional[str] = None
     file_size: Optional[int] = None
+    applied_transform: Optional[List[List[float]]] = None
     
     def __init__(self, **data):
         logger.debug(f"Создание BiometryExportResponse: {data}")
@@ -236,4 +241,153 @@ class BiometryExportResponse(BaseModel):
     
     def __str__(self):
         logger.debug(f"Строковое представление ответа экспорта: success={self.success}, message='{self.message}'")
-        return f"BiometryExportResponse(success={self.success}, message='{self.message}')"
\ No newline at end of file
+        return f"BiometryExportResponse(success={self.success}, message='{self.message}')"
+
+# Interactive point pairing (model points <-> map points)
+class CreateModelPoint(BaseModel):
+    x: float
+    y: float
+    z: float
+
+class ModelPoint(CreateModelPoint):
+    id: int
+
+class CreateMapPoint(BaseModel):
+    lat: float
+    lng: float
+
+class MapPoint(CreateMapPoint):
+    id: int
+
+class CreatePair(BaseModel):
+    model_id: int
+    map_id: int
+
+    class Config:
+        protected_namespaces = ()
+
+class Pair(CreatePair):
+    id: int
+
+# Best-fit transform over the current pairs, maintained incrementally
+class LiveCalibration(BaseModel):
+    matrix: List[List[float]]
+    scale: float
+    rotation: List[float]
+    translation: List[float]
+    rms_error: float
+    points_count: int
+
+class PairWithCalibration(Pair):
+    calibration: Optional[LiveCalibration] = None
+
+# Delta of the point state since a client-known version; on reset the full state is sent
+class ChangeFeedResponse(BaseModel):
+    version: int
+    reset: bool = False
+    changes: List[Dict[str, Any]] = []
+    model_path: Optional[str] = None
+    model_points: Optional[List[ModelPoint]] = None
+    map_points: Optional[List[MapPoint]] = None
+    pairs: Optional[List[Pair]] = None
+
+    class Config:
+        protected_namespaces = ()
+
+class PointDeleteResponse(BaseModel):
+    status: str
+    removed_pairs: List[int] = []
+    calibration: Optional[LiveCalibration] = None
+
+class CalibrationPoint(BaseModel):
+    model_point: ModelPoint
+    geo_point: MapPoint
+
+    class Config:
+        protected_namespaces = ()
+
+class CalibrationExport(BaseModel):
+    version: str = "1.0"
+    model_path: str
+    pairs: List[CalibrationPoint]
+
+    class Config:
+        protected_namespaces = ()
+
+class StatusResponse(BaseModel):
+    status: str
+    details: Optional[str] = None
+    model_path: Optional[str] = None
+
+    class Config:
+        protected_namespaces = ()
+
+class ObjUploadResponse(BaseModel):
+    filename: str
+    content_type: str
+    size_bytes: int
+    stored_path: str
+    uploaded_at: datetime
+
+# Batch ingestion of points and pairs; a pair refers to an existing point by id
+# or to a point of the same batch by its index
+class BatchPair(BaseModel):
+    model_id: Optional[int] = None
+    model_index: Optional[int] = Field(None, ge=0)
+    map_id: Optional[int] = None
+    map_index: Optional[int] = Field(None, ge=0)
+
+    class Config:
+        protected_namespaces = ()
+
+    @model_validator(mode='after')
+    def check_references(self):
+        if (self.model_id is None) == (self.model_index is None):
+            raise ValueError("Exactly one of model_id or model_index must be provided")
+        if (self.map_id is None) == (self.map_index is None):
+            raise ValueError("Exactly one of map_id or map_index must be provided")
+        return self
+
+class BatchIngestRequest(BaseModel):
+    model_points: List[CreateModelPoint] = []
+    map_points: List[CreateMapPoint] = []
+    pairs: List[BatchPair] = []
+    snap: Optional[str] = Field(None, description="Привязка точек модели: 'vertex' или 'surface'")
+
+    class Config:
+        protected_namespaces = ()
+
+class BatchIngestResponse(BaseModel):
+    model_points: List[ModelPoint]
+    map_points: List[MapPoint]
+    pairs: List[Pair]
+    created_pairs: int
+    calibration: Optional[LiveCalibration] = None
+
+    class Config:
+        protected_namespaces = ()
+
+# Robust (RANSAC) calibration over the current pairs
+class RobustCalibrationRequest(BaseModel):
+    inlier_threshold: Optional[float] = Field(None, gt=0, description="Порог невязки инлаера в единицах карты; по умолчанию оценивается по медиане (LMedS)")
+    max_iterations: int = Field(1000, ge=1, le=10000)
+    confidence: float = Field(0.99, gt=0, lt=1)
+    allow_scale: bool = True
+    seed: Optional[int] = None
+
+class PairResidual(BaseModel):
+    pair_id: int
+    residual: float
+    inlier: bool
+
+class RobustCalibrationResponse(BaseModel):
+    matrix: List[List[float]]
+    scale: float
+    rotation: List[float]
+    translation: List[float]
+    rms_error: float
+    inlier_threshold: float
+    iterations: int
+    inliers: List[int]
+    outliers: List[int]
+    residuals: List[PairResidual]
@@ -97,6 +97,35 @@ class FileWithVersions(File):
     class Config:
         from_attributes = True
 
+# Mesh comparison between two file versions
+class MeshAlignment(BaseModel):
+    applied: bool
+    matrix: List[List[float]]  # 4x4, maps the source version onto the target version
+    mean_error: Optional[float] = None
+
+class MeshDeviationStatistics(BaseModel):
+    mean: float
+    mean_absolute: float
+    median_absolute: float
+    std: float
+    rms: float
+    min: float
+    max: float
+    percentile_95: float
+    within_tolerance: float = Field(..., description="Доля вершин с отклонением в пределах допуска")
+    tolerance: float
+
+class MeshComparisonResponse(BaseModel):
+    file_id: int
+    from_version: int
+    to_version: int
+    vertices_count: int
+    alignment: MeshAlignment
+    statistics: MeshDeviationStatistics
+    color_range: float
+    colors: str = Field(..., description="RGB uint8 для каждой вершины исходной версии, base64")
+    cached: bool = False
+
 # Properties for file upload response
 class FileUploadResponse(File):
     pass
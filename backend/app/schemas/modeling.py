@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.models.modeling import ModelType, ModelFormat, ModelingStatus
 
@@ -12,6 +12,7 @@ class ThreeDModelBase(BaseModel):
     file_path: str
     original_filename: str
     file_size: int
+    file_hash: Optional[str] = None
     scale: float = 1.0
     position_x: float = 0.0
     position_y: float = 0.0
@@ -195,4 +196,28 @@ class ModelAnalysisResponse(BaseModel):
     volume: Optional[float] = None
     surface_area: Optional[float] = None
     is_watertight: Optional[bool] = None
-    defects: List[str] = []
\ No newline at end of file
+    defects: List[str] = []
+
+# Properties for batch model analysis request
+class ModelBatchAnalysisRequest(BaseModel):
+    model_ids: Optional[List[int]] = None
+    patient_id: Optional[int] = None
+
+    class Config:
+        protected_namespaces = ()
+
+    @model_validator(mode='after')
+    def check_selection(self):
+        if not self.model_ids and self.patient_id is None:
+            raise ValueError("Either model_ids or patient_id must be provided")
+        if self.model_ids and self.patient_id is not None:
+            raise ValueError("Only one of model_ids or patient_id can be provided")
+        return self
+
+# One line of the streamed batch analysis response
+class ModelBatchAnalysisResult(ModelAnalysisResponse):
+    model_id: int
+    error: Optional[str] = None
+
+    class Config:
+        protected_namespaces = ()
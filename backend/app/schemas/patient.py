@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Optional, Union
+from typing import Dict, List, Optional, Union
 from pydantic import BaseModel, ConfigDict, field_validator
 from app.models.patient import Gender
 
@@ -36,4 +36,35 @@ class Patient(PatientBase):
     
     id: int
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+# Compact patient card: counts instead of full rows
+class PatientRecordStats(BaseModel):
+    count: int
+    updated_at: Optional[datetime] = None
+
+class PatientFileStats(BaseModel):
+    total: int
+    by_type: Dict[str, int]
+
+class PatientSessionSummary(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: int
+    status: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    model_id: Optional[int] = None
+
+    @field_validator('status', mode='before')
+    @classmethod
+    def enum_value(cls, value):
+        return getattr(value, 'value', value)
+
+class PatientSummary(BaseModel):
+    patient: Patient
+    files: PatientFileStats
+    records: Dict[str, PatientRecordStats]
+    modeling_sessions: List[PatientSessionSummary]
+    biometry_sessions: List[PatientSessionSummary]
+    updated_at: datetime
@@ -7,8 +7,9 @@ from pathlib import Path
 import logging
 import time
 
-from app.utils.file_helpers import calculate_file_hash
-from app.utils.mesh_helpers import process_mesh_or_scene
+from app.services.hashing_service import hashing_service
+from app.services.mesh_ingest import BufferType, load_mesh_from_buffer
+from app.utils.mesh_helpers import process_mesh_or_scene, transform_mesh
 from app.services.mesh_operations import find_contact_surface, extrude_surface, perform_boolean_operation
 
 logger = logging.getLogger(__name__)
@@ -20,12 +21,13 @@ class AssimpService:
     def __init__(self):
         self.temp_dir = tempfile.gettempdir()
     
-    def load_model(self, file_path: str) -> Dict[str, Any]:
+    def load_model(self, file_path: str, file_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Загрузка 3D модели и извлечение метаданных
         
         Args:
             file_path: Путь к файлу 3D модели
+            file_hash: Уже известный SHA-256 файла (вычисляется, если не передан)
             
         Returns:
             Словарь с метаданными модели
@@ -38,7 +40,8 @@ class AssimpService:
             raise FileNotFoundError(f"Model file not found: {file_path}")
         
         file_size = os.path.getsize(file_path)
-        file_hash = calculate_file_hash(file_path)
+        if file_hash is None:
+            file_hash = hashing_service.hash_file(file_path)
         logger.debug(f"Информация о файле: размер={file_size} байт, хэш={file_hash}")
         
         try:
@@ -61,6 +64,36 @@ class AssimpService:
             logger.error(f"Ошибка загрузки модели {file_path} за {execution_time:.3f} секунд: {str(e)}")
             raise Exception(f"Failed to load 3D model: {str(e)}")
     
+    def load_model_from_buffer(self, buffer: BufferType, filename: str, file_path: str, file_hash: str) -> Dict[str, Any]:
+        """
+        Извлечение метаданных 3D модели из содержимого в памяти (без чтения с диска)
+        
+        Args:
+            buffer: Содержимое файла модели
+            filename: Исходное имя файла (по расширению определяется формат)
+            file_path: Путь, по которому файл сохранен в хранилище
+            file_hash: SHA-256 содержимого
+            
+        Returns:
+            Словарь с метаданными модели
+        """
+        start_time = time.time()
+        logger.info(f"Начало анализа 3D модели из памяти: {filename}, размер={len(buffer)} байт")
+        
+        try:
+            mesh = load_mesh_from_buffer(buffer, filename)
+            metadata = self._extract_metadata(mesh, file_path, len(buffer), file_hash)
+            
+            execution_time = time.time() - start_time
+            self._log_metadata(metadata, execution_time, file_path)
+            
+            return metadata
+            
+        except Exception as e:
+            execution_time = time.time() - start_time
+            logger.error(f"Ошибка анализа модели {filename} за {execution_time:.3f} секунд: {str(e)}")
+            raise Exception(f"Failed to load 3D model: {str(e)}")
+    
     def _extract_metadata(self, mesh, file_path: str, file_size: int, file_hash: str) -> Dict[str, Any]:
         """Извлекает метаданные из меша"""
         logger.debug("Вычисление метаданных меша")
@@ -154,7 +187,8 @@ class AssimpService:
         
         return degenerate_count
     
-    def convert_format(self, input_path: str, output_path: str, target_format: str) -> bool:
+    def convert_format(self, input_path: str, output_path: str, target_format: str,
+                       matrix: Optional[np.ndarray] = None) -> bool:
         """
         Конвертация 3D модели в другой формат
         
@@ -162,6 +196,7 @@ class AssimpService:
             input_path: Путь к исходному файлу
             output_path: Путь для сохранения конвертированного файла
             target_format: Целевой формат ('stl', 'obj')
+            matrix: Матрица 4x4, применяемая к вершинам перед сохранением
             
         Returns:
             True если конвертация успешна
@@ -187,6 +222,10 @@ class AssimpService:
                 logger.warning("Не удалось обработать меш для конвертации")
                 return False
             
+            if matrix is not None:
+                transform_mesh(mesh, matrix)
+                logger.debug(f"К модели применено преобразование: {len(mesh.vertices)} вершин")
+            
             self._save_mesh(mesh, output_path, target_format, input_path, start_time)
             return True
             
@@ -0,0 +1,100 @@
+"""
+Пакетный анализ 3D моделей в пуле процессов
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Задание анализа: (ID модели, путь к файлу, хэш файла)
+AnalysisJob = Tuple[int, str, Optional[str]]
+
+
+def analyze_model_file(file_path: str, file_hash: Optional[str]) -> Dict[str, Any]:
+    """
+    Анализ одного файла модели (выполняется в дочернем процессе)
+
+    Args:
+        file_path: Путь к файлу модели
+        file_hash: Сохраненный SHA-256 файла
+
+    Returns:
+        Словарь с метаданными модели
+    """
+    # Импорт внутри функции: сервис создается в дочернем процессе при первом задании
+    from app.services.assimp_service import assimp_service
+
+    return assimp_service.load_model(file_path, file_hash=file_hash)
+
+
+class BatchAnalysisService:
+    """
+    Запуск анализа нескольких моделей параллельно.
+
+    Разбор мешей ограничен CPU и удерживает GIL, поэтому анализ выполняется
+    в пуле процессов. Пул создается при первом обращении и живет до
+    остановки приложения.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Создание пула процессов для анализа моделей: {self.max_workers} процессов")
+                # spawn вместо fork: сервер многопоточный, fork копирует захваченные блокировки
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def analyze(self, jobs: List[AnalysisJob]) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Анализирует модели и возвращает результаты по мере готовности
+
+        Args:
+            jobs: Список заданий (ID модели, путь к файлу, хэш файла)
+
+        Yields:
+            Кортеж (ID модели, метаданные или None, текст ошибки или None)
+        """
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        async def run(job: AnalysisJob):
+            model_id, file_path, file_hash = job
+            try:
+                metadata = await loop.run_in_executor(executor, analyze_model_file, file_path, file_hash)
+                return model_id, metadata, None
+            except Exception as e:
+                logger.error(f"Ошибка анализа модели {model_id} в пакете: {str(e)}")
+                return model_id, None, str(e)
+
+        for future in asyncio.as_completed([run(job) for job in jobs]):
+            yield await future
+
+        execution_time = time.time() - start_time
+        logger.info(f"Пакетный анализ {len(jobs)} моделей завершен за {execution_time:.3f} секунд")
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов"""
+        with self._lock:
+            if self._executor is not None:
+                logger.info("Остановка пула процессов анализа моделей")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+batch_analysis_service = BatchAnalysisService(max_workers=settings.BATCH_ANALYSIS_MAX_WORKERS)
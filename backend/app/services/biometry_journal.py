@@ -0,0 +1,300 @@
+"""
+Состояние биометрии по сессиям с сохранением в журнал (append-only JSONL)
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.biometry_storage import BiometryState
+from app.utils.cache import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка между процессами недоступна, работа в одном процессе
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class JournaledBiometryState:
+    """
+    Состояние одной сессии биометрии, синхронизированное через журнал.
+
+    Каждое изменение под файловой блокировкой дописывается одной строкой в
+    журнал сессии, после чего применяется к состоянию в памяти. Перед каждой
+    операцией процесс дочитывает записи, добавленные другими воркерами, начиная
+    со своего смещения, поэтому воркеры видят одно и то же состояние, а после
+    перезапуска оно восстанавливается воспроизведением журнала. Когда число
+    событий превышает порог, журнал сжимается до одного снимка.
+    """
+
+    def __init__(self, session_id: str, journal_path: Path, compact_after: int):
+        self.session_id = session_id
+        self.journal_path = journal_path
+        self.compact_after = compact_after
+        self.state = BiometryState()
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._events = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> BiometryState:
+        """
+        Дочитывает журнал и возвращает актуальное состояние
+
+        Returns:
+            Состояние сессии
+        """
+        with self._lock:
+            if not self._is_current():
+                with self._file_lock(exclusive=False):
+                    self._catch_up()
+            return self.state
+
+    def add_model_point(self, data: dict) -> dict:
+        return self._mutate(lambda state: self._with_event(state.add_model_point(data), "add_model_point", "point"))
+
+    def add_map_point(self, data: dict) -> dict:
+        return self._mutate(lambda state: self._with_event(state.add_map_point(data), "add_map_point", "point"))
+
+    def add_pair(self, model_id: int, map_id: int) -> dict:
+        def operation(state: BiometryState) -> Tuple[dict, List[dict]]:
+            pairs_before = len(state.pairs)
+            pair = state.add_pair(model_id, map_id)
+            # Дубликат возвращает существующую пару - событие не пишется
+            events = [{"op": "add_pair", "pair": pair}] if len(state.pairs) != pairs_before else []
+            return pair, events
+        return self._mutate(operation)
+
+    def add_batch(self, model_points: List[dict], map_points: List[dict], pairs: List[dict]) -> dict:
+        def operation(state: BiometryState) -> Tuple[dict, List[dict]]:
+            result = state.add_batch(model_points, map_points, pairs)
+            event = {
+                "op": "batch",
+                "model_points": result["model_points"],
+                "map_points": result["map_points"],
+                "pairs": result["created_pairs"],
+            }
+            has_changes = event["model_points"] or event["map_points"] or event["pairs"]
+            return result, [event] if has_changes else []
+        return self._mutate(operation)
+
+    def clear_pair(self, pair_id: int) -> bool:
+        def operation(state: BiometryState) -> Tuple[bool, List[dict]]:
+            removed = state.clear_pair(pair_id)
+            return removed, [{"op": "clear_pair", "pair_id": pair_id}] if removed else []
+        return self._mutate(operation)
+
+    def remove_model_point(self, point_id: int) -> Optional[List[int]]:
+        def operation(state: BiometryState) -> Tuple[Optional[List[int]], List[dict]]:
+            removed = state.remove_model_point(point_id)
+            return removed, [{"op": "remove_model_point", "point_id": point_id}] if removed is not None else []
+        return self._mutate(operation)
+
+    def remove_map_point(self, point_id: int) -> Optional[List[int]]:
+        def operation(state: BiometryState) -> Tuple[Optional[List[int]], List[dict]]:
+            removed = state.remove_map_point(point_id)
+            return removed, [{"op": "remove_map_point", "point_id": point_id}] if removed is not None else []
+        return self._mutate(operation)
+
+    def reset_points(self) -> None:
+        def operation(state: BiometryState) -> Tuple[None, List[dict]]:
+            state.reset_points()
+            return None, [{"op": "reset_points"}]
+        return self._mutate(operation)
+
+    def set_uploaded_path(self, path: str) -> None:
+        def operation(state: BiometryState) -> Tuple[None, List[dict]]:
+            state.set_uploaded_path(path)
+            return None, [{"op": "set_uploaded_path", "path": path}]
+        return self._mutate(operation)
+
+    @staticmethod
+    def _with_event(point: dict, op: str, key: str) -> Tuple[dict, List[dict]]:
+        return point, [{"op": op, key: point}]
+
+    def _mutate(self, operation: Callable[[BiometryState], Tuple[Any, List[dict]]]) -> Any:
+        """
+        Выполняет изменение под блокировками и дописывает события в журнал
+
+        Args:
+            operation: Функция, изменяющая состояние и возвращающая (результат, события)
+
+        Returns:
+            Результат операции
+        """
+        start_time = time.time()
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up()
+            result, events = operation(self.state)
+            if events:
+                try:
+                    self._append(events)
+                except Exception:
+                    # Изменение уже применено в памяти, но не попало в журнал -
+                    # состояние сбрасывается и при следующем обращении воспроизводится с диска
+                    logger.error(f"Не удалось записать журнал сессии биометрии '{self.session_id}', состояние будет перечитано")
+                    self._reset()
+                    raise
+                if self._events > self.compact_after:
+                    self._compact()
+        logger.debug(f"Изменение сессии биометрии '{self.session_id}' выполнено за {time.time() - start_time:.4f} секунд")
+        return result
+
+    def _is_current(self) -> bool:
+        """Быстрая проверка без блокировки: журнал не менялся с последнего чтения"""
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return self._inode is None
+        return stat.st_ino == self._inode and stat.st_size == self._offset
+
+    def _catch_up(self) -> None:
+        """Применяет записи журнала, добавленные после последнего чтения"""
+        try:
+            journal = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return
+        with journal:
+            stat = os.fstat(journal.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Журнал сжат или пересоздан другим процессом - чтение с начала
+                if self._inode is not None:
+                    logger.info(f"Журнал сессии биометрии '{self.session_id}' заменен, повторное воспроизведение")
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+
+            journal.seek(self._offset)
+            data = journal.read(stat.st_size - self._offset)
+            # Учитываются только полностью записанные строки
+            complete = data.rfind(b"\n") + 1
+            applied = 0
+            for line in data[:complete].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self.state.apply_event(json.loads(line))
+                    applied += 1
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Поврежденная запись журнала сессии биометрии '{self.session_id}': {str(e)}")
+            self._offset += complete
+            self._events += applied
+            if applied:
+                logger.debug(f"Сессия биометрии '{self.session_id}': применено {applied} событий журнала")
+
+    def _reset(self) -> None:
+        """Сбрасывает состояние в памяти; следующее чтение воспроизводит журнал с начала"""
+        self.state = BiometryState()
+        self._inode = None
+        self._offset = 0
+        self._events = 0
+
+    def _append(self, events: List[dict]) -> None:
+        """Дописывает события в журнал (вызывается под файловой блокировкой)"""
+        payload = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+        with open(self.journal_path, "ab") as journal:
+            size_before = os.fstat(journal.fileno()).st_size
+            try:
+                journal.write(payload)
+                journal.flush()
+            except OSError:
+                # Недописанная строка склеилась бы со следующей записью
+                journal.truncate(size_before)
+                raise
+            stat = os.fstat(journal.fileno())
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+        self._events += len(events)
+
+    def _compact(self) -> None:
+        """Заменяет журнал одним снимком состояния (вызывается под файловой блокировкой)"""
+        start_time = time.time()
+        events_before = self._events
+        temp_path = self.journal_path.with_suffix(".compact")
+        snapshot = json.dumps({"op": "snapshot", "state": self.state.to_snapshot()}, ensure_ascii=False) + "\n"
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(snapshot.encode("utf-8"))
+            temp_file.flush()
+            # Журнал - единственная копия состояния: снимок на диске до замены
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, self.journal_path)
+        stat = os.stat(self.journal_path)
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+        self._events = 1
+        logger.info(f"Журнал сессии биометрии '{self.session_id}' сжат за {time.time() - start_time:.3f} секунд: {events_before} событий -> снимок")
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Блокировка журнала между процессами (отдельный файл .lock, переживает сжатие журнала)"""
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.journal_path.with_suffix(".lock")
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class BiometrySessionStore:
+    """
+    Реестр состояний биометрии по ID сессии.
+
+    Состояния держатся в памяти процесса (LRU); вытесненная сессия при
+    следующем обращении восстанавливается из своего журнала.
+    """
+
+    def __init__(self, base_dir: str, max_sessions: int, compact_after: int):
+        self.base_dir = Path(base_dir)
+        self.compact_after = compact_after
+        self._sessions = LRUCache(max_entries=max_sessions)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> JournaledBiometryState:
+        """
+        Возвращает состояние сессии, загружая его из журнала при необходимости
+
+        Args:
+            session_id: ID сессии ([A-Za-z0-9_-], до 64 символов)
+
+        Returns:
+            Состояние сессии
+
+        Raises:
+            ValueError: Если ID сессии недопустим
+        """
+        if not SESSION_ID_RE.match(session_id):
+            raise ValueError(f"Недопустимый ID сессии биометрии: {session_id!r}")
+        session = self._sessions.get(session_id)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None:
+                    self.base_dir.mkdir(parents=True, exist_ok=True)
+                    logger.info(f"Загрузка сессии биометрии '{session_id}'")
+                    session = JournaledBiometryState(
+                        session_id, self.base_dir / f"{session_id}.jsonl", self.compact_after
+                    )
+                    self._sessions.set(session_id, session)
+        return session
+
+
+biometry_sessions = BiometrySessionStore(
+    settings.BIOMETRY_SESSIONS_DIR,
+    max_sessions=settings.BIOMETRY_SESSIONS_MAX_CACHED,
+    compact_after=settings.BIOMETRY_JOURNAL_COMPACT_EVENTS,
+)
@@ -3,13 +3,19 @@ from __future__ import annotations
 
 import logging
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from threading import Lock
-from typing import Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.services.calibration import CalibrationAccumulator
 
 # Настройка логирования для сервиса хранения биометрии
 logger = logging.getLogger(__name__)
 
+# Число последних изменений, доступных клиентам для получения дельты
+CHANGE_LOG_SIZE = 1000
+
 
 @dataclass
 class BiometryState:
@@ -22,6 +28,15 @@ class BiometryState:
     _model_seq: int = 0
     _map_seq: int = 0
     _pair_seq: int = 0
+    # Номер версии состояния: увеличивается при каждом изменении (в т.ч. при воспроизведении журнала)
+    version: int = 0
+    _changes: Deque[dict] = field(default_factory=lambda: deque(maxlen=CHANGE_LOG_SIZE), repr=False)
+    # Индексы пар: (model_id, map_id) -> ID пары и обратные индексы по точкам
+    _pair_index: Dict[Tuple[int, int], int] = field(default_factory=dict, repr=False)
+    _pairs_by_model: Dict[int, Set[int]] = field(default_factory=dict, repr=False)
+    _pairs_by_map: Dict[int, Set[int]] = field(default_factory=dict, repr=False)
+    # Накопленные статистики пар для калибровки без пересчета по всем парам
+    _calibration: CalibrationAccumulator = field(default_factory=CalibrationAccumulator, repr=False)
     _lock: Lock = field(default_factory=Lock, repr=False)
 
     def reset_points(self) -> None:
@@ -39,12 +54,8 @@ class BiometryState:
             # Логируем состояние перед сбросом
             logger.debug(f"Состояние перед сбросом: {model_count} точек модели, {map_count} точек карты, {pair_count} пар")
             
-            self.model_points.clear()
-            self.map_points.clear()
-            self.pairs.clear()
-            self._model_seq = 0
-            self._map_seq = 0
-            self._pair_seq = 0
+            self._clear()
+            self._touch({"op": "reset_points"})
             
             execution_time = time.time() - start_time
             logger.info(f"Сброс завершен за {execution_time:.3f} секунд: очищено {model_count} точек модели, {map_count} точек карты, {pair_count} пар")
@@ -66,6 +77,7 @@ class BiometryState:
             self._model_seq += 1
             point = {"id": self._model_seq, **data}
             self.model_points[point["id"]] = point
+            self._touch({"op": "add_model_point", "point": point})
             
             execution_time = time.time() - start_time
             logger.info(f"Точка модели {point['id']} успешно добавлена за {execution_time:.3f} секунд: x={data.get('x')}, y={data.get('y')}, z={data.get('z')}")
@@ -92,6 +104,7 @@ class BiometryState:
             self._map_seq += 1
             point = {"id": self._map_seq, **data}
             self.map_points[point["id"]] = point
+            self._touch({"op": "add_map_point", "point": point})
             
             execution_time = time.time() - start_time
             logger.info(f"Точка карты {point['id']} успешно добавлена за {execution_time:.3f} секунд: lat={data.get('lat')}, lng={data.get('lng')}")
@@ -131,19 +144,18 @@ class BiometryState:
                 raise KeyError("map_id missing")
             
             # Проверяем на дубликаты
-            for existing in self.pairs.values():
-                if (
-                    existing["model_id"] == model_id
-                    and existing["map_id"] == map_id
-                ):
-                    execution_time = time.time() - start_time
-                    logger.warning(f"Обнаружена дублирующая пара: модель {model_id} с картой {map_id}, возвращаем существующую за {execution_time:.3f} секунд")
-                    return existing
+            existing_id = self._pair_index.get((model_id, map_id))
+            if existing_id is not None:
+                execution_time = time.time() - start_time
+                logger.warning(f"Обнаружена дублирующая пара: модель {model_id} с картой {map_id}, возвращаем существующую за {execution_time:.3f} секунд")
+                return self.pairs[existing_id]
             
             # Создаем новую пару
             self._pair_seq += 1
             pair = {"id": self._pair_seq, "model_id": model_id, "map_id": map_id}
             self.pairs[pair["id"]] = pair
+            self._index_pair(pair)
+            self._touch({"op": "add_pair", "pair": pair})
             
             execution_time = time.time() - start_time
             logger.info(f"Новая пара {pair['id']} успешно создана за {execution_time:.3f} секунд: точка модели {model_id} -> точка карты {map_id}")
@@ -153,6 +165,101 @@ class BiometryState:
             
             return pair
 
+    def add_batch(self, model_points: List[dict], map_points: List[dict], pairs: List[dict]) -> dict:
+        """
+        Атомарное добавление набора точек и пар за одно взятие блокировки.
+        
+        Пара ссылается на точки либо по ID существующей точки (model_id/map_id),
+        либо по индексу точки в этом же наборе (model_index/map_index). Все
+        ссылки проверяются до изменения состояния: при ошибке ничего не
+        добавляется. Уже существующие пары возвращаются без повторного создания.
+        
+        Args:
+            model_points: Новые точки модели [{'x', 'y', 'z'}]
+            map_points: Новые точки карты [{'lat', 'lng'}]
+            pairs: Пары [{'model_id' | 'model_index', 'map_id' | 'map_index'}]
+            
+        Returns:
+            Словарь {'model_points', 'map_points', 'pairs', 'created_pairs'}:
+            созданные точки, пары в порядке запроса и только новые пары
+            
+        Raises:
+            ValueError: Если пара ссылается на несуществующую точку
+        """
+        start_time = time.time()
+        
+        with self._lock:
+            # Проверка ссылок до каких-либо изменений
+            resolved: List[Tuple[int, int]] = []
+            for position, spec in enumerate(pairs):
+                model_ref = self._resolve_reference(spec, "model", len(model_points), self.model_points, self._model_seq, position)
+                map_ref = self._resolve_reference(spec, "map", len(map_points), self.map_points, self._map_seq, position)
+                resolved.append((model_ref, map_ref))
+            
+            created_model_points = []
+            for data in model_points:
+                self._model_seq += 1
+                point = {"id": self._model_seq, **data}
+                self.model_points[point["id"]] = point
+                created_model_points.append(point)
+            
+            created_map_points = []
+            for data in map_points:
+                self._map_seq += 1
+                point = {"id": self._map_seq, **data}
+                self.map_points[point["id"]] = point
+                created_map_points.append(point)
+            
+            result_pairs = []
+            created_pairs = []
+            for model_id, map_id in resolved:
+                existing_id = self._pair_index.get((model_id, map_id))
+                if existing_id is not None:
+                    result_pairs.append(self.pairs[existing_id])
+                    continue
+                self._pair_seq += 1
+                pair = {"id": self._pair_seq, "model_id": model_id, "map_id": map_id}
+                self.pairs[pair["id"]] = pair
+                self._index_pair(pair)
+                result_pairs.append(pair)
+                created_pairs.append(pair)
+            
+            if created_model_points or created_map_points or created_pairs:
+                self._touch({
+                    "op": "batch",
+                    "model_points": created_model_points,
+                    "map_points": created_map_points,
+                    "pairs": created_pairs,
+                })
+            
+            execution_time = time.time() - start_time
+            logger.info(
+                f"Пакет добавлен за {execution_time:.3f} секунд: точек модели={len(created_model_points)}, "
+                f"точек карты={len(created_map_points)}, новых пар={len(created_pairs)} из {len(result_pairs)}"
+            )
+            return {
+                "model_points": created_model_points,
+                "map_points": created_map_points,
+                "pairs": result_pairs,
+                "created_pairs": created_pairs,
+            }
+
+    @staticmethod
+    def _resolve_reference(spec: dict, kind: str, batch_size: int, existing: Dict[int, dict], seq: int, position: int) -> int:
+        """Возвращает ID точки, на которую ссылается пара пакета (вызывается под блокировкой)"""
+        point_id = spec.get(f"{kind}_id")
+        index = spec.get(f"{kind}_index")
+        if (point_id is None) == (index is None):
+            raise ValueError(f"Пара #{position}: нужно указать ровно одно из {kind}_id и {kind}_index")
+        if point_id is not None:
+            if point_id not in existing:
+                raise ValueError(f"Пара #{position}: точка {kind} {point_id} не найдена")
+            return point_id
+        if not 0 <= index < batch_size:
+            raise ValueError(f"Пара #{position}: индекс {kind}_index={index} вне диапазона 0..{batch_size - 1}")
+        # Новые точки получат ID подряд после текущего значения последовательности
+        return seq + index + 1
+
     def set_uploaded_path(self, path: str) -> None:
         """
         Установка пути загруженной модели.
@@ -166,6 +273,7 @@ class BiometryState:
         with self._lock:
             old_path = self.last_uploaded_path
             self.last_uploaded_path = path
+            self._touch({"op": "set_uploaded_path", "path": path})
             
             execution_time = time.time() - start_time
             logger.debug(f"Путь модели успешно обновлен за {execution_time:.3f} секунд")
@@ -185,8 +293,9 @@ class BiometryState:
         logger.info(f"Начало удаления пары с ID: {pair_id}")
         
         with self._lock:
-            pair = self.pairs.pop(pair_id, None)
+            pair = self._remove_pair(pair_id)
             if pair is not None:
+                self._touch({"op": "clear_pair", "pair_id": pair_id})
                 execution_time = time.time() - start_time
                 logger.info(f"Пара {pair_id} успешно удалена за {execution_time:.3f} секунд: модель {pair['model_id']} -> карта {pair['map_id']}")
                 
@@ -199,6 +308,244 @@ class BiometryState:
                 logger.warning(f"Попытка удаления несуществующей пары: {pair_id}, операция заняла {execution_time:.3f} секунд")
                 return False
 
+    def remove_model_point(self, point_id: int) -> Optional[List[int]]:
+        """
+        Удаление точки модели вместе со всеми ее парами.
+        
+        Args:
+            point_id: ID точки модели
+            
+        Returns:
+            Список ID удаленных пар или None, если точка не найдена
+        """
+        start_time = time.time()
+        logger.info(f"Начало удаления точки модели {point_id}")
+        
+        with self._lock:
+            if self.model_points.pop(point_id, None) is None:
+                logger.warning(f"Попытка удаления несуществующей точки модели: {point_id}")
+                return None
+            removed_pairs = sorted(self._pairs_by_model.get(point_id, ()))
+            for pair_id in removed_pairs:
+                self._remove_pair(pair_id)
+            self._touch({"op": "remove_model_point", "point_id": point_id})
+            
+            execution_time = time.time() - start_time
+            logger.info(f"Точка модели {point_id} удалена за {execution_time:.3f} секунд, удалено пар: {len(removed_pairs)}")
+            return removed_pairs
+
+    def remove_map_point(self, point_id: int) -> Optional[List[int]]:
+        """
+        Удаление точки карты вместе со всеми ее парами.
+        
+        Args:
+            point_id: ID точки карты
+            
+        Returns:
+            Список ID удаленных пар или None, если точка не найдена
+        """
+        start_time = time.time()
+        logger.info(f"Начало удаления точки карты {point_id}")
+        
+        with self._lock:
+            if self.map_points.pop(point_id, None) is None:
+                logger.warning(f"Попытка удаления несуществующей точки карты: {point_id}")
+                return None
+            removed_pairs = sorted(self._pairs_by_map.get(point_id, ()))
+            for pair_id in removed_pairs:
+                self._remove_pair(pair_id)
+            self._touch({"op": "remove_map_point", "point_id": point_id})
+            
+            execution_time = time.time() - start_time
+            logger.info(f"Точка карты {point_id} удалена за {execution_time:.3f} секунд, удалено пар: {len(removed_pairs)}")
+            return removed_pairs
+
+    def get_pairs_for_model_point(self, point_id: int) -> List[dict]:
+        """
+        Получение пар точки модели.
+        
+        Args:
+            point_id: ID точки модели
+            
+        Returns:
+            Список пар, в которых участвует точка
+        """
+        with self._lock:
+            return [self.pairs[pair_id] for pair_id in sorted(self._pairs_by_model.get(point_id, ()))]
+
+    def get_pairs_for_map_point(self, point_id: int) -> List[dict]:
+        """
+        Получение пар точки карты.
+        
+        Args:
+            point_id: ID точки карты
+            
+        Returns:
+            Список пар, в которых участвует точка
+        """
+        with self._lock:
+            return [self.pairs[pair_id] for pair_id in sorted(self._pairs_by_map.get(point_id, ()))]
+
+    def _index_pair(self, pair: dict) -> None:
+        """Добавляет пару в индексы (вызывается под блокировкой)"""
+        self._pair_index[(pair["model_id"], pair["map_id"])] = pair["id"]
+        self._pairs_by_model.setdefault(pair["model_id"], set()).add(pair["id"])
+        self._pairs_by_map.setdefault(pair["map_id"], set()).add(pair["id"])
+        model_point = self.model_points.get(pair["model_id"])
+        map_point = self.map_points.get(pair["map_id"])
+        if model_point is not None and map_point is not None:
+            self._calibration.add(pair["id"], *self._calibration_coordinates(model_point, map_point))
+
+    def _remove_pair(self, pair_id: int) -> Optional[dict]:
+        """Удаляет пару и ее записи в индексах (вызывается под блокировкой)"""
+        pair = self.pairs.pop(pair_id, None)
+        if pair is None:
+            return None
+        self._pair_index.pop((pair["model_id"], pair["map_id"]), None)
+        self._calibration.remove(pair_id)
+        for index, point_id in ((self._pairs_by_model, pair["model_id"]), (self._pairs_by_map, pair["map_id"])):
+            pair_ids = index.get(point_id)
+            if pair_ids is not None:
+                pair_ids.discard(pair_id)
+                if not pair_ids:
+                    del index[point_id]
+        return pair
+
+    def apply_event(self, event: dict) -> None:
+        """
+        Применение события журнала (воспроизведение уже выполненной операции).
+        
+        События содержат итоговые ID, поэтому воспроизведение детерминировано
+        и не зависит от порядка, в котором процессы выделяли последовательности.
+        
+        Args:
+            event: Событие журнала {'op': ..., ...}
+        """
+        op = event.get("op")
+        with self._lock:
+            if op == "add_model_point":
+                self._restore_model_point(event["point"])
+            elif op == "add_map_point":
+                self._restore_map_point(event["point"])
+            elif op == "add_pair":
+                self._restore_pair(event["pair"])
+            elif op == "batch":
+                for point in event["model_points"]:
+                    self._restore_model_point(point)
+                for point in event["map_points"]:
+                    self._restore_map_point(point)
+                for pair in event["pairs"]:
+                    self._restore_pair(pair)
+            elif op == "clear_pair":
+                self._remove_pair(event["pair_id"])
+            elif op == "remove_model_point":
+                self.model_points.pop(event["point_id"], None)
+                for pair_id in list(self._pairs_by_model.get(event["point_id"], ())):
+                    self._remove_pair(pair_id)
+            elif op == "remove_map_point":
+                self.map_points.pop(event["point_id"], None)
+                for pair_id in list(self._pairs_by_map.get(event["point_id"], ())):
+                    self._remove_pair(pair_id)
+            elif op == "set_uploaded_path":
+                self.last_uploaded_path = event["path"]
+            elif op == "reset_points":
+                self._clear()
+            elif op == "snapshot":
+                self._load_snapshot(event["state"])
+                return
+            else:
+                logger.warning(f"Неизвестное событие журнала биометрии: {op}")
+                return
+            self._touch(event)
+
+    def _touch(self, change: dict) -> None:
+        """Отмечает изменение состояния и записывает его в журнал изменений (вызывается под блокировкой)"""
+        self.version += 1
+        self._changes.append({"version": self.version, **change})
+
+    def get_changes(self, since: int) -> Tuple[int, Optional[List[dict]]]:
+        """
+        Изменения состояния после указанной версии.
+        
+        Изменения имеют тот же вид, что и события журнала, плюс поле 'version'.
+        
+        Args:
+            since: Версия, известная клиенту
+            
+        Returns:
+            Кортеж (текущая версия, список изменений) или (текущая версия, None),
+            если часть изменений уже вытеснена из журнала и клиенту нужна полная
+            перезагрузка состояния
+        """
+        with self._lock:
+            if since == self.version:
+                return self.version, []
+            oldest = self._changes[0]["version"] if self._changes else self.version + 1
+            if since > self.version or since + 1 < oldest:
+                return self.version, None
+            return self.version, [change for change in self._changes if change["version"] > since]
+
+    def _restore_model_point(self, point: dict) -> None:
+        self.model_points[point["id"]] = point
+        self._model_seq = max(self._model_seq, point["id"])
+
+    def _restore_map_point(self, point: dict) -> None:
+        self.map_points[point["id"]] = point
+        self._map_seq = max(self._map_seq, point["id"])
+
+    def _restore_pair(self, pair: dict) -> None:
+        self.pairs[pair["id"]] = pair
+        self._index_pair(pair)
+        self._pair_seq = max(self._pair_seq, pair["id"])
+
+    def to_snapshot(self) -> dict:
+        """
+        Полный снимок состояния для сжатия журнала.
+        
+        Returns:
+            Словарь, пригодный для сериализации в JSON
+        """
+        with self._lock:
+            return {
+                "last_uploaded_path": self.last_uploaded_path,
+                "model_points": list(self.model_points.values()),
+                "map_points": list(self.map_points.values()),
+                "pairs": list(self.pairs.values()),
+                "model_seq": self._model_seq,
+                "map_seq": self._map_seq,
+                "pair_seq": self._pair_seq,
+                "version": self.version,
+            }
+
+    def _load_snapshot(self, snapshot: dict) -> None:
+        """Восстанавливает состояние из снимка (вызывается под блокировкой)"""
+        self._clear()
+        self.last_uploaded_path = snapshot.get("last_uploaded_path")
+        self.model_points.update((point["id"], point) for point in snapshot.get("model_points", []))
+        self.map_points.update((point["id"], point) for point in snapshot.get("map_points", []))
+        for pair in snapshot.get("pairs", []):
+            self.pairs[pair["id"]] = pair
+            self._index_pair(pair)
+        self._model_seq = snapshot.get("model_seq", 0)
+        self._map_seq = snapshot.get("map_seq", 0)
+        self._pair_seq = snapshot.get("pair_seq", 0)
+        self.version = snapshot.get("version", 0)
+        # Изменения до снимка неизвестны - клиенты получат полную перезагрузку
+        self._changes.clear()
+
+    def _clear(self) -> None:
+        """Очищает точки, пары, индексы и последовательности (вызывается под блокировкой)"""
+        self.model_points.clear()
+        self.map_points.clear()
+        self.pairs.clear()
+        self._pair_index.clear()
+        self._pairs_by_model.clear()
+        self._pairs_by_map.clear()
+        self._calibration.clear()
+        self._model_seq = 0
+        self._map_seq = 0
+        self._pair_seq = 0
+
     def get_model_points(self) -> List[dict]:
         """
         Получение всех точек модели.
@@ -235,6 +582,51 @@ class BiometryState:
             logger.debug(f"Получено {len(pairs)} пар")
             return pairs
 
+    def get_calibration_pairs(self) -> Tuple[List[int], List[List[float]], List[List[float]]]:
+        """
+        Получение согласованного снимка пар для расчета калибровки.
+        
+        Точки карты переводятся в плоские координаты [lng, lat, 0].
+        
+        Returns:
+            Кортеж (ID пар, координаты точек модели, координаты точек карты)
+        """
+        with self._lock:
+            pair_ids: List[int] = []
+            model_coords: List[List[float]] = []
+            map_coords: List[List[float]] = []
+            for pair in self.pairs.values():
+                model_coord, map_coord = self._calibration_coordinates(
+                    self.model_points[pair["model_id"]], self.map_points[pair["map_id"]]
+                )
+                pair_ids.append(pair["id"])
+                model_coords.append(model_coord)
+                map_coords.append(map_coord)
+            logger.debug(f"Снимок {len(pair_ids)} пар для калибровки")
+            return pair_ids, model_coords, map_coords
+
+    def get_calibration(self, with_scale: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Текущая калибровка по всем парам из накопленных статистик (O(1)).
+        
+        Args:
+            with_scale: Подбирать ли масштаб
+            
+        Returns:
+            Словарь с матрицей, масштабом, поворотом, переносом и RMS или None,
+            если пар меньше трех или точки вырождены
+        """
+        with self._lock:
+            return self._calibration.solve(with_scale)
+
+    @staticmethod
+    def _calibration_coordinates(model_point: dict, map_point: dict) -> Tuple[List[float], List[float]]:
+        """Координаты пары для калибровки: точка модели [x, y, z] и точка карты [lng, lat, 0]"""
+        return (
+            [model_point["x"], model_point["y"], model_point["z"]],
+            [map_point["lng"], map_point["lat"], 0.0],
+        )
+
     def get_last_uploaded_path(self) -> Optional[str]:
         """
         Получение пути последней загруженной модели.
@@ -0,0 +1,462 @@
+"""
+Расчет преобразования калибровки биометрии по парам точек
+"""
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+# Минимальное число пар точек для подобия в 3D
+MIN_CALIBRATION_POINTS = 3
+
+# Относительный порог вырожденности (точки на одной прямой)
+_DEGENERACY_TOLERANCE = 1e-9
+
+
+def _as_point(value: Any) -> list:
+    """Приводит точку к [x, y, z]: словарь {x, y, z} или список; 2D дополняется z=0"""
+    if isinstance(value, dict):
+        value = [value.get('x'), value.get('y'), value.get('z', 0.0)]
+    point = [float(c) for c in value]
+    if len(point) == 2:
+        point.append(0.0)
+    if len(point) != 3:
+        raise ValueError(f"Точка должна содержать 2 или 3 координаты: {value}")
+    return point
+
+
+def parse_calibration_points(calibration_points: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Извлекает пары точек из запроса калибровки
+
+    Поддерживаемые форматы:
+        {"points": [{"source": [x, y, z], "target": [x, y, z]}, ...]}
+        {"source": [[x, y, z], ...], "target": [[x, y, z], ...]}
+
+    Args:
+        calibration_points: Точки калибровки из запроса
+
+    Returns:
+        Кортеж массивов (N, 3): точки модели и соответствующие им целевые точки
+
+    Raises:
+        ValueError: Если формат неверный или пар меньше трех
+    """
+    if 'points' in calibration_points:
+        pairs = calibration_points['points'] or []
+        source = [_as_point(pair['source']) for pair in pairs]
+        target = [_as_point(pair['target']) for pair in pairs]
+    elif 'source' in calibration_points and 'target' in calibration_points:
+        source = [_as_point(point) for point in calibration_points['source']]
+        target = [_as_point(point) for point in calibration_points['target']]
+    else:
+        raise ValueError("calibration_points должен содержать 'points' или 'source' и 'target'")
+
+    if len(source) != len(target):
+        raise ValueError(f"Число исходных ({len(source)}) и целевых ({len(target)}) точек не совпадает")
+    if len(source) < MIN_CALIBRATION_POINTS:
+        raise ValueError(f"Для калибровки нужно минимум {MIN_CALIBRATION_POINTS} пары точек, получено {len(source)}")
+
+    return np.asarray(source, dtype=np.float64), np.asarray(target, dtype=np.float64)
+
+
+def _rotation_and_scale(covariance: np.ndarray, source_variance: float, with_scale: bool) -> Tuple[np.ndarray, float, float]:
+    """
+    Поворот и масштаб по матрице кросс-ковариации (ядро метода Умеямы)
+
+    Returns:
+        Кортеж (поворот 3x3, масштаб, след D*S - сумма исправленных сингулярных чисел)
+
+    Raises:
+        ValueError: Если точки вырождены (лежат на одной прямой)
+    """
+    u, singular_values, vt = np.linalg.svd(covariance)
+    if singular_values[1] <= _DEGENERACY_TOLERANCE * max(singular_values[0], _DEGENERACY_TOLERANCE):
+        raise ValueError("Точки калибровки вырождены (лежат на одной прямой или совпадают)")
+
+    # Исключение отражения: det(R) = +1
+    correction = np.ones(3)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        correction[2] = -1.0
+    rotation = (u * correction) @ vt
+
+    trace = float((singular_values * correction).sum())
+    scale = trace / source_variance if with_scale else 1.0
+    return rotation, scale, trace
+
+
+def _euler_degrees(rotation: np.ndarray) -> list:
+    """Углы Эйлера XYZ поворота 3x3 в градусах"""
+    rotation_matrix = np.eye(4)
+    rotation_matrix[:3, :3] = rotation
+    return np.degrees(trimesh.transformations.euler_from_matrix(rotation_matrix, axes='sxyz')).tolist()
+
+
+def solve_similarity(source: np.ndarray, target: np.ndarray, with_scale: bool = True) -> Dict[str, Any]:
+    """
+    Преобразование подобия, минимизирующее сумму квадратов отклонений (метод Умеямы)
+
+    Args:
+        source: Точки модели (N, 3)
+        target: Целевые точки (N, 3)
+        with_scale: Подбирать ли масштаб (иначе - жесткое преобразование, Кабш)
+
+    Returns:
+        Словарь с матрицей 4x4, масштабом, поворотом, переносом, невязками и RMS
+
+    Raises:
+        ValueError: Если точки вырождены (лежат на одной прямой)
+    """
+    start_time = time.time()
+    count = len(source)
+
+    source_mean = source.mean(axis=0)
+    target_mean = target.mean(axis=0)
+    source_centered = source - source_mean
+    target_centered = target - target_mean
+
+    covariance = target_centered.T @ source_centered / count
+    source_variance = (source_centered ** 2).sum() / count
+    rotation, scale, _ = _rotation_and_scale(covariance, source_variance, with_scale)
+    translation = target_mean - scale * rotation @ source_mean
+
+    matrix = np.eye(4)
+    matrix[:3, :3] = scale * rotation
+    matrix[:3, 3] = translation
+
+    residuals = np.linalg.norm(source @ matrix[:3, :3].T + translation - target, axis=1)
+    rms_error = float(np.sqrt(np.mean(residuals ** 2)))
+
+    execution_time = time.time() - start_time
+    logger.info(f"Преобразование калибровки рассчитано за {execution_time * 1000:.3f} мс: точек={count}, масштаб={scale:.6f}, RMS={rms_error:.6f}")
+
+    return {
+        'matrix': matrix.tolist(),
+        'scale': scale,
+        'rotation': _euler_degrees(rotation),  # Углы Эйлера XYZ в градусах
+        'rotation_matrix': rotation.tolist(),
+        'translation': translation.tolist(),
+        'rms_error': rms_error,
+        'residuals': residuals.tolist(),
+        'points_count': count,
+    }
+
+
+class CalibrationAccumulator:
+    """
+    Накопленные достаточные статистики пар точек для калибровки за O(1).
+
+    Хранятся число пар, суммы координат и сумма внешних произведений
+    target * source^T, а также суммы квадратов норм. Добавление и удаление пары
+    обновляет суммы, а преобразование подобия и RMS вычисляются из моментов
+    через SVD матрицы 3x3 без обхода пар. Суммы ведутся относительно первой
+    добавленной пары, чтобы географические координаты не теряли точность.
+    Потокобезопасность обеспечивает владелец (BiometryState).
+    """
+
+    def __init__(self):
+        self._contributions: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: Any, source: Any, target: Any) -> None:
+        """
+        Добавляет пару точек (повторное добавление ключа заменяет пару)
+
+        Args:
+            key: Ключ пары (ID пары)
+            source: Точка модели [x, y, z]
+            target: Целевая точка [x, y, z]
+        """
+        if key in self._contributions:
+            self.remove(key)
+        source = np.asarray(source, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        if self._count == 0:
+            self._source_origin = source.copy()
+            self._target_origin = target.copy()
+        source = source - self._source_origin
+        target = target - self._target_origin
+        self._contributions[key] = (source, target)
+        self._update(source, target, 1.0)
+
+    def remove(self, key: Any) -> bool:
+        """
+        Удаляет пару точек
+
+        Args:
+            key: Ключ пары
+
+        Returns:
+            True если пара была учтена
+        """
+        contribution = self._contributions.pop(key, None)
+        if contribution is None:
+            return False
+        if not self._contributions:
+            # Точный ноль вместо накопленной погрешности вычитаний
+            self._reset()
+        else:
+            self._update(*contribution, -1.0)
+        return True
+
+    def clear(self) -> None:
+        self._contributions.clear()
+        self._reset()
+
+    def solve(self, with_scale: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Текущее преобразование подобия по накопленным статистикам
+
+        Args:
+            with_scale: Подбирать ли масштаб
+
+        Returns:
+            Словарь с матрицей 4x4, масштабом, поворотом, переносом и RMS или
+            None, если пар меньше трех или они вырождены
+        """
+        count = self._count
+        if count < MIN_CALIBRATION_POINTS:
+            return None
+
+        source_mean = self._source_sum / count
+        target_mean = self._target_sum / count
+        covariance = self._cross_sum / count - np.outer(target_mean, source_mean)
+        source_variance = self._source_square_sum / count - source_mean @ source_mean
+        target_variance = self._target_square_sum / count - target_mean @ target_mean
+        try:
+            rotation, scale, trace = _rotation_and_scale(covariance, source_variance, with_scale)
+        except ValueError:
+            return None
+
+        # Средний квадрат невязки: c^2 * var_s - 2c * tr(DS) + var_t
+        mean_square = scale ** 2 * source_variance - 2.0 * scale * trace + target_variance
+        rms_error = float(np.sqrt(max(mean_square, 0.0)))
+
+        translation = (
+            target_mean + self._target_origin
+            - scale * rotation @ (source_mean + self._source_origin)
+        )
+        matrix = np.eye(4)
+        matrix[:3, :3] = scale * rotation
+        matrix[:3, 3] = translation
+
+        return {
+            'matrix': matrix.tolist(),
+            'scale': float(scale),
+            'rotation': _euler_degrees(rotation),
+            'translation': translation.tolist(),
+            'rms_error': rms_error,
+            'points_count': count,
+        }
+
+    def _update(self, source: np.ndarray, target: np.ndarray, sign: float) -> None:
+        self._count += int(sign)
+        self._source_sum += sign * source
+        self._target_sum += sign * target
+        self._cross_sum += sign * np.outer(target, source)
+        self._source_square_sum += sign * float(source @ source)
+        self._target_square_sum += sign * float(target @ target)
+
+    def _reset(self) -> None:
+        self._count = 0
+        self._source_origin = np.zeros(3)
+        self._target_origin = np.zeros(3)
+        self._source_sum = np.zeros(3)
+        self._target_sum = np.zeros(3)
+        self._cross_sum = np.zeros((3, 3))
+        self._source_square_sum = 0.0
+        self._target_square_sum = 0.0
+
+
+def transformation_to_matrix(transformation: Any) -> np.ndarray:
+    """
+    Матрица 4x4 из сохраненной калибровки сессии
+
+    Args:
+        transformation: Результат solve_similarity ({"matrix": ...}) или сама матрица 4x4
+
+    Returns:
+        Матрица 4x4
+
+    Raises:
+        ValueError: Если матрица отсутствует или имеет неверную форму
+    """
+    if isinstance(transformation, dict):
+        transformation = transformation.get('matrix')
+    if transformation is None:
+        raise ValueError("Матрица преобразования отсутствует")
+    matrix = np.asarray(transformation, dtype=np.float64)
+    if matrix.shape != (4, 4) or not np.isfinite(matrix).all():
+        raise ValueError(f"Матрица преобразования должна иметь размер 4x4, получено {matrix.shape}")
+    return matrix
+
+
+def solve_similarity_batch(source: np.ndarray, target: np.ndarray, with_scale: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Метод Умеямы для пакета независимых наборов точек (одно пакетное SVD)
+
+    Args:
+        source: Точки модели (B, K, 3)
+        target: Целевые точки (B, K, 3)
+        with_scale: Подбирать ли масштаб
+
+    Returns:
+        Кортеж (матрицы (B, 4, 4), маска невырожденных наборов (B,))
+    """
+    count = source.shape[1]
+    source_mean = source.mean(axis=1, keepdims=True)
+    target_mean = target.mean(axis=1, keepdims=True)
+    source_centered = source - source_mean
+    target_centered = target - target_mean
+
+    covariance = np.einsum('bki,bkj->bij', target_centered, source_centered) / count
+    u, singular_values, vt = np.linalg.svd(covariance)
+    valid = singular_values[:, 1] > _DEGENERACY_TOLERANCE * np.maximum(singular_values[:, 0], _DEGENERACY_TOLERANCE)
+
+    correction = np.ones((len(source), 3))
+    correction[np.linalg.det(u) * np.linalg.det(vt) < 0, 2] = -1.0
+    rotation = (u * correction[:, None, :]) @ vt
+
+    if with_scale:
+        source_variance = (source_centered ** 2).sum(axis=(1, 2)) / count
+        scale = (singular_values * correction).sum(axis=1) / np.where(source_variance > 0, source_variance, 1.0)
+    else:
+        scale = np.ones(len(source))
+    linear = scale[:, None, None] * rotation
+    translation = target_mean[:, 0, :] - np.einsum('bij,bj->bi', linear, source_mean[:, 0, :])
+
+    matrices = np.tile(np.eye(4), (len(source), 1, 1))
+    matrices[:, :3, :3] = linear
+    matrices[:, :3, 3] = translation
+    return matrices, valid
+
+
+def _residuals(matrices: np.ndarray, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Невязки всех точек для пакета гипотез: (B, N)"""
+    transformed = np.einsum('bij,nj->bni', matrices[:, :3, :3], source) + matrices[:, None, :3, 3]
+    return np.linalg.norm(transformed - target[None], axis=2)
+
+
+def ransac_similarity(
+    source: np.ndarray,
+    target: np.ndarray,
+    inlier_threshold: Optional[float] = None,
+    max_iterations: int = 1000,
+    confidence: float = 0.99,
+    with_scale: bool = True,
+    seed: Optional[int] = None,
+    batch_size: int = 256,
+) -> Dict[str, Any]:
+    """
+    Устойчивая к выбросам калибровка: RANSAC с минимальным решателем по 3 парам
+
+    Гипотезы строятся пакетами (одно пакетное SVD на пакет), число итераций
+    уменьшается адаптивно по доле инлаеров. Если порог не задан, гипотезы
+    оцениваются по медиане квадратов невязок (LMedS), а порог выводится из
+    робастной оценки разброса. Итоговое преобразование уточняется методом
+    наименьших квадратов по инлаерам.
+
+    Args:
+        source: Точки модели (N, 3)
+        target: Целевые точки (N, 3)
+        inlier_threshold: Порог невязки инлаера (None - оценка по медиане)
+        max_iterations: Максимальное число гипотез
+        confidence: Требуемая вероятность выбрать выборку без выбросов
+        with_scale: Подбирать ли масштаб
+        seed: Зерно генератора случайных чисел
+        batch_size: Число гипотез в пакете
+
+    Returns:
+        Результат solve_similarity по инлаерам, дополненный масками и порогом
+    """
+    start_time = time.time()
+    count = len(source)
+    if count < MIN_CALIBRATION_POINTS:
+        raise ValueError(f"Для калибровки нужно минимум {MIN_CALIBRATION_POINTS} пары точек, получено {count}")
+
+    rng = np.random.default_rng(seed)
+    use_median = inlier_threshold is None
+    best_score = None
+    best_matrix = None
+    required_iterations = max_iterations
+    iterations = 0
+
+    while iterations < required_iterations:
+        batch = min(batch_size, required_iterations - iterations)
+        # Случайные выборки по 3 различные пары без перебора всех сочетаний
+        samples = np.argpartition(rng.random((batch, count)), MIN_CALIBRATION_POINTS - 1, axis=1)[:, :MIN_CALIBRATION_POINTS]
+        matrices, valid = solve_similarity_batch(source[samples], target[samples], with_scale)
+        iterations += batch
+        if not valid.any():
+            continue
+        matrices = matrices[valid]
+        residuals = _residuals(matrices, source, target)
+
+        if use_median:
+            scores = np.median(residuals ** 2, axis=1)
+            index = int(np.argmin(scores))
+            score = scores[index]
+            improved = best_score is None or score < best_score
+        else:
+            inlier_mask = residuals <= inlier_threshold
+            inlier_counts = inlier_mask.sum(axis=1)
+            # При равном числе инлаеров предпочтение - меньшей сумме их невязок
+            costs = np.where(inlier_mask, residuals, 0.0).sum(axis=1)
+            index = int(np.lexsort((costs, -inlier_counts))[0])
+            score = (-int(inlier_counts[index]), float(costs[index]))
+            improved = best_score is None or score < best_score
+            if improved:
+                inlier_ratio = inlier_counts[index] / count
+                if inlier_ratio >= 1.0:
+                    required_iterations = iterations
+                elif inlier_ratio > 0:
+                    estimate = np.log(1 - confidence) / np.log(1 - inlier_ratio ** MIN_CALIBRATION_POINTS)
+                    required_iterations = min(max_iterations, int(np.ceil(estimate)))
+
+        if improved:
+            best_score = score
+            best_matrix = matrices[index]
+
+    if best_matrix is None:
+        raise ValueError("Точки калибровки вырождены (лежат на одной прямой или совпадают)")
+
+    if use_median:
+        # Оценка разброса по LMedS (Rousseeuw): 1.4826 * (1 + 5 / (N - p)) * sqrt(median)
+        sigma = 1.4826 * (1 + 5.0 / max(count - MIN_CALIBRATION_POINTS, 1)) * np.sqrt(best_score)
+        inlier_threshold = float(max(2.5 * sigma, _DEGENERACY_TOLERANCE))
+
+    inliers = _residuals(best_matrix[None], source, target)[0] <= inlier_threshold
+    if inliers.sum() < MIN_CALIBRATION_POINTS:
+        raise ValueError("Недостаточно инлаеров для уточнения калибровки")
+
+    # Уточнение по инлаерам и повторная классификация точек
+    result = solve_similarity(source[inliers], target[inliers], with_scale)
+    matrix = np.array(result['matrix'])
+    residuals = _residuals(matrix[None], source, target)[0]
+    refined_inliers = residuals <= inlier_threshold
+    if refined_inliers.sum() >= MIN_CALIBRATION_POINTS and not np.array_equal(refined_inliers, inliers):
+        inliers = refined_inliers
+        result = solve_similarity(source[inliers], target[inliers], with_scale)
+        residuals = _residuals(np.array(result['matrix'])[None], source, target)[0]
+        inliers = residuals <= inlier_threshold
+
+    execution_time = time.time() - start_time
+    logger.info(
+        f"RANSAC калибровка завершена за {execution_time * 1000:.1f} мс: гипотез={iterations}, "
+        f"инлаеров={int(inliers.sum())}/{count}, порог={inlier_threshold:.6g}, RMS={result['rms_error']:.6g}"
+    )
+
+    result.update({
+        'residuals': residuals.tolist(),
+        'inlier_mask': inliers.tolist(),
+        'inlier_threshold': float(inlier_threshold),
+        'iterations': iterations,
+    })
+    return result
@@ -0,0 +1,208 @@
+"""
+Кэш результатов экспорта 3D моделей
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Имена файлов кэша: {ключ}.{формат}
+_CACHE_FILENAME_RE = re.compile(r"^[0-9a-f]{40}\.[a-z0-9]+$")
+
+
+class ExportCache:
+    """
+    Дисковый кэш сконвертированных моделей.
+
+    Ключ кэша строится из хэша исходного файла, целевого формата и опций
+    экспорта, поэтому повторный экспорт той же модели возвращает уже готовый
+    файл, а параллельные экспорты разных моделей не перезаписывают друг друга.
+    Вытеснение - LRU с ограничением по числу записей и суммарному размеру.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int, max_entries: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # имя файла -> размер
+        self._total_size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def build_filename(source_hash: str, target_format: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Формирует имя файла кэша для комбинации (хэш источника, формат, опции)
+
+        Args:
+            source_hash: Хэш исходного файла модели
+            target_format: Целевой формат ('stl', 'obj')
+            options: Опции экспорта, влияющие на результат
+
+        Returns:
+            Имя файла в каталоге кэша
+        """
+        target_format = target_format.lower()
+        key_data = json.dumps(
+            {"source": source_hash, "format": target_format, "options": options or {}},
+            sort_keys=True,
+            default=str,
+        )
+        key = hashlib.sha256(key_data.encode("utf-8")).hexdigest()[:40]
+        return f"{key}.{target_format}"
+
+    def get_or_create(
+        self,
+        source_hash: str,
+        target_format: str,
+        options: Optional[Dict[str, Any]],
+        producer: Callable[[str], bool],
+    ) -> Tuple[Optional[Path], bool]:
+        """
+        Возвращает путь к результату экспорта, создавая его при промахе кэша
+
+        Args:
+            source_hash: Хэш исходного файла модели
+            target_format: Целевой формат ('stl', 'obj')
+            options: Опции экспорта
+            producer: Функция, записывающая результат по переданному пути
+                (например, assimp_service.convert_format)
+
+        Returns:
+            Кортеж (путь к файлу или None при ошибке, признак попадания в кэш)
+        """
+        self._ensure_loaded()
+        filename = self.build_filename(source_hash, target_format, options)
+
+        cached = self._lookup(filename)
+        if cached is not None:
+            logger.info(f"Экспорт найден в кэше: {cached}")
+            return cached, True
+
+        # Один и тот же экспорт выполняется только одним запросом одновременно
+        with self._get_key_lock(filename):
+            cached = self._lookup(filename)
+            if cached is not None:
+                logger.info(f"Экспорт найден в кэше после ожидания: {cached}")
+                return cached, True
+
+            start_time = time.time()
+            target_path = self.cache_dir / filename
+            # Расширение сохраняется, так как по нему определяется формат экспорта
+            temp_path = self.cache_dir / f".{uuid.uuid4().hex}.tmp.{target_format.lower()}"
+
+            try:
+                success = producer(str(temp_path))
+                if not success or not temp_path.exists():
+                    logger.error(f"Не удалось создать экспорт для кэша: {filename}")
+                    return None, False
+                os.replace(temp_path, target_path)
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
+
+            self._register(filename, target_path.stat().st_size)
+            execution_time = time.time() - start_time
+            logger.info(f"Экспорт добавлен в кэш за {execution_time:.3f} секунд: {target_path}")
+            return target_path, False
+
+    def get_statistics(self) -> dict:
+        """
+        Получение статистики кэша
+
+        Returns:
+            Словарь со статистикой
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                'cache_dir': str(self.cache_dir),
+                'entries': len(self._entries),
+                'total_size': self._total_size,
+                'max_entries': self.max_entries,
+                'max_size_bytes': self.max_size_bytes,
+            }
+
+    def _ensure_loaded(self) -> None:
+        """Восстанавливает индекс кэша с диска (порядок LRU - по времени изменения)"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            existing = []
+            for path in self.cache_dir.iterdir():
+                if path.is_file() and _CACHE_FILENAME_RE.match(path.name):
+                    stat = path.stat()
+                    existing.append((stat.st_mtime, path.name, stat.st_size))
+            for _, name, size in sorted(existing):
+                self._entries[name] = size
+                self._total_size += size
+            self._loaded = True
+            logger.debug(f"Индекс кэша экспорта загружен: {len(self._entries)} файлов, {self._total_size} байт")
+        self._evict()
+
+    def _lookup(self, filename: str) -> Optional[Path]:
+        """Ищет файл в кэше и отмечает его как недавно использованный"""
+        with self._lock:
+            if filename not in self._entries:
+                return None
+            path = self.cache_dir / filename
+            if not path.exists():
+                # Файл удален извне - убираем запись из индекса
+                self._total_size -= self._entries.pop(filename)
+                return None
+            self._entries.move_to_end(filename)
+        try:
+            # Время изменения используется для восстановления порядка LRU после перезапуска
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def _register(self, filename: str, size: int) -> None:
+        """Добавляет файл в индекс и запускает вытеснение"""
+        with self._lock:
+            self._total_size -= self._entries.pop(filename, 0)
+            self._entries[filename] = size
+            self._total_size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные файлы сверх лимитов (последний добавленный сохраняется)"""
+        with self._lock:
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._total_size > self.max_size_bytes
+            ):
+                filename, size = self._entries.popitem(last=False)
+                self._total_size -= size
+                self._key_locks.pop(filename, None)
+                try:
+                    (self.cache_dir / filename).unlink()
+                    logger.info(f"Файл вытеснен из кэша экспорта: {filename}, размер: {size} байт")
+                except OSError as e:
+                    logger.warning(f"Не удалось удалить файл кэша {filename}: {str(e)}")
+
+    def _get_key_lock(self, filename: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(filename, threading.Lock())
+
+
+_max_size_bytes = settings.EXPORT_CACHE_MAX_SIZE_MB * 1024 * 1024
+
+# Каталоги совпадают с теми, из которых отдают файлы эндпоинты download-export
+modeling_export_cache = ExportCache("uploads/3d_models/export", _max_size_bytes, settings.EXPORT_CACHE_MAX_ENTRIES)
+biometry_export_cache = ExportCache("uploads/biometry_models/export", _max_size_bytes, settings.EXPORT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,99 @@
+"""
+Сервис вычисления хэшей файлов (SHA-256)
+"""
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Размер буфера при чтении файла с диска
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingService:
+    """
+    Единая точка вычисления хэшей файлов.
+
+    Хэш вычисляется один раз - при записи файла - и сохраняется в поле
+    file_hash записи БД. Остальные потребители (анализ, экспорт, кэш
+    экспорта) берут его из записи и не перечитывают файл.
+    """
+
+    def hash_bytes(self, content: bytes) -> str:
+        """
+        Вычисляет SHA-256 содержимого в памяти
+
+        Args:
+            content: Содержимое файла
+
+        Returns:
+            SHA-256 в виде hex-строки
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    def new_hasher(self):
+        """
+        Создает объект SHA-256 для потокового хэширования (по мере записи блоков)
+
+        Returns:
+            Объект hashlib с методами update() и hexdigest()
+        """
+        return hashlib.sha256()
+
+    def hash_file(self, file_path: str) -> str:
+        """
+        Вычисляет SHA-256 файла на диске блоками по 1 МБ
+
+        Args:
+            file_path: Путь к файлу
+
+        Returns:
+            SHA-256 в виде hex-строки
+        """
+        start_time = time.time()
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb", buffering=0) as f:
+            buffer = bytearray(HASH_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                file_hash.update(view[:read])
+        execution_time = time.time() - start_time
+        logger.debug(f"Хэш файла {file_path} вычислен за {execution_time:.3f} секунд")
+        return file_hash.hexdigest()
+
+    def get_stored_hash(self, db: Session, db_obj) -> Optional[str]:
+        """
+        Возвращает хэш из записи БД, вычисляя и сохраняя его для старых записей
+
+        Args:
+            db: Сессия базы данных
+            db_obj: Запись с полями file_path и file_hash
+
+        Returns:
+            SHA-256 файла или None, если файл отсутствует на диске
+        """
+        if db_obj.file_hash:
+            return db_obj.file_hash
+
+        if not Path(str(db_obj.file_path)).exists():
+            logger.warning(f"Невозможно вычислить хэш, файл отсутствует: {db_obj.file_path}")
+            return None
+
+        # Записи, созданные до появления поля file_hash, дозаполняются однократно
+        logger.info(f"Хэш отсутствует в записи {db_obj.__class__.__name__} {db_obj.id}, вычисление по файлу")
+        db_obj.file_hash = self.hash_file(str(db_obj.file_path))
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj.file_hash
+
+
+hashing_service = HashingService()
@@ -0,0 +1,189 @@
+"""
+Сравнение двух версий 3D модели (выравнивание ICP и карта отклонений)
+"""
+import base64
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import trimesh
+from scipy.spatial import cKDTree
+
+from app.core.config import settings
+from app.utils.cache import LRUCache
+from app.utils.mesh_helpers import process_mesh_or_scene
+
+logger = logging.getLogger(__name__)
+
+# Число вершин исходного меша, используемых для ICP
+ICP_SAMPLE_SIZE = 5000
+ICP_MAX_ITERATIONS = 50
+ICP_THRESHOLD = 1e-6
+
+# Цвета карты отклонений: синий (внутрь) - белый (совпадение) - красный (наружу)
+_NEGATIVE_COLOR = np.array([0, 0, 255], dtype=np.float64)
+_NEUTRAL_COLOR = np.array([255, 255, 255], dtype=np.float64)
+_POSITIVE_COLOR = np.array([255, 0, 0], dtype=np.float64)
+
+
+def _load_mesh(file_path: str) -> trimesh.Trimesh:
+    mesh = process_mesh_or_scene(trimesh.load(file_path))
+    if mesh is None or len(mesh.vertices) == 0:
+        raise ValueError(f"Не удалось загрузить меш: {file_path}")
+    return mesh
+
+
+def align_icp(source: trimesh.Trimesh, target: trimesh.Trimesh) -> Tuple[np.ndarray, float]:
+    """
+    Жесткое выравнивание исходного меша на целевой (ICP по вершинам)
+
+    Args:
+        source: Исходный меш (предыдущая версия)
+        target: Целевой меш (следующая версия)
+
+    Returns:
+        Кортеж (матрица преобразования 4x4, среднее расстояние после выравнивания)
+    """
+    vertices = source.vertices
+    if len(vertices) > ICP_SAMPLE_SIZE:
+        # Детерминированная выборка, чтобы повторные сравнения давали тот же результат
+        indices = np.linspace(0, len(vertices) - 1, ICP_SAMPLE_SIZE).astype(np.int64)
+        vertices = vertices[indices]
+
+    # Начальное приближение - совмещение центров масс
+    initial = np.eye(4)
+    initial[:3, 3] = target.vertices.mean(axis=0) - source.vertices.mean(axis=0)
+
+    # Целевые точки передаются массивом: поиск ближайших идет через cKDTree
+    matrix, _, cost = trimesh.registration.icp(
+        vertices, target.vertices, initial=initial,
+        threshold=ICP_THRESHOLD, max_iterations=ICP_MAX_ITERATIONS,
+        reflection=False, scale=False,
+    )
+    return matrix, float(cost)
+
+
+def deviation_colors(deviations: np.ndarray, color_range: float) -> np.ndarray:
+    """
+    Переводит знаковые отклонения в цвета RGB (uint8) для тепловой карты
+
+    Args:
+        deviations: Отклонения вершин
+        color_range: Отклонение, соответствующее насыщенному цвету
+
+    Returns:
+        Массив (N, 3) uint8
+    """
+    if color_range <= 0:
+        return np.tile(_NEUTRAL_COLOR.astype(np.uint8), (len(deviations), 1))
+    t = np.clip(deviations / color_range, -1.0, 1.0)[:, None]
+    extreme = np.where(t < 0, _NEGATIVE_COLOR, _POSITIVE_COLOR)
+    colors = _NEUTRAL_COLOR + (extreme - _NEUTRAL_COLOR) * np.abs(t)
+    return np.rint(colors).astype(np.uint8)
+
+
+class MeshDiffService:
+    """
+    Количественное сравнение двух сканов (например, до и после этапа лечения).
+
+    Исходный меш выравнивается на целевой, для каждой вершины исходного меша
+    вычисляется знаковое расстояние до ближайшей вершины целевого (знак - по
+    нормали целевой поверхности). Результаты кэшируются по паре хэшей файлов.
+    """
+
+    def __init__(self, max_entries: int):
+        self._cache = LRUCache(max_entries=max_entries)
+
+    def compare(
+        self,
+        source_path: str,
+        target_path: str,
+        source_hash: Optional[str] = None,
+        target_hash: Optional[str] = None,
+        tolerance: float = 0.1,
+        color_range: Optional[float] = None,
+        align: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Сравнивает две модели
+
+        Args:
+            source_path: Путь к исходной модели
+            target_path: Путь к целевой модели
+            source_hash: SHA-256 исходного файла (ключ кэша)
+            target_hash: SHA-256 целевого файла (ключ кэша)
+            tolerance: Допуск, в пределах которого вершина считается совпадающей
+            color_range: Отклонение насыщенного цвета (по умолчанию 95-й перцентиль)
+            align: Выполнять ли выравнивание ICP
+
+        Returns:
+            Словарь с выравниванием, статистикой и цветами вершин (base64, RGB uint8)
+        """
+        cache_key = None
+        if source_hash and target_hash:
+            cache_key = (source_hash, target_hash, tolerance, color_range, align)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Результат сравнения найден в кэше: {source_hash[:12]} -> {target_hash[:12]}")
+                return dict(cached, cached=True)
+
+        start_time = time.time()
+        logger.info(f"Начало сравнения моделей: {source_path} -> {target_path}")
+
+        source = _load_mesh(source_path)
+        target = _load_mesh(target_path)
+
+        if align:
+            matrix, alignment_error = align_icp(source, target)
+        else:
+            matrix, alignment_error = np.eye(4), None
+        aligned_vertices = trimesh.transform_points(source.vertices, matrix)
+
+        distances, nearest = cKDTree(target.vertices).query(aligned_vertices, k=1)
+        offsets = aligned_vertices - target.vertices[nearest]
+        signs = np.sign(np.einsum('ij,ij->i', offsets, target.vertex_normals[nearest]))
+        signs[signs == 0] = 1.0
+        deviations = distances * signs
+
+        absolute = np.abs(deviations)
+        percentile_95 = float(np.percentile(absolute, 95))
+        effective_range = color_range if color_range is not None else percentile_95
+        colors = deviation_colors(deviations, effective_range)
+
+        result = {
+            'vertices_count': int(len(aligned_vertices)),
+            'alignment': {
+                'applied': align,
+                'matrix': matrix.tolist(),
+                'mean_error': alignment_error,
+            },
+            'statistics': {
+                'mean': float(deviations.mean()),
+                'mean_absolute': float(absolute.mean()),
+                'median_absolute': float(np.median(absolute)),
+                'std': float(deviations.std()),
+                'rms': float(np.sqrt(np.mean(deviations ** 2))),
+                'min': float(deviations.min()),
+                'max': float(deviations.max()),
+                'percentile_95': percentile_95,
+                'within_tolerance': float(np.mean(absolute <= tolerance)),
+                'tolerance': tolerance,
+            },
+            'color_range': float(effective_range),
+            'colors': base64.b64encode(colors.tobytes()).decode('ascii'),
+            'cached': False,
+        }
+
+        if cache_key is not None:
+            self._cache.set(cache_key, result)
+
+        execution_time = time.time() - start_time
+        logger.info(
+            f"Сравнение моделей завершено за {execution_time:.3f} секунд: вершины={result['vertices_count']}, "
+            f"RMS={result['statistics']['rms']:.4f}, в допуске={result['statistics']['within_tolerance']:.1%}"
+        )
+        return result
+
+
+mesh_diff_service = MeshDiffService(max_entries=settings.MESH_DIFF_CACHE_MAX_ENTRIES)
@@ -0,0 +1,179 @@
+"""
+Разбор STL/OBJ моделей напрямую из буфера в памяти
+"""
+import io
+import logging
+import time
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+import trimesh
+
+from app.utils.mesh_helpers import process_mesh_or_scene
+
+logger = logging.getLogger(__name__)
+
+BufferType = Union[bytes, bytearray, memoryview]
+
+# Бинарный STL: 80 байт заголовка, uint32 число треугольников, далее по 50 байт на треугольник
+STL_HEADER_SIZE = 80
+STL_TRIANGLE_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])
+
+# Размер блока при разборе OBJ
+OBJ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def is_binary_stl(buffer: BufferType) -> bool:
+    """
+    Проверяет, что буфер содержит бинарный STL
+
+    Args:
+        buffer: Содержимое файла
+
+    Returns:
+        True если размер буфера соответствует числу треугольников из заголовка
+    """
+    if len(buffer) < STL_HEADER_SIZE + 4:
+        return False
+    triangles_count = int(np.frombuffer(buffer, dtype='<u4', count=1, offset=STL_HEADER_SIZE)[0])
+    return len(buffer) == STL_HEADER_SIZE + 4 + triangles_count * STL_TRIANGLE_DTYPE.itemsize
+
+
+def parse_binary_stl(buffer: BufferType) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает бинарный STL без копирования исходного буфера
+
+    Args:
+        buffer: Содержимое файла
+
+    Returns:
+        Кортеж (вершины (3N, 3), грани (N, 3)) - вершины треугольников не объединены
+    """
+    triangles_count = int(np.frombuffer(buffer, dtype='<u4', count=1, offset=STL_HEADER_SIZE)[0])
+    triangles = np.frombuffer(
+        buffer, dtype=STL_TRIANGLE_DTYPE, count=triangles_count, offset=STL_HEADER_SIZE + 4
+    )
+    vertices = triangles['vertices'].reshape(-1, 3).astype(np.float64)
+    faces = np.arange(len(vertices), dtype=np.int64).reshape(-1, 3)
+    return vertices, faces
+
+
+def _iter_line_chunks(buffer: BufferType, chunk_size: int):
+    """Возвращает блоки буфера, выровненные по границе строки"""
+    data = buffer if isinstance(buffer, (bytes, bytearray)) else bytes(buffer)
+    start = 0
+    total = len(data)
+    while start < total:
+        end = data.find(b'\n', min(start + chunk_size, total))
+        end = total if end < 0 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def _parse_obj_vertices(lines: List[bytes]) -> np.ndarray:
+    """Разбирает строки 'v x y z [w|r g b]' в массив (N, 3)"""
+    tokens = b' '.join(line[2:] for line in lines).split()
+    if len(tokens) == 3 * len(lines):
+        return np.array(tokens, dtype=np.float64).reshape(-1, 3)
+    # Строки с дополнительными компонентами (w или цвет вершины)
+    return np.array([line.split()[1:4] for line in lines], dtype=np.float64)
+
+
+def _parse_obj_faces(lines: List[bytes], vertices_before: int) -> List[List[int]]:
+    """Разбирает строки 'f ...' с триангуляцией многоугольников веером"""
+    faces = []
+    for line in lines:
+        indices = []
+        for token in line.split()[1:]:
+            index = int(token.split(b'/', 1)[0])
+            # Индексы OBJ начинаются с 1, отрицательные - относительно последней вершины
+            indices.append(index - 1 if index > 0 else vertices_before + index)
+        for i in range(1, len(indices) - 1):
+            faces.append([indices[0], indices[i], indices[i + 1]])
+    return faces
+
+
+def parse_obj(buffer: BufferType, chunk_size: int = OBJ_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает текстовый OBJ блоками (учитываются только вершины и грани)
+
+    Args:
+        buffer: Содержимое файла
+        chunk_size: Размер блока в байтах
+
+    Returns:
+        Кортеж (вершины (N, 3), грани (M, 3))
+    """
+    vertex_blocks = []
+    faces: List[List[int]] = []
+    vertices_count = 0
+
+    def flush_vertices(lines: List[bytes]) -> None:
+        nonlocal vertices_count
+        block = _parse_obj_vertices(lines)
+        vertex_blocks.append(block)
+        vertices_count += len(block)
+
+    for chunk in _iter_line_chunks(buffer, chunk_size):
+        vertex_lines: List[bytes] = []
+        face_lines: List[bytes] = []
+        for line in chunk.splitlines():
+            line = line.strip()
+            if line.startswith(b'v ') or line.startswith(b'v\t'):
+                if face_lines:
+                    # Относительные индексы граней зависят от числа уже прочитанных вершин
+                    faces.extend(_parse_obj_faces(face_lines, vertices_count))
+                    face_lines = []
+                vertex_lines.append(line)
+            elif line.startswith(b'f ') or line.startswith(b'f\t'):
+                if vertex_lines:
+                    flush_vertices(vertex_lines)
+                    vertex_lines = []
+                face_lines.append(line)
+        if vertex_lines:
+            flush_vertices(vertex_lines)
+        if face_lines:
+            faces.extend(_parse_obj_faces(face_lines, vertices_count))
+
+    vertices = np.vstack(vertex_blocks) if vertex_blocks else np.zeros((0, 3), dtype=np.float64)
+    faces_array = np.array(faces, dtype=np.int64).reshape(-1, 3)
+    return vertices, faces_array
+
+
+def load_mesh_from_buffer(buffer: BufferType, filename: str) -> trimesh.Trimesh:
+    """
+    Загружает меш из буфера в памяти без записи во временный файл
+
+    Args:
+        buffer: Содержимое файла
+        filename: Имя файла (по расширению определяется формат)
+
+    Returns:
+        Меш trimesh
+    """
+    start_time = time.time()
+    file_type = Path(filename).suffix.lower().lstrip('.')
+
+    if file_type == 'stl' and is_binary_stl(buffer):
+        logger.debug("Разбор бинарного STL из буфера")
+        vertices, faces = parse_binary_stl(buffer)
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
+    elif file_type == 'obj':
+        logger.debug("Разбор OBJ из буфера блоками")
+        vertices, faces = parse_obj(buffer)
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
+    else:
+        # Текстовый STL и прочие форматы - штатный загрузчик trimesh из памяти
+        logger.debug(f"Загрузка формата '{file_type}' из буфера средствами trimesh")
+        mesh = process_mesh_or_scene(trimesh.load(io.BytesIO(bytes(buffer)), file_type=file_type))
+        if mesh is None:
+            raise ValueError("Не удалось обработать меш")
+
+    execution_time = time.time() - start_time
+    logger.info(f"Меш разобран из буфера за {execution_time:.3f} секунд: вершины={len(mesh.vertices)}, грани={len(mesh.faces)}")
+    return mesh
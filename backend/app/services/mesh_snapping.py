@@ -0,0 +1,153 @@
+"""
+Привязка точек к вершинам и поверхности загруженной модели (KD-дерево с кэшем)
+"""
+import logging
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+import trimesh
+from scipy.spatial import cKDTree
+
+from app.core.config import settings
+from app.services.hashing_service import hashing_service
+from app.utils.cache import LRUCache
+from app.utils.mesh_helpers import process_mesh_or_scene
+
+logger = logging.getLogger(__name__)
+
+SNAP_MODES = ("vertex", "surface")
+
+
+class SnapIndex:
+    """
+    Пространственный индекс одной модели: KD-деревья по вершинам и по центроидам
+    треугольников. Строится один раз на модель и переиспользуется для всех точек.
+    """
+
+    def __init__(self, mesh: trimesh.Trimesh):
+        self.vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        self.triangles = np.asarray(mesh.triangles, dtype=np.float64)
+        self.vertex_tree = cKDTree(self.vertices)
+        centroids = self.triangles.mean(axis=1)
+        self.centroid_tree = cKDTree(centroids) if len(centroids) else None
+        # Наибольшее расстояние от центроида треугольника до его вершины
+        self.max_triangle_radius = float(
+            np.linalg.norm(self.triangles - centroids[:, None, :], axis=2).max()
+        ) if len(centroids) else 0.0
+
+    def snap_to_vertices(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        distances, nearest = self.vertex_tree.query(points, k=1)
+        return self.vertices[nearest], distances
+
+    def snap_to_surface(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ближайшая точка поверхности для каждой точки.
+
+        Расстояние до ближайшей вершины ограничивает расстояние до поверхности
+        сверху, поэтому достаточно проверить треугольники, центроид которых лежит
+        не дальше этого расстояния плюс радиус наибольшего треугольника.
+        """
+        snapped, distances = self.snap_to_vertices(points)
+        if self.centroid_tree is None:
+            return snapped, distances
+
+        candidates = self.centroid_tree.query_ball_point(points, distances + self.max_triangle_radius)
+        counts = np.fromiter((len(c) for c in candidates), dtype=np.int64, count=len(points))
+        if not counts.sum():
+            return snapped, distances
+        faces = np.concatenate([np.asarray(c, dtype=np.int64) for c in candidates])
+        owners = np.repeat(np.arange(len(points)), counts)
+
+        closest = trimesh.triangles.closest_point(self.triangles[faces], points[owners])
+        candidate_distances = np.linalg.norm(closest - points[owners], axis=1)
+
+        # Минимум по кандидатам каждой точки
+        order = np.lexsort((candidate_distances, owners))
+        first = np.concatenate(([True], owners[order][1:] != owners[order][:-1]))
+        best = order[first]
+        best_owners = owners[best]
+        improved = candidate_distances[best] < distances[best_owners]
+        snapped = snapped.copy()
+        distances = distances.copy()
+        snapped[best_owners[improved]] = closest[best[improved]]
+        distances[best_owners[improved]] = candidate_distances[best[improved]]
+        return snapped, distances
+
+
+class MeshSnapService:
+    """
+    Привязка точек, поставленных на модели, к ее вершинам или поверхности.
+
+    Индекс модели кэшируется по SHA-256 файла, а хэш - по пути, размеру и
+    времени изменения файла, поэтому модель читается и индексируется один раз.
+    """
+
+    def __init__(self, max_entries: int):
+        self._indexes = LRUCache(max_entries=max_entries)
+        self._hashes = LRUCache(max_entries=max_entries * 4)
+
+    def snap(self, file_path: str, points: np.ndarray, mode: str = "vertex") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Привязывает точки к модели
+
+        Args:
+            file_path: Путь к файлу модели
+            points: Массив точек (N, 3)
+            mode: 'vertex' - ближайшая вершина, 'surface' - ближайшая точка поверхности
+
+        Returns:
+            Кортеж (привязанные точки (N, 3), расстояния смещения (N,))
+
+        Raises:
+            ValueError: Если режим неизвестен или модель не загружается
+        """
+        if mode not in SNAP_MODES:
+            raise ValueError(f"Неизвестный режим привязки: {mode}")
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+        index = self.get_index(file_path)
+        start_time = time.time()
+        if mode == "vertex":
+            snapped, distances = index.snap_to_vertices(points)
+        else:
+            snapped, distances = index.snap_to_surface(points)
+        logger.debug(
+            f"Привязка {len(points)} точек ({mode}) выполнена за {(time.time() - start_time) * 1000:.2f} мс, "
+            f"максимальное смещение={float(distances.max()) if len(distances) else 0.0:.4f}"
+        )
+        return snapped, distances
+
+    def get_index(self, file_path: str) -> SnapIndex:
+        """
+        Возвращает индекс модели, строя его при первом обращении
+
+        Args:
+            file_path: Путь к файлу модели
+
+        Returns:
+            Индекс модели
+        """
+        stat = os.stat(file_path)
+        file_hash = self._hashes.get_or_set(
+            (file_path, stat.st_size, stat.st_mtime_ns), lambda: hashing_service.hash_file(file_path)
+        )
+        return self._indexes.get_or_set(file_hash, lambda: self._build_index(file_path))
+
+    @staticmethod
+    def _build_index(file_path: str) -> SnapIndex:
+        start_time = time.time()
+        mesh = process_mesh_or_scene(trimesh.load(file_path))
+        if mesh is None or len(mesh.vertices) == 0:
+            raise ValueError(f"Не удалось загрузить меш: {file_path}")
+        index = SnapIndex(mesh)
+        execution_time = time.time() - start_time
+        logger.info(
+            f"Индекс привязки построен за {execution_time:.3f} секунд: {file_path}, "
+            f"вершины={len(index.vertices)}, треугольники={len(index.triangles)}"
+        )
+        return index
+
+
+mesh_snap_service = MeshSnapService(max_entries=settings.MESH_SNAP_CACHE_MAX_ENTRIES)
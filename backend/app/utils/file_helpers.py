@@ -3,7 +3,6 @@
 """
 import os
 import uuid
-import hashlib
 from typing import Optional, List
 
 
@@ -35,26 +34,6 @@ def remove_temp_file(file_path: str) -> None:
         os.remove(file_path)
 
 
-def calculate_file_hash(file_path: str) -> str:
-    """
-    Вычисляет MD5 хэш файла
-    
-    Args:
-        file_path: Путь к файлу
-        
-    Returns:
-        MD5 хэш в виде строки
-    """
-    try:
-        with open(file_path, 'rb') as f:
-            file_hash = hashlib.md5()
-            for chunk in iter(lambda: f.read(4096), b""):
-                file_hash.update(chunk)
-        return file_hash.hexdigest()
-    except Exception:
-        return "unknown"
-
-
 def get_file_size(content: bytes) -> int:
     """
     Возвращает размер содержимого в байтах
@@ -1,7 +1,9 @@
 """
 Вспомогательные функции для работы с 3D мешами
 """
+import hashlib
 import logging
+import numpy as np
 import trimesh
 from typing import Optional
 
@@ -38,3 +40,46 @@ def process_mesh_or_scene(mesh_data) -> Optional[trimesh.Trimesh]:
     else:
         logger.info("Загружен объект типа 'меш'")
         return mesh_data
+
+
+def pose_matrix(model) -> np.ndarray:
+    """
+    Матрица положения модели из параметров BaseModel3D: T * R * S
+    
+    Args:
+        model: Модель с полями scale, position_* и rotation_* (углы в градусах, XYZ)
+        
+    Returns:
+        Матрица 4x4
+    """
+    scale = model.scale if model.scale is not None else 1.0
+    angles = [np.radians(getattr(model, f"rotation_{axis}") or 0.0) for axis in "xyz"]
+    matrix = trimesh.transformations.euler_matrix(*angles, axes='sxyz')
+    matrix[:3, :3] *= scale
+    matrix[:3, 3] = [getattr(model, f"position_{axis}") or 0.0 for axis in "xyz"]
+    return matrix
+
+
+def matrix_digest(matrix: np.ndarray) -> str:
+    """Короткий хэш матрицы преобразования для ключей кэша"""
+    return hashlib.sha256(np.ascontiguousarray(matrix, dtype=np.float64).tobytes()).hexdigest()[:16]
+
+
+def transform_mesh(mesh: trimesh.Trimesh, matrix: np.ndarray) -> trimesh.Trimesh:
+    """
+    Применяет матрицу 4x4 ко всем вершинам меша одним матричным умножением
+    
+    Args:
+        mesh: Исходный меш (изменяется на месте)
+        matrix: Матрица преобразования 4x4
+        
+    Returns:
+        Тот же меш с преобразованными вершинами
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    mesh.vertices = vertices @ matrix[:3, :3].T + matrix[:3, 3]
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        # Отражение меняет ориентацию граней
+        mesh.invert()
+    return mesh
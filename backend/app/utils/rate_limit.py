@@ -0,0 +1,67 @@
+"""
+Потокобезопасный ограничитель частоты запросов со скользящим окном
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable
+
+
+class SlidingWindowRateLimiter:
+    """
+    Не более max_attempts попыток на ключ за последние window секунд.
+
+    Состояние хранится в памяти процесса, поэтому при нескольких воркерах
+    лимит действует в каждом из них отдельно.
+
+    Args:
+        max_attempts: Допустимое число попыток в окне
+        window: Длительность окна в секундах
+        max_keys: Максимальное число отслеживаемых ключей
+    """
+
+    def __init__(self, max_attempts: int, window: float, max_keys: int = 10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts: Dict[Hashable, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: Hashable) -> float:
+        """
+        Регистрирует попытку
+
+        Args:
+            key: Ключ ограничения (например, адрес клиента и имя пользователя)
+
+        Returns:
+            0, если попытка разрешена, иначе число секунд до освобождения окна
+        """
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                if len(self._attempts) >= self.max_keys:
+                    self._prune(now)
+                attempts = self._attempts[key] = deque()
+            while attempts and now - attempts[0] >= self.window:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return self.window - (now - attempts[0])
+            attempts.append(now)
+            return 0.0
+
+    def reset(self, key: Hashable) -> None:
+        """Сбрасывает попытки по ключу (например, после успешного входа)"""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        """Удаляет ключи без попыток в текущем окне (вызывается под блокировкой)"""
+        expired = [key for key, attempts in self._attempts.items() if not attempts or now - attempts[-1] >= self.window]
+        for key in expired:
+            del self._attempts[key]
+        if len(self._attempts) >= self.max_keys:
+            # Все ключи активны - вытесняется самый давний
+            oldest = min(self._attempts, key=lambda key: self._attempts[key][-1])
+            del self._attempts[oldest]
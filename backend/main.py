@@ -6,15 +6,20 @@ import logging
 # Добавляем путь до директории app
 # Удалить эту строку
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from app.api import deps
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.db.indexes import check_indexes
 from app.db.init_db import init_db
+from app.db.session import engine, get_pool_metrics
+from app.services.batch_analysis import batch_analysis_service
 from app.logging_config import setup_biometry_logging
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.models.user import User
 
 # Настройка базового логирования
 import os
@@ -52,8 +57,13 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     init_db()
     logger.info("Database initialized successfully")
+    try:
+        check_indexes(engine)
+    except Exception as e:
+        logger.error(f"Failed to check database indexes: {str(e)}")
     yield
     # Cleanup (if needed)
+    batch_analysis_service.shutdown()
     logger.info("Application shutdown")
 
 app = FastAPI(
@@ -70,6 +80,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
     )
     
     logger.info(f"CORS middleware configured for origins: {settings.get_cors_origins()}")
@@ -96,6 +107,11 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+def health_db(current_user: User = Depends(deps.get_current_active_admin)):
+    # Состояние пула раскрывает внутренние параметры, поэтому только для администраторов
+    return {"status": "healthy", "pool": get_pool_metrics()}
+
 logger.info("FastAPI application startup completed")
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Тесты асинхронных сессий и CRUD (aiosqlite)
+"""
+
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.api import deps
+from app.crud.base import AsyncCRUDBase
+from app.crud.crud_file import AsyncCRUDFile
+from app.db import session as db_session
+from app.db.base import Base
+from app.models.file import File, FileVersion
+from app.models.patient import Gender, Patient
+from app.schemas.file import FileCreate
+from app.schemas.patient import PatientCreate, PatientUpdate
+
+
+@pytest.fixture
+def async_engine(tmp_path, monkeypatch):
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(db_session, "_async_engine", engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+async def _with_session(work):
+    # Сессия из зависимости эндпоинтов, как в запросе
+    sessions = deps.get_async_db()
+    db = await sessions.__anext__()
+    try:
+        return await work(db)
+    finally:
+        await sessions.aclose()
+
+
+def test_get_async_db_uses_async_engine(async_engine):
+    """Зависимость выдает сессию на асинхронном движке и закрывает ее после запроса"""
+    async def work(db):
+        assert db.bind is async_engine
+        return (await db.execute(select(1))).scalar()
+
+    assert asyncio.run(_with_session(work)) == 1
+
+
+def test_async_crud_base_round_trip(async_engine):
+    """Создание, чтение, обновление и удаление через AsyncCRUDBase"""
+    crud_patient = AsyncCRUDBase[Patient, PatientCreate, PatientUpdate](Patient)
+
+    async def work(db):
+        db.add_all([Patient(full_name=name, birth_date=date(2000, 1, 1), gender=Gender.FEMALE) for name in ("A", "B")])
+        await db.commit()
+        patient = await crud_patient.get(db, id=1)
+        updated = await crud_patient.update(db, db_obj=patient, obj_in={"full_name": "A2"})
+        removed = await crud_patient.remove(db, id=2)
+        remaining = await crud_patient.get_multi(db)
+        return updated.full_name, removed.id, [p.id for p in remaining], await crud_patient.get(db, id=2)
+
+    assert asyncio.run(_with_session(work)) == ("A2", 2, [1], None)
+
+
+def test_async_file_crud_commits_once_and_publishes(async_engine, tmp_path):
+    """AsyncCRUDFile записывает файл и версию одним коммитом, содержимое - по итоговым путям"""
+    path = tmp_path / "jaw.stl"
+    commits = []
+    event.listen(async_engine.sync_engine, "commit", lambda conn: commits.append(conn))
+
+    async def work(db):
+        db.add(Patient(full_name="Test", birth_date=date(2000, 1, 1), gender=Gender.MALE))
+        await db.commit()
+        commits.clear()
+        crud_file = AsyncCRUDFile(File)
+        obj_in = FileCreate(patient_id=1, name="jaw.stl", file_path=str(path), file_type="stl_model")
+        created = await crud_file.create_with_version(db, obj_in=obj_in, file_content=b"v1")
+        version = await crud_file.create_new_version(db, file_id=created.id, file_content=b"v2")
+        missing = await crud_file.create_new_version(db, file_id=999, file_content=b"x")
+        versions = (await db.execute(select(FileVersion).order_by(FileVersion.version_number))).scalars().all()
+        return created, version, missing, [(v.version_number, open(v.file_path, "rb").read()) for v in versions]
+
+    created, version, missing, versions = asyncio.run(_with_session(work))
+
+    assert len(commits) == 2
+    assert created.created_at is not None and version.created_at is not None
+    assert missing is None
+    assert versions == [(1, b"v1"), (2, b"v2")]
+    assert path.read_bytes() == b"v2"
+    assert not list(tmp_path.glob("*.tmp"))
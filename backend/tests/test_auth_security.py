@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Тесты проверки паролей и ограничения частоты входа
+"""
+
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+from passlib.hash import bcrypt
+
+from app.core import security
+from app.utils.rate_limit import SlidingWindowRateLimiter
+
+
+def test_outdated_hash_is_replaced_on_login():
+    """Хэш с устаревшей стоимостью проверяется и заменяется на хэш с текущей"""
+    outdated = bcrypt.using(rounds=4).hash("secret")
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password("secret", outdated))
+    assert valid
+    assert bcrypt.from_string(new_hash).rounds == security.pwd_context.handler("bcrypt").default_rounds
+    assert security.verify_password("secret", new_hash)
+
+    assert asyncio.run(security.verify_and_update_password("wrong", outdated)) == (False, None)
+    assert asyncio.run(security.verify_and_update_password("secret", new_hash)) == (True, None)
+
+
+def test_saturated_hashing_pool_rejects_logins(monkeypatch):
+    """Когда пул хэширования и очередь заняты, проверка отклоняется, а не ставится в очередь"""
+    stored = bcrypt.using(rounds=4).hash("secret")
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(security, "_password_slots", slots)
+
+    slots.acquire()
+    with pytest.raises(security.PasswordHashBusy):
+        asyncio.run(security.verify_and_update_password("secret", stored))
+    slots.release()
+
+    assert asyncio.run(security.verify_and_update_password("secret", stored))[0]
+    # Слот освобожден после вычисления хэша
+    assert slots.acquire(blocking=False)
+
+
+def test_rate_limiter_blocks_until_window_passes():
+    """После исчерпания попыток ключ блокируется до освобождения окна, другие ключи не затронуты"""
+    limiter = SlidingWindowRateLimiter(max_attempts=2, window=60)
+
+    with mock.patch("app.utils.rate_limit.time.monotonic", return_value=100.0):
+        assert limiter.hit("a") == 0
+        assert limiter.hit("a") == 0
+        assert limiter.hit("a") == 60
+        assert limiter.hit("b") == 0
+    with mock.patch("app.utils.rate_limit.time.monotonic", return_value=130.0):
+        assert limiter.hit("a") == 30
+        limiter.reset("a")
+        assert limiter.hit("a") == 0
+    with mock.patch("app.utils.rate_limit.time.monotonic", return_value=200.0):
+        assert limiter.hit("b") == 0
+
+
+def test_rate_limiter_bounds_tracked_keys():
+    """Число отслеживаемых ключей ограничено"""
+    limiter = SlidingWindowRateLimiter(max_attempts=1, window=60, max_keys=3)
+    for key in range(10):
+        limiter.hit(key)
+    assert len(limiter._attempts) <= 3
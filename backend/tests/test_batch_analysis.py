@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Тесты пакетного анализа 3D моделей и потоковой выдачи результатов
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.api.v1.endpoints import model_helpers
+from app.crud.crud_modeling import CRUDThreeDModel
+from app.db.base import Base
+from app.models.base_3d_model import ModelFormat, ModelType
+from app.models.modeling import ThreeDModel
+from app.models.patient import Gender, Patient
+from app.schemas.modeling import ModelBatchAnalysisRequest
+from app.services import batch_analysis
+from app.services.batch_analysis import BatchAnalysisService
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Patient(full_name="Test", birth_date=date(2000, 1, 1), gender=Gender.MALE))
+    for name in ("upper.stl", "lower.stl"):
+        path = tmp_path / name
+        path.write_bytes(b"solid")
+        db.add(ThreeDModel(patient_id=1, model_type=ModelType.UPPER_JAW, model_format=ModelFormat.STL,
+                           file_path=str(path), original_filename=name, file_size=5))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+def _read_lines(response) -> list:
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    return [json.loads(line) for line in asyncio.run(collect())]
+
+
+def _thread_service(monkeypatch) -> BatchAnalysisService:
+    service = BatchAnalysisService(max_workers=2)
+    monkeypatch.setattr(service, "_get_executor", lambda: ThreadPoolExecutor(max_workers=2))
+    return service
+
+
+def test_analyze_yields_results_in_completion_order(monkeypatch):
+    """Результаты выдаются по мере готовности, ошибка модели не прерывает пакет"""
+    def fake_analyze(file_path, file_hash):
+        if file_path == "broken.stl":
+            raise ValueError("corrupted mesh")
+        # Первая модель заведомо анализируется дольше второй
+        if file_path == "slow.stl":
+            time.sleep(0.2)
+        return {"file_path": file_path}
+
+    monkeypatch.setattr(batch_analysis, "analyze_model_file", fake_analyze)
+    service = _thread_service(monkeypatch)
+
+    async def collect():
+        jobs = [(1, "slow.stl", None), (2, "fast.stl", None), (3, "broken.stl", None)]
+        return [result async for result in service.analyze(jobs)]
+
+    results = asyncio.run(collect())
+
+    assert [model_id for model_id, _, _ in results][-1] == 1
+    assert (3, None, "corrupted mesh") in results
+    assert (2, {"file_path": "fast.stl"}, None) in results
+
+
+def test_stream_reports_failures_and_commits_once(session_factory, monkeypatch):
+    """Каждая модель дает строку NDJSON, сводка последняя, результаты записываются одним коммитом"""
+    async def fake_analyze(jobs):
+        for model_id, file_path, _ in reversed(jobs):
+            if model_id == 2:
+                yield model_id, None, "corrupted mesh"
+            else:
+                yield model_id, {"vertices_count": 10, "faces_count": 4, "bounding_box": {},
+                                 "file_info": {"hash": "abc"}}, None
+
+    monkeypatch.setattr(model_helpers.batch_analysis_service, "analyze", fake_analyze)
+    monkeypatch.setattr(model_helpers, "SessionLocal", session_factory)
+    commits = []
+    event.listen(session_factory, "after_commit", lambda session: commits.append(session))
+    db = session_factory()
+
+    response = model_helpers.stream_batch_analysis(
+        db, CRUDThreeDModel(ThreeDModel), ModelBatchAnalysisRequest(model_ids=[1, 2, 99])
+    )
+    lines = _read_lines(response)
+
+    assert [line.get("model_id") for line in lines[:-1]] == [99, 2, 1]
+    assert lines[0]["error"] == "Model not found"
+    assert lines[1] == {**lines[1], "success": False, "error": "corrupted mesh"}
+    assert lines[2]["success"] is True
+    assert lines[-1]["summary"]["total"] == 3
+    assert lines[-1]["summary"]["succeeded"] == 1
+    assert lines[-1]["summary"]["committed"] is True
+    assert len(commits) == 1
+    db.expire_all()
+    assert db.get(ThreeDModel, 1).vertices_count == 10
+    assert db.get(ThreeDModel, 2).vertices_count is None
+    db.close()
+
+
+def test_patient_batch_over_limit_is_rejected(session_factory, monkeypatch):
+    """Пакет по пациенту с числом моделей больше лимита не обрезается молча"""
+    monkeypatch.setattr(model_helpers.settings, "BATCH_ANALYSIS_MAX_MODELS", 1)
+    db = session_factory()
+
+    with pytest.raises(HTTPException) as exc_info:
+        model_helpers.stream_batch_analysis(db, CRUDThreeDModel(ThreeDModel), ModelBatchAnalysisRequest(patient_id=1))
+
+    assert exc_info.value.status_code == 400
+    db.close()
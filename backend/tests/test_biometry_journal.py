@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Тесты журнала состояния сессий биометрии
+"""
+
+import pytest
+
+from app.services.biometry_journal import BiometrySessionStore, JournaledBiometryState
+
+
+def _fill(session: JournaledBiometryState) -> dict:
+    session.add_model_point({"x": 1.0, "y": 2.0, "z": 3.0})
+    session.add_map_point({"lat": 55.75, "lng": 37.61})
+    return session.add_pair(1, 1)
+
+
+def test_state_survives_restart(tmp_path):
+    """Состояние восстанавливается из журнала новым экземпляром (перезапуск)"""
+    journal = tmp_path / "s1.jsonl"
+    session = JournaledBiometryState("s1", journal, compact_after=1000)
+    _fill(session)
+    session.set_uploaded_path("/uploads/model.obj")
+
+    restored = JournaledBiometryState("s1", journal, compact_after=1000).refresh()
+
+    assert restored.get_pairs() == [{"id": 1, "model_id": 1, "map_id": 1}]
+    assert restored.last_uploaded_path == "/uploads/model.obj"
+    # Индексы восстановлены вместе с парами
+    assert restored.add_pair(1, 1)["id"] == 1
+
+
+def test_workers_share_state_and_sequences(tmp_path):
+    """Два воркера с общим журналом видят изменения друг друга и не повторяют ID"""
+    journal = tmp_path / "s1.jsonl"
+    worker_a = JournaledBiometryState("s1", journal, compact_after=1000)
+    worker_b = JournaledBiometryState("s1", journal, compact_after=1000)
+
+    worker_a.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})
+    point = worker_b.add_model_point({"x": 1.0, "y": 1.0, "z": 1.0})
+    worker_a.remove_model_point(point["id"])
+
+    assert point["id"] == 2
+    assert [p["id"] for p in worker_b.refresh().get_model_points()] == [1]
+    # Версия одинакова во всех воркерах: каждое событие увеличивает ее один раз
+    assert worker_b.state.version == worker_a.refresh().version == 3
+
+
+def test_journal_is_compacted(tmp_path):
+    """При превышении порога журнал заменяется снимком, другие воркеры перечитывают его"""
+    journal = tmp_path / "s1.jsonl"
+    worker_a = JournaledBiometryState("s1", journal, compact_after=5)
+    worker_b = JournaledBiometryState("s1", journal, compact_after=5)
+    worker_b.refresh()
+
+    for i in range(10):
+        worker_a.add_model_point({"x": float(i), "y": 0.0, "z": 0.0})
+
+    assert len(journal.read_text().splitlines()) < 10
+    assert len(worker_b.refresh().get_model_points()) == 10
+    assert worker_b.refresh().version == worker_a.state.version == 10
+    assert worker_b.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})["id"] == 11
+
+
+def test_sessions_are_isolated(tmp_path):
+    """Сессии с разными ID не разделяют точки"""
+    store = BiometrySessionStore(str(tmp_path), max_sessions=2, compact_after=1000)
+    _fill(store.get("clinic-a"))
+
+    assert store.get("clinic-b").refresh().get_pairs() == []
+    assert len(store.get("clinic-a").refresh().get_pairs()) == 1
+
+
+def test_batch_is_journaled_as_one_event(tmp_path):
+    """Пакет пишется одной записью журнала и воспроизводится после перезапуска"""
+    journal = tmp_path / "s1.jsonl"
+    session = JournaledBiometryState("s1", journal, compact_after=1000)
+    session.add_batch(
+        [{"x": float(i), "y": 0.0, "z": 0.0} for i in range(3)],
+        [{"lat": 55.0 + i, "lng": 37.0} for i in range(3)],
+        [{"model_index": i, "map_index": i} for i in range(3)],
+    )
+
+    assert len(journal.read_text().splitlines()) == 1
+    restored = JournaledBiometryState("s1", journal, compact_after=1000).refresh()
+    assert [(pair["model_id"], pair["map_id"]) for pair in restored.get_pairs()] == [(1, 1), (2, 2), (3, 3)]
+    assert restored.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})["id"] == 4
+
+
+def test_failed_append_does_not_keep_phantom_state(tmp_path, monkeypatch):
+    """Если запись в журнал не удалась, изменение не остается в памяти воркера"""
+    journal = tmp_path / "s1.jsonl"
+    worker_a = JournaledBiometryState("s1", journal, compact_after=1000)
+    worker_b = JournaledBiometryState("s1", journal, compact_after=1000)
+    worker_a.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})
+
+    def failing_append(events):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(worker_a, "_append", failing_append)
+    with pytest.raises(OSError):
+        worker_a.add_model_point({"x": 9.0, "y": 9.0, "z": 9.0})
+    monkeypatch.undo()
+
+    assert [p["x"] for p in worker_a.refresh().get_model_points()] == [0.0]
+    assert worker_b.add_model_point({"x": 1.0, "y": 1.0, "z": 1.0})["id"] == 2
+    assert worker_a.add_model_point({"x": 2.0, "y": 2.0, "z": 2.0})["id"] == 3
+    assert worker_a.refresh().get_model_points() == worker_b.refresh().get_model_points()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Тесты хранилища точек и пар биометрии
+"""
+
+import pytest
+
+from app.services.biometry_storage import CHANGE_LOG_SIZE, BiometryState
+
+
+def _state_with_points(model_count: int, map_count: int) -> BiometryState:
+    state = BiometryState()
+    for i in range(model_count):
+        state.add_model_point({"x": float(i), "y": 0.0, "z": 0.0})
+    for i in range(map_count):
+        state.add_map_point({"lat": 55.0 + i, "lng": 37.0})
+    return state
+
+
+def test_duplicate_pair_returns_existing():
+    """Повторное связывание тех же точек возвращает существующую пару"""
+    state = _state_with_points(2, 2)
+
+    first = state.add_pair(1, 1)
+    duplicate = state.add_pair(1, 1)
+    other = state.add_pair(1, 2)
+
+    assert duplicate is first
+    assert other["id"] != first["id"]
+    assert len(state.pairs) == 2
+
+
+def test_cleared_pair_can_be_created_again():
+    """После удаления пары индекс очищается и пару можно создать заново"""
+    state = _state_with_points(1, 1)
+
+    pair = state.add_pair(1, 1)
+    assert state.clear_pair(pair["id"])
+    assert state.get_pairs_for_model_point(1) == []
+
+    recreated = state.add_pair(1, 1)
+    assert recreated["id"] != pair["id"]
+
+
+def test_removing_point_cascades_to_its_pairs():
+    """Удаление точки удаляет только ее пары"""
+    state = _state_with_points(2, 3)
+    state.add_pair(1, 1)
+    state.add_pair(1, 2)
+    kept = state.add_pair(2, 3)
+
+    assert state.remove_model_point(1) == [1, 2]
+    assert list(state.pairs) == [kept["id"]]
+    assert state.get_pairs_for_map_point(1) == []
+    assert state.remove_model_point(1) is None
+
+    assert state.remove_map_point(3) == [kept["id"]]
+    assert state.pairs == {}
+
+
+def test_reset_clears_indexes():
+    """Сброс очищает индексы вместе с парами"""
+    state = _state_with_points(1, 1)
+    state.add_pair(1, 1)
+
+    state.reset_points()
+    state.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})
+    state.add_map_point({"lat": 0.0, "lng": 0.0})
+
+    assert state.add_pair(1, 1)["id"] == 1
+    assert state.get_pairs_for_model_point(1) == [state.pairs[1]]
+
+
+def test_batch_links_new_and_existing_points():
+    """Пакет добавляет точки и пары, ссылаясь на новые точки по индексу"""
+    state = _state_with_points(1, 1)
+    state.add_pair(1, 1)
+
+    result = state.add_batch(
+        [{"x": 1.0, "y": 2.0, "z": 3.0}, {"x": 4.0, "y": 5.0, "z": 6.0}],
+        [{"lat": 56.0, "lng": 38.0}],
+        [
+            {"model_index": 0, "map_index": 0},
+            {"model_index": 1, "map_id": 1},
+            {"model_id": 1, "map_id": 1},
+        ],
+    )
+
+    assert [point["id"] for point in result["model_points"]] == [2, 3]
+    assert [(pair["model_id"], pair["map_id"]) for pair in result["pairs"]] == [(2, 2), (3, 1), (1, 1)]
+    assert len(result["created_pairs"]) == 2
+    assert state.get_pairs_for_map_point(1) == [state.pairs[1], state.pairs[3]]
+
+
+def test_invalid_batch_changes_nothing():
+    """Ошибка в любой паре отклоняет весь пакет"""
+    state = _state_with_points(1, 1)
+
+    with pytest.raises(ValueError):
+        state.add_batch(
+            [{"x": 0.0, "y": 0.0, "z": 0.0}],
+            [],
+            [{"model_index": 0, "map_id": 1}, {"model_index": 1, "map_id": 1}],
+        )
+
+    assert len(state.model_points) == 1
+    assert state.pairs == {}
+    assert state.add_model_point({"x": 0.0, "y": 0.0, "z": 0.0})["id"] == 2
+
+
+def test_live_calibration_follows_pairs():
+    """Калибровка обновляется при добавлении пар и удалении точек"""
+    state = BiometryState()
+    for x, y in ((0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0)):
+        model_point = state.add_model_point({"x": x, "y": y, "z": 0.0})
+        map_point = state.add_map_point({"lat": 55.0 + y * 1e-3, "lng": 37.0 + x * 1e-3})
+        state.add_pair(model_point["id"], map_point["id"])
+
+    calibration = state.get_calibration()
+    assert calibration["points_count"] == 4
+    assert calibration["scale"] == pytest.approx(1e-3)
+    assert calibration["rms_error"] < 1e-9
+
+    state.remove_map_point(1)
+    state.remove_model_point(2)
+    assert state.get_calibration() is None
+
+
+def test_change_log_returns_delta_since_version():
+    """Журнал изменений отдает дельту, а при выходе за его пределы - признак перезагрузки"""
+    state = _state_with_points(2, 1)
+    known = state.version
+    state.add_pair(1, 1)
+    state.remove_model_point(2)
+
+    version, changes = state.get_changes(known)
+    assert version == known + 2
+    assert [change["op"] for change in changes] == ["add_pair", "remove_model_point"]
+    assert state.get_changes(version) == (version, [])
+
+    for i in range(CHANGE_LOG_SIZE):
+        state.add_map_point({"lat": 0.0, "lng": float(i)})
+    assert state.get_changes(known)[1] is None
+    assert state.get_changes(state.version + 5)[1] is None
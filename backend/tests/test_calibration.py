@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Тесты расчета преобразования калибровки биометрии
+"""
+
+import numpy as np
+import pytest
+import trimesh
+
+from app.services.calibration import (
+    CalibrationAccumulator,
+    parse_calibration_points,
+    ransac_similarity,
+    solve_similarity,
+)
+
+
+def _similarity(scale: float) -> np.ndarray:
+    matrix = trimesh.transformations.euler_matrix(0.3, -0.2, 1.1, axes='sxyz')
+    matrix[:3, :3] *= scale
+    matrix[:3, 3] = [12.0, -4.0, 7.5]
+    return matrix
+
+
+def test_exact_similarity_is_recovered():
+    """Известное преобразование подобия восстанавливается с нулевой невязкой"""
+    rng = np.random.default_rng(0)
+    source = rng.uniform(-50, 50, size=(200, 3))
+    expected = _similarity(2.5)
+    target = trimesh.transform_points(source, expected)
+
+    result = solve_similarity(source, target)
+
+    assert np.allclose(result['matrix'], expected, atol=1e-9)
+    assert result['scale'] == pytest.approx(2.5)
+    assert result['rms_error'] < 1e-9
+    assert len(result['residuals']) == 200
+
+
+def test_rigid_mode_keeps_unit_scale():
+    """Без подбора масштаба решается задача Кабша"""
+    rng = np.random.default_rng(1)
+    source = rng.uniform(-10, 10, size=(20, 3))
+    target = trimesh.transform_points(source, _similarity(1.0)) + rng.normal(0, 0.01, size=(20, 3))
+
+    result = solve_similarity(source, target, with_scale=False)
+
+    assert result['scale'] == 1.0
+    assert result['rms_error'] < 0.05
+    assert np.linalg.det(np.array(result['rotation_matrix'])) == pytest.approx(1.0)
+
+
+def test_points_formats_and_validation():
+    """Поддерживаются пары точек и параллельные списки; 2D цели дополняются z=0"""
+    pairs = {"points": [
+        {"source": [0, 0, 0], "target": {"x": 1, "y": 1}},
+        {"source": [1, 0, 0], "target": [2, 1]},
+        {"source": [0, 1, 0], "target": [1, 2]},
+    ]}
+    source, target = parse_calibration_points(pairs)
+    assert target.tolist() == [[1, 1, 0], [2, 1, 0], [1, 2, 0]]
+
+    with pytest.raises(ValueError):
+        parse_calibration_points({"source": [[0, 0, 0]], "target": [[1, 1, 1]]})
+    with pytest.raises(ValueError):
+        solve_similarity(np.array([[0, 0, 0], [1, 1, 1], [2, 2, 2.0]]), np.array([[0, 0, 0], [1, 1, 1], [2, 2, 2.0]]))
+
+
+@pytest.mark.parametrize("threshold", [None, 1e-3])
+def test_ransac_rejects_mismatched_pairs(threshold):
+    """Ошибочно связанные пары отбрасываются, преобразование уточняется по инлаерам"""
+    rng = np.random.default_rng(3)
+    source = rng.uniform(-50, 50, size=(60, 3))
+    expected = _similarity(0.01)
+    target = trimesh.transform_points(source, expected) + rng.normal(0, 1e-5, size=(60, 3))
+    outliers = [3, 10, 20, 33, 40, 41, 42]
+    target[outliers] += rng.uniform(0.05, 0.5, size=(len(outliers), 3))
+
+    result = ransac_similarity(source, target, inlier_threshold=threshold, seed=1)
+
+    assert np.flatnonzero(~np.array(result['inlier_mask'])).tolist() == outliers
+    assert np.allclose(result['matrix'], expected, atol=1e-4)
+    assert result['rms_error'] < 1e-4
+
+
+def test_accumulator_matches_full_solution():
+    """Накопленные статистики дают то же решение, что и расчет по всем парам"""
+    rng = np.random.default_rng(4)
+    source = rng.uniform(-30, 30, size=(40, 3))
+    # Географические координаты: большое смещение при малом разбросе
+    target = trimesh.transform_points(source, _similarity(1e-4)) + [37.6, 55.7, 0.0]
+    target += rng.normal(0, 1e-6, size=target.shape)
+    accumulator = CalibrationAccumulator()
+    for key, (s, t) in enumerate(zip(source, target)):
+        accumulator.add(key, s, t)
+    for key in range(0, 40, 3):
+        accumulator.remove(key)
+    kept = [key for key in range(40) if key % 3]
+
+    live = accumulator.solve()
+    expected = solve_similarity(source[kept], target[kept])
+
+    assert live['points_count'] == len(kept)
+    assert np.allclose(live['matrix'], expected['matrix'], atol=1e-9)
+    assert live['rms_error'] == pytest.approx(expected['rms_error'], rel=1e-3)
+
+
+def test_accumulator_needs_three_pairs():
+    """Меньше трех пар - калибровки нет; удаление всех пар обнуляет статистики"""
+    accumulator = CalibrationAccumulator()
+    accumulator.add(1, [0, 0, 0], [1, 1, 0])
+    accumulator.add(2, [1, 0, 0], [2, 1, 0])
+    assert accumulator.solve() is None
+
+    accumulator.add(3, [0, 1, 0], [1, 2, 0])
+    assert accumulator.solve()['rms_error'] < 1e-9
+
+    for key in (1, 2, 3):
+        assert accumulator.remove(key)
+    assert len(accumulator) == 0
+    assert accumulator.solve() is None
+
+
+def test_session_transform_is_applied_on_export(tmp_path):
+    """Экспорт с калибровкой: вершины преобразуются матрицей сессии и положением модели"""
+    from types import SimpleNamespace
+
+    from app.services.assimp_service import assimp_service
+    from app.services.calibration import transformation_to_matrix
+    from app.utils.mesh_helpers import pose_matrix
+
+    source = tmp_path / "box.stl"
+    box = trimesh.creation.box(extents=(2, 2, 2))
+    box.export(source)
+    model = SimpleNamespace(scale=2.0, position_x=1.0, position_y=0.0, position_z=0.0,
+                            rotation_x=0.0, rotation_y=0.0, rotation_z=90.0)
+    session_matrix = _similarity(0.5)
+    matrix = transformation_to_matrix({"matrix": session_matrix.tolist()}) @ pose_matrix(model)
+
+    output = tmp_path / "box.obj"
+    assert assimp_service.convert_format(str(source), str(output), "obj", matrix)
+
+    exported = trimesh.load(output)
+    expected = trimesh.transform_points(box.vertices, matrix)
+    assert np.allclose(np.sort(exported.vertices, axis=0), np.sort(expected, axis=0), atol=1e-5)
+    with pytest.raises(ValueError):
+        transformation_to_matrix({"matrix": [[1, 0], [0, 1]]})
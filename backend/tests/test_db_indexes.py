@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Тесты проверки и создания индексов для существующих таблиц
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.base import Base
+from app.db.indexes import check_indexes, create_missing_indexes, find_unindexed_foreign_keys
+
+
+def test_missing_indexes_are_reported_and_created(tmp_path):
+    """Индексы, добавленные в модели после создания таблиц, обнаруживаются и создаются"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'indexes.db'}")
+    Base.metadata.create_all(engine)
+    assert check_indexes(engine) == []
+    assert "documents.patient_id" not in find_unindexed_foreign_keys(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_documents_patient_id"))
+        conn.execute(text("DROP INDEX ix_file_versions_file_id"))
+
+    assert sorted(index.name for index in check_indexes(engine)) == ["ix_documents_patient_id", "ix_file_versions_file_id"]
+    assert "documents.patient_id" in find_unindexed_foreign_keys(engine)
+
+    assert sorted(create_missing_indexes(engine)) == ["ix_documents_patient_id", "ix_file_versions_file_id"]
+    assert check_indexes(engine) == []
+    assert "ix_documents_patient_id" in {index["name"] for index in inspect(engine).get_indexes("documents")}
+    engine.dispose()
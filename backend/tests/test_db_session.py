@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Тесты параметров движка базы данных и метрик пула соединений
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import session as db_session
+from app.db.session import _engine_options, _pool_status, get_pool_metrics
+
+POSTGRES_URL = "postgresql://user:secret@db:5432/app"
+
+
+def test_sqlite_gets_only_pre_ping():
+    """Для SQLite параметры пула PostgreSQL не передаются, проверка соединения включена"""
+    assert _engine_options("sqlite:///test.db") == {"pool_pre_ping": True}
+    assert _engine_options("sqlite+aiosqlite:///test.db", is_async=True) == {"pool_pre_ping": True}
+
+
+def test_postgres_pool_and_connect_args(monkeypatch):
+    """Размеры пула из настроек; application_name и statement_timeout передаются драйверу"""
+    settings = db_session.settings
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = _engine_options(POSTGRES_URL)
+
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert options["connect_args"] == {
+        "application_name": settings.DB_APPLICATION_NAME,
+        "options": "-c statement_timeout=5000",
+    }
+
+    async_options = _engine_options("postgresql+asyncpg://user:secret@db:5432/app", is_async=True)
+    assert async_options["connect_args"] == {
+        "server_settings": {"application_name": settings.DB_APPLICATION_NAME, "statement_timeout": "5000"}
+    }
+
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert "options" not in _engine_options(POSTGRES_URL)["connect_args"]
+
+
+def test_pool_status_reports_checked_out_connections(tmp_path):
+    """Состояние пула отражает выданные соединения"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    with engine.connect():
+        status = _pool_status(engine.pool)
+        assert status["pool_class"] == "QueuePool"
+        assert status["checkedout"] == 1
+    assert _pool_status(engine.pool)["checkedout"] == 0
+    engine.dispose()
+
+
+def test_pool_metrics_include_counters_and_async_pool(tmp_path, monkeypatch):
+    """Метрики содержат счетчики событий, а после создания асинхронного движка - и его пул"""
+    monkeypatch.setattr(db_session, "_async_engine", None)
+    metrics = get_pool_metrics()
+    assert {"pool_class", "status", "connects", "checkouts", "invalidations"} <= set(metrics)
+    assert "async" not in metrics
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    monkeypatch.setattr(db_session, "_async_engine", async_engine)
+    assert get_pool_metrics()["async"]["pool_class"] == type(async_engine.pool).__name__
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Тесты кэша результатов экспорта 3D моделей
+"""
+
+from app.services.export_cache import ExportCache
+
+
+def _producer(content: bytes, calls: list):
+    def produce(output_path: str) -> bool:
+        calls.append(output_path)
+        with open(output_path, "wb") as f:
+            f.write(content)
+        return True
+    return produce
+
+
+def test_repeated_export_is_served_from_cache(tmp_path):
+    """Повторный экспорт с тем же ключом не вызывает конвертацию"""
+    cache = ExportCache(str(tmp_path), max_size_bytes=1024, max_entries=10)
+    calls = []
+
+    first, first_hit = cache.get_or_create("hash-a", "stl", {"include_textures": False}, _producer(b"solid", calls))
+    second, second_hit = cache.get_or_create("hash-a", "stl", {"include_textures": False}, _producer(b"solid", calls))
+
+    assert first == second
+    assert not first_hit and second_hit
+    assert len(calls) == 1
+    assert first.read_bytes() == b"solid"
+
+
+def test_different_options_produce_different_files(tmp_path):
+    """Разные форматы и опции не перезаписывают друг друга"""
+    cache = ExportCache(str(tmp_path), max_size_bytes=1024, max_entries=10)
+    calls = []
+
+    stl_path, _ = cache.get_or_create("hash-a", "stl", None, _producer(b"a", calls))
+    obj_path, _ = cache.get_or_create("hash-a", "obj", None, _producer(b"b", calls))
+
+    assert stl_path != obj_path
+    assert stl_path.read_bytes() == b"a" and obj_path.read_bytes() == b"b"
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    """При превышении лимита вытесняется давно не использованный файл"""
+    cache = ExportCache(str(tmp_path), max_size_bytes=1024, max_entries=2)
+    calls = []
+
+    first, _ = cache.get_or_create("hash-a", "stl", None, _producer(b"a", calls))
+    cache.get_or_create("hash-b", "stl", None, _producer(b"b", calls))
+    cache.get_or_create("hash-a", "stl", None, _producer(b"a", calls))  # обращение обновляет порядок
+    cache.get_or_create("hash-c", "stl", None, _producer(b"c", calls))
+
+    assert first.exists()
+    assert cache.get_statistics()["entries"] == 2
+    assert len(calls) == 3
+
+
+def test_failed_export_is_not_cached(tmp_path):
+    """Неудачная конвертация не оставляет файлов в кэше"""
+    cache = ExportCache(str(tmp_path), max_size_bytes=1024, max_entries=10)
+
+    path, hit = cache.get_or_create("hash-a", "stl", None, lambda output_path: False)
+
+    assert path is None and not hit
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Тесты записи файлов и их версий одной транзакцией
+"""
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.crud.crud_file import CRUDFile, version_file_path
+from app.db.base import Base
+from app.models.file import File, FileVersion, MedicalFileType
+from app.models.patient import Gender, Patient
+from app.schemas.file import FileCreate
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'files.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Patient(full_name="Test", birth_date=date(2000, 1, 1), gender=Gender.MALE))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _file_in(path) -> FileCreate:
+    return FileCreate(patient_id=1, name="jaw.stl", file_path=str(path), file_type="stl_model")
+
+
+def _commits(db) -> list:
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+    return commits
+
+
+def test_upload_and_new_version_commit_once(db, tmp_path):
+    """Файл, версия и содержимое на диске записываются одним коммитом, временных файлов не остается"""
+    path = tmp_path / "jaw.stl"
+    crud_file = CRUDFile(File)
+    commits = _commits(db)
+
+    created = crud_file.create_with_version(db, obj_in=_file_in(path), file_content=b"v1")
+    version = crud_file.create_new_version(db, file_id=created.id, file_content=b"v2")
+
+    assert len(commits) == 2
+    assert created.created_at is not None
+    assert path.read_bytes() == b"v2"
+    versions = crud_file.get_versions(db, file_id=created.id)
+    assert [(v.version_number, Path(v.file_path).name.split(".")[:2]) for v in versions] == [
+        (1, ["jaw", "v1"]),
+        (2, ["jaw", "v2"]),
+    ]
+    assert [open(v.file_path, "rb").read() for v in versions] == [b"v1", b"v2"]
+    assert version.file_hash == db.get(File, created.id).file_hash
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_version_files_exist_before_commit(db, tmp_path, monkeypatch):
+    """Файлы, на которые ссылаются строки, записаны до коммита; после коммита заменяется только основной файл"""
+    path = tmp_path / "jaw.stl"
+    crud_file = CRUDFile(File)
+    created = crud_file.create_with_version(db, obj_in=_file_in(path), file_content=b"v1")
+    on_disk_at_commit = {}
+    commit = db.commit
+
+    def checking_commit():
+        on_disk_at_commit.update({p.name: p.read_bytes() for p in tmp_path.iterdir() if p.suffix == ".stl"})
+        commit()
+
+    monkeypatch.setattr(db, "commit", checking_commit)
+    version = crud_file.create_new_version(db, file_id=created.id, file_content=b"v2")
+    v1 = crud_file.get_version(db, file_id=created.id, version_number=1)
+
+    assert on_disk_at_commit == {"jaw.stl": b"v1", Path(v1.file_path).name: b"v1", Path(version.file_path).name: b"v2"}
+    assert version_file_path(str(path), 2) != version_file_path(str(path), 2)
+    assert path.read_bytes() == b"v2"
+
+
+def test_failed_commit_leaves_no_rows_or_files(db, tmp_path, monkeypatch):
+    """Ошибка коммита откатывает записи и удаляет подготовленные файлы"""
+    path = tmp_path / "jaw.stl"
+    crud_file = CRUDFile(File)
+    created = crud_file.create_with_version(db, obj_in=_file_in(path), file_content=b"v1")
+    file_id = created.id
+
+    def failing_commit():
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        crud_file.create_with_version(db, obj_in=_file_in(tmp_path / "other.stl"), file_content=b"x")
+    with pytest.raises(RuntimeError):
+        crud_file.create_new_version(db, file_id=file_id, file_content=b"v2")
+
+    assert db.query(File).count() == 1
+    assert db.query(FileVersion).count() == 1
+    assert path.read_bytes() == b"v1"
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix != ".db") == ["jaw.stl"]
+
+
+def test_files_by_category_returns_counts_and_latest(db):
+    """Группировка по типам: число файлов типа и последние N файлов одним запросом"""
+    from datetime import datetime, timedelta
+
+    start = datetime(2024, 1, 1)
+    for i in range(5):
+        db.add(File(patient_id=1, name=f"photo{i}", file_path=f"p{i}", file_type=MedicalFileType.PHOTO, created_at=start + timedelta(days=i)))
+    db.add(File(patient_id=1, name="ct", file_path="ct", file_type=MedicalFileType.DICOM, created_at=start))
+    db.add(File(patient_id=1, name="old", file_path="old", file_type=MedicalFileType.DICOM, created_at=start, is_active=False))
+    db.commit()
+    queries = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    grouped = CRUDFile(File).get_files_by_category(db, patient_id=1, limit_per_type=2)
+
+    assert len(queries) == 1
+    assert {file_type: group["count"] for file_type, group in grouped.items()} == {"photo": 5, "dicom": 1}
+    assert [file.name for file in grouped["photo"]["files"]] == ["photo4", "photo3"]
+    assert CRUDFile(File).get_files_by_category(db, patient_id=2) == {}
+
+
+def test_older_versions_at_main_path_are_reported_overwritten(db, tmp_path):
+    """Старые версии, хранившиеся только по пути основного файла, не выдаются за свое содержимое"""
+    path = tmp_path / "jaw.stl"
+    path.write_bytes(b"v2")
+    file = File(patient_id=1, name="jaw.stl", file_path=str(path), file_type=MedicalFileType.STL_MODEL)
+    db.add(file)
+    db.flush()
+    db.add_all([FileVersion(file_id=file.id, version_number=n, file_path=str(path)) for n in (1, 2)])
+    db.commit()
+    crud_file = CRUDFile(File)
+    v1, v2 = crud_file.get_versions(db, file_id=file.id)
+
+    assert crud_file.is_version_overwritten(db, file=file, version=v1)
+    assert not crud_file.is_version_overwritten(db, file=file, version=v2)
+
+    v3 = crud_file.create_new_version(db, file_id=file.id, file_content=b"v3")
+
+    # Последняя версия перенесена в собственный файл, первая по-прежнему недоступна
+    assert open(v2.file_path, "rb").read() == b"v2"
+    assert crud_file.is_version_overwritten(db, file=file, version=v1)
+    assert not crud_file.is_version_overwritten(db, file=file, version=v2)
+    assert not crud_file.is_version_overwritten(db, file=file, version=v3)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Тесты сервиса хэширования файлов
+"""
+
+import hashlib
+import os
+from datetime import date
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.db.base import Base
+from app.models.base_3d_model import ModelFormat, ModelType
+from app.models.modeling import ThreeDModel
+from app.models.patient import Gender, Patient
+from app.services.hashing_service import HASH_CHUNK_SIZE, hashing_service
+
+
+def test_hash_file_matches_in_memory_hash(tmp_path):
+    """Хэш файла, прочитанного блоками, совпадает с хэшем содержимого"""
+    content = os.urandom(HASH_CHUNK_SIZE * 2 + 123)
+    path = tmp_path / "model.stl"
+    path.write_bytes(content)
+
+    assert hashing_service.hash_file(str(path)) == hashlib.sha256(content).hexdigest()
+    assert hashing_service.hash_bytes(content) == hashlib.sha256(content).hexdigest()
+
+
+def test_stored_hash_is_backfilled_once(tmp_path):
+    """Пустой хэш вычисляется по файлу и сохраняется; дальше файл не читается"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'hash.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    path = tmp_path / "jaw.stl"
+    path.write_bytes(b"solid jaw")
+    db.add(Patient(full_name="Test", birth_date=date(2000, 1, 1), gender=Gender.MALE))
+    model = ThreeDModel(patient_id=1, model_type=ModelType.UPPER_JAW, model_format=ModelFormat.STL,
+                        file_path=str(path), original_filename="jaw.stl", file_size=9)
+    missing = ThreeDModel(patient_id=1, model_type=ModelType.LOWER_JAW, model_format=ModelFormat.STL,
+                          file_path=str(tmp_path / "missing.stl"), original_filename="missing.stl", file_size=0)
+    db.add_all([model, missing])
+    db.commit()
+
+    expected = hashlib.sha256(b"solid jaw").hexdigest()
+    assert hashing_service.get_stored_hash(db, model) == expected
+    db.expire_all()
+    assert db.get(ThreeDModel, model.id).file_hash == expected
+
+    with mock.patch.object(hashing_service, "hash_file") as hash_file:
+        assert hashing_service.get_stored_hash(db, model) == expected
+        hash_file.assert_not_called()
+
+    assert hashing_service.get_stored_hash(db, missing) is None
+    assert missing.file_hash is None
+    db.close()
+    engine.dispose()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Тесты сравнения версий 3D моделей
+"""
+
+import base64
+
+import numpy as np
+import trimesh
+
+from app.services.mesh_diff import MeshDiffService, deviation_colors
+
+
+def _export(mesh: trimesh.Trimesh, path) -> str:
+    mesh.export(str(path))
+    return str(path)
+
+
+def test_rigidly_moved_model_has_no_deviation(tmp_path):
+    """После выравнивания сдвинутая и повернутая копия совпадает с исходной"""
+    source = trimesh.creation.box(extents=[10.0, 6.0, 3.0])
+    target = source.copy()
+    transform = trimesh.transformations.rotation_matrix(0.2, [0, 0, 1])
+    transform[:3, 3] = [1.0, -0.5, 0.25]
+    target.apply_transform(transform)
+
+    result = MeshDiffService(max_entries=4).compare(
+        _export(source, tmp_path / "v1.stl"), _export(target, tmp_path / "v2.stl")
+    )
+
+    assert result["statistics"]["rms"] < 1e-3
+    assert result["statistics"]["within_tolerance"] == 1.0
+    assert np.allclose(result["alignment"]["matrix"], transform, atol=1e-3)
+    colors = np.frombuffer(base64.b64decode(result["colors"]), dtype=np.uint8).reshape(-1, 3)
+    assert len(colors) == result["vertices_count"] == len(source.vertices)
+
+
+def test_comparison_is_cached_by_version_hashes(tmp_path):
+    """Повторное сравнение той же пары версий берется из кэша"""
+    mesh = trimesh.creation.icosphere(subdivisions=2)
+    path = _export(mesh, tmp_path / "v1.stl")
+    service = MeshDiffService(max_entries=4)
+
+    first = service.compare(path, path, source_hash="a", target_hash="b")
+    second = service.compare(path, path, source_hash="a", target_hash="b")
+
+    assert not first["cached"] and second["cached"]
+    assert first["statistics"] == second["statistics"]
+
+
+def test_deviation_colors_are_diverging():
+    """Отрицательные отклонения синие, нулевые белые, положительные красные"""
+    colors = deviation_colors(np.array([-1.0, 0.0, 1.0, 5.0]), color_range=1.0)
+
+    assert colors.tolist() == [[0, 0, 255], [255, 255, 255], [255, 0, 0], [255, 0, 0]]
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Тесты разбора STL/OBJ из буфера в памяти
+"""
+
+import numpy as np
+import trimesh
+
+from app.services.mesh_ingest import is_binary_stl, load_mesh_from_buffer, parse_obj
+
+
+def _reference_mesh() -> trimesh.Trimesh:
+    return trimesh.creation.icosphere(subdivisions=2)
+
+
+def test_binary_stl_matches_trimesh_loader():
+    """Бинарный STL разбирается в тот же меш, что и штатным загрузчиком"""
+    reference = _reference_mesh()
+    buffer = bytearray(reference.export(file_type="stl"))
+
+    assert is_binary_stl(buffer)
+    mesh = load_mesh_from_buffer(buffer, "jaw.stl")
+
+    assert len(mesh.vertices) == len(reference.vertices)
+    assert len(mesh.faces) == len(reference.faces)
+    assert np.allclose(mesh.bounds, reference.bounds, atol=1e-6)
+    assert np.isclose(mesh.volume, reference.volume, rtol=1e-5)
+
+
+def test_ascii_stl_falls_back_to_trimesh():
+    """Текстовый STL загружается штатным загрузчиком trimesh из памяти"""
+    reference = _reference_mesh()
+    buffer = reference.export(file_type="stl_ascii").encode()
+
+    assert not is_binary_stl(buffer)
+    mesh = load_mesh_from_buffer(buffer, "jaw.stl")
+
+    assert len(mesh.faces) == len(reference.faces)
+
+
+def test_obj_parsed_in_chunks():
+    """OBJ, разбитый на маленькие блоки, разбирается так же, как целиком"""
+    reference = _reference_mesh()
+    buffer = reference.export(file_type="obj").encode()
+
+    whole_vertices, whole_faces = parse_obj(buffer)
+    chunk_vertices, chunk_faces = parse_obj(buffer, chunk_size=256)
+
+    assert np.array_equal(whole_vertices, chunk_vertices)
+    assert np.array_equal(whole_faces, chunk_faces)
+    assert len(whole_faces) == len(reference.faces)
+
+
+def test_obj_polygons_and_relative_indices():
+    """Многоугольники триангулируются, отрицательные индексы и v/vt/vn поддерживаются"""
+    buffer = (
+        b"# quad\n"
+        b"v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n"
+        b"vt 0 0\n"
+        b"f -4/1 -3/1 -2/1 -1/1\n"
+    )
+
+    vertices, faces = parse_obj(buffer)
+
+    assert vertices.shape == (4, 3)
+    assert faces.tolist() == [[0, 1, 2], [0, 2, 3]]
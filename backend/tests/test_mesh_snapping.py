@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Тесты привязки точек к модели
+"""
+
+import numpy as np
+import pytest
+import trimesh
+
+from app.services.mesh_snapping import MeshSnapService, SnapIndex
+
+
+def test_surface_snap_matches_brute_force():
+    """Привязка к поверхности совпадает с перебором всех треугольников"""
+    mesh = trimesh.creation.icosphere(subdivisions=2, radius=10.0)
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-15, 15, size=(50, 3))
+
+    snapped, distances = SnapIndex(mesh).snap_to_surface(points)
+
+    triangles = np.repeat(mesh.triangles[None], len(points), axis=0).reshape(-1, 3, 3)
+    candidates = trimesh.triangles.closest_point(triangles, np.repeat(points, len(mesh.faces), axis=0))
+    expected = np.linalg.norm(candidates - np.repeat(points, len(mesh.faces), axis=0), axis=1)
+    assert np.allclose(distances, expected.reshape(len(points), -1).min(axis=1))
+    assert np.allclose(np.linalg.norm(snapped - points, axis=1), distances)
+
+
+def test_index_is_cached_per_file_content(tmp_path):
+    """Индекс строится один раз для одинакового содержимого файла"""
+    path = tmp_path / "box.obj"
+    trimesh.creation.box(extents=(2, 2, 2)).export(path)
+    copy = tmp_path / "copy.obj"
+    copy.write_bytes(path.read_bytes())
+    service = MeshSnapService(max_entries=4)
+
+    snapped, distances = service.snap(str(path), np.array([[0.9, 0.9, 1.5]]), "vertex")
+
+    assert snapped.tolist() == [[1.0, 1.0, 1.0]]
+    assert service.get_index(str(copy)) is service.get_index(str(path))
+    with pytest.raises(ValueError):
+        service.snap(str(path), np.zeros((1, 3)), "edge")
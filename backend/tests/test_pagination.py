@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Тесты курсорной пагинации списков
+"""
+
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.api.v1.endpoints.pagination_helpers import NEXT_CURSOR_HEADER, paginate
+from app.crud.crud_modeling import CRUDModelingSession
+from app.db.base import Base
+from app.models.modeling import ModelingSession
+from app.models.patient import Gender, Patient
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Patient(full_name=name, birth_date=date(2000, 1, 1), gender=Gender.MALE) for name in ("A", "B")])
+    session.flush()
+    # Несколько сессий с одинаковым created_at: порядок внутри них задает id
+    tied = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(7):
+        session.add(ModelingSession(patient_id=1 if i % 3 else 2, created_at=tied if i < 5 else datetime(2024, 1, 2, i)))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_cursor_round_trip():
+    """Курсор кодирует ключ (created_at, id) и декодируется обратно"""
+    crud_session = CRUDModelingSession(ModelingSession)
+    obj = ModelingSession(id=42, created_at=datetime(2024, 3, 1, 8, 30, 15, 123456))
+
+    cursor = crud_session._encode_cursor(obj)
+
+    assert "=" not in cursor
+    assert crud_session._decode_cursor(cursor) == [datetime(2024, 3, 1, 8, 30, 15, 123456), 42]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "WzFd", "WyJ4IiwgMV0", "WyIyMDI0LTAxLTAxIiwgIjEiXQ"])
+def test_malformed_cursor_is_rejected(db, cursor):
+    """Поврежденный курсор, неверная длина ключа, дата или id дают ValueError и ответ 400"""
+    crud_session = CRUDModelingSession(ModelingSession)
+
+    with pytest.raises(ValueError):
+        crud_session.get_page(db, cursor=cursor, limit=2)
+    with pytest.raises(HTTPException) as exc_info:
+        paginate(db, crud_session, Response(), limit=2, cursor=cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_pages_cover_tied_timestamps_without_gaps(db):
+    """Страницы по курсору обходят все записи по одному разу, последняя страница без курсора"""
+    crud_session = CRUDModelingSession(ModelingSession)
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = Response()
+        items = paginate(db, crud_session, response, limit=2, cursor=cursor)
+        seen.extend(item.id for item in items)
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert seen == [1, 2, 3, 4, 5, 6, 7]
+    assert pages == 4
+    assert crud_session.get_page(db, limit=7) == (crud_session.get_multi(db, limit=7), None)
+
+
+def test_patient_pages_apply_filters(db):
+    """Выборка по пациенту постранично учитывает курсор и условия пациента"""
+    crud_session = CRUDModelingSession(ModelingSession)
+    filters = crud_session.patient_filters(1)
+
+    first, cursor = crud_session.get_page(db, limit=2, filters=filters)
+    rest, last_cursor = crud_session.get_page(db, cursor=cursor, limit=2, filters=filters)
+
+    assert [item.id for item in first + rest] == [2, 3, 5, 6]
+    assert last_cursor is None
+    assert [item.id for item in crud_session.get_multi(db, skip=1, limit=2, filters=filters)] == [3, 5]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Тесты сводки карточки пациента
+"""
+
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.crud.crud_patient import CRUDPatient
+from app.db.base import Base
+from app.models.biometry import BiometrySession
+from app.models.cephalometry import CephalometryAnalysis
+from app.models.file import File, MedicalFileType
+from app.models.modeling import ModelingSession
+from app.models.patient import Gender, Patient
+from app.schemas.patient import PatientSummary
+
+
+def _file(file_type: MedicalFileType, is_active: bool = True) -> File:
+    return File(patient_id=1, name="f", file_path="f", file_type=file_type, is_active=is_active)
+
+
+def test_summary_uses_fixed_number_of_queries(tmp_path):
+    """Сводка собирается за пять запросов независимо от числа записей"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Patient(full_name="Test", birth_date=date(2000, 1, 1), gender=Gender.MALE))
+    db.add_all([_file(MedicalFileType.PHOTO) for _ in range(3)])
+    db.add_all([_file(MedicalFileType.DICOM), _file(MedicalFileType.DICOM, is_active=False)])
+    db.add_all([ModelingSession(patient_id=1), ModelingSession(patient_id=1, is_active=False)])
+    db.add(BiometrySession(patient_id=1))
+    db.add_all([CephalometryAnalysis(patient_id=1) for _ in range(2)])
+    db.commit()
+    db.expire_all()
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    summary = CRUDPatient(Patient).get_summary(db, patient_id=1)
+
+    assert len(queries) == 5
+    assert summary["files"] == {"total": 4, "by_type": {"photo": 3, "dicom": 1}}
+    assert summary["records"]["cephalometry_analyses"]["count"] == 2
+    assert summary["records"]["documents"] == {"count": 0, "updated_at": None}
+    assert [s["id"] for s in summary["modeling_sessions"]] == [1]
+    assert summary["row_count"] == 1 + 4 + 2 + 2
+    payload = PatientSummary.model_validate(summary)
+    assert payload.biometry_sessions[0].status == "uploaded"
+    assert CRUDPatient(Patient).get_summary(db, patient_id=2) is None
+
+    db.close()
+    engine.dispose()
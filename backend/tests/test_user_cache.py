@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Тесты кэша пользователей для аутентификации
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - регистрация всех таблиц
+from app.crud.crud_user import CRUDUser
+from app.db.base import Base
+from app.models.user import User, UserAccountStatus, UserRole
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(User("doctor", "doctor@example.com", "Doctor", "hash", UserRole.WORKER))
+        db.commit()
+    queries.clear()
+    yield factory, queries
+    engine.dispose()
+
+
+def test_cached_user_skips_database(session_factory):
+    """Повторная аутентификация не обращается к базе, пользователь доступен после закрытия сессии"""
+    factory, queries = session_factory
+    users = CRUDUser(User)
+
+    with factory() as db:
+        first = users.get_cached(db, id=1)
+        db.commit()
+    with factory() as db:
+        second = users.get_cached(db, id=1)
+
+    assert second is first
+    assert second.username == "doctor"
+    assert len(queries) == 1
+    with factory() as db:
+        assert users.get_cached(db, id=2) is None
+
+
+def test_update_invalidates_cached_user(session_factory):
+    """Блокировка пользователя сразу видна при следующей аутентификации"""
+    factory, _ = session_factory
+    users = CRUDUser(User)
+
+    with factory() as db:
+        assert users.is_active(users.get_cached(db, id=1))
+        users.update(db, db_obj=users.get(db, id=1), obj_in={"account_status": UserAccountStatus.BLOCKED})
+
+    with factory() as db:
+        assert not users.is_active(users.get_cached(db, id=1))
+        users.remove(db, id=1)
+        assert users.get_cached(db, id=1) is None
@@ -3,13 +3,18 @@ import { Layout } from "./Layout";
 import { ModelViewer } from "./ModelViewer";
 import { MapViewer } from "./MapViewer";
 import { ConfigPanel } from "./ConfigPanel";
-import { biometryApi } from "../services/biometryApi";
+import { createBiometryApi } from "../services/biometryApi";
 import { getApiBaseUrl } from "../config/api";
 import type { MapPoint, ModelPoint, Pair, StatusResponse } from "../types";
 
 const apiBase = getApiBaseUrl();
 
-function BiometryApp() {
+type BiometryAppProps = {
+  sessionId: number;
+};
+
+function BiometryApp({ sessionId }: BiometryAppProps) {
+  const biometryApi = useMemo(() => createBiometryApi(sessionId), [sessionId]);
   const [modelUrl, setModelUrl] = useState<string>();
   const [modelPoints, setModelPoints] = useState<ModelPoint[]>([]);
   const [mapPoints, setMapPoints] = useState<MapPoint[]>([]);
@@ -22,17 +27,17 @@ function BiometryApp() {
   const refreshModelPoints = useCallback(async () => {
     const data = await biometryApi.getModelPoints();
     setModelPoints(data);
-  }, []);
+  }, [biometryApi]);
 
   const refreshMapPoints = useCallback(async () => {
     const data = await biometryApi.getMapPoints();
     setMapPoints(data);
-  }, []);
+  }, [biometryApi]);
 
   const refreshPairs = useCallback(async () => {
     const data = await biometryApi.getPairs();
     setPairs(data);
-  }, []);
+  }, [biometryApi]);
 
   const refreshStatus = useCallback(async () => {
     try {
@@ -41,7 +46,7 @@ function BiometryApp() {
     } catch (error) {
       console.error(error);
     }
-  }, []);
+  }, [biometryApi]);
 
   const refreshAll = useCallback(async () => {
     await Promise.all([refreshModelPoints(), refreshMapPoints(), refreshPairs(), refreshStatus()]);
@@ -64,7 +69,7 @@ function BiometryApp() {
       setModelUrl(absoluteUrl);
       await refreshStatus();
     },
-    [refreshStatus],
+    [biometryApi, refreshStatus],
   );
 
   const handleAddModelPoint = useCallback(
@@ -72,7 +77,7 @@ function BiometryApp() {
       await biometryApi.addModelPoint(coords);
       await refreshModelPoints();
     },
-    [refreshModelPoints],
+    [biometryApi, refreshModelPoints],
   );
 
   const handleAddMapPoint = useCallback(
@@ -80,7 +85,7 @@ function BiometryApp() {
       await biometryApi.addMapPoint(coords);
       await refreshMapPoints();
     },
-    [refreshMapPoints],
+    [biometryApi, refreshMapPoints],
   );
 
   const handleLink = useCallback(
@@ -88,7 +93,7 @@ function BiometryApp() {
       await biometryApi.addPair(payload);
       await Promise.all([refreshPairs(), refreshStatus()]);
     },
-    [refreshPairs, refreshStatus],
+    [biometryApi, refreshPairs, refreshStatus],
   );
 
   const handleDeletePair = useCallback(
@@ -96,13 +101,13 @@ function BiometryApp() {
       await biometryApi.deletePair(pairId);
       await Promise.all([refreshPairs(), refreshStatus()]);
     },
-    [refreshPairs, refreshStatus],
+    [biometryApi, refreshPairs, refreshStatus],
   );
 
   const handleExport = useCallback(async () => {
     const blob = await biometryApi.exportConfig();
     return blob;
-  }, []);
+  }, [biometryApi]);
 
   const handleClear = useCallback(async () => {
     await biometryApi.clearPoints();
@@ -110,7 +115,7 @@ function BiometryApp() {
     setModelPoints([]);
     setMapPoints([]);
     await refreshStatus();
-  }, [refreshStatus]);
+  }, [biometryApi, refreshStatus]);
 
   const layoutLeft = useMemo(
     () => (
@@ -1,13 +1,22 @@
 import React from 'react';
+import { useSearchParams } from 'react-router-dom';
 import BiometryApp from '../components/BiometryApp';
 import '../components/BiometryApp.css';
 
 const BiometryPage: React.FC = () => {
+  // ID сессии биометрии (BiometrySession), например /biometry?session=12
+  const [searchParams] = useSearchParams();
+  const sessionId = Number(searchParams.get('session'));
+
+  if (!Number.isInteger(sessionId) || sessionId <= 0) {
+    return <div>Сессия биометрии не выбрана</div>;
+  }
+
   return (
     <div style={{ height: '100vh', width: '100%' }}>
-      <BiometryApp />
+      <BiometryApp sessionId={sessionId} />
     </div>
   );
 };
 
-export default BiometryPage;
\ No newline at end of file
+export default BiometryPage;